@@ -1,10 +1,18 @@
 import streamlit as st
-import tempfile
+import atexit
 import os
-from plagiarism_backend import process_document, save_report_to_pdf
+import time
+from job_queue import (JobQueue, WorkerPool, done, failed, get_job_dir, get_job_workers, get_metrics_dir,
+                       queued, running)
+from llm_backends import get_backend_name
+import metrics
+from verdicts import score_value
 
-# Check for API token
-if not os.environ.get("AZURE_TOKEN"):
+# Seconds between job status checks while a document is processed
+job_poll_seconds = float(os.environ.get("PLAGIARISM_JOB_POLL_SECONDS", "1.5"))
+
+# Check for API token (only the hosted Azure backend needs one)
+if get_backend_name() == "azure" and not os.environ.get("AZURE_TOKEN"):
     st.error("⚠️ Azure API token not found. Please add your AZURE_TOKEN in the environment variables.")
     st.info("Contact your administrator to set up the Azure AI token for plagiarism detection.")
     st.stop()
@@ -16,6 +24,18 @@ st.set_page_config(
     layout="centered"
 )
 
+@st.cache_resource(show_spinner=False)
+def start_job_queue():
+    """Open the job queue once per server and start its workers unless they run separately"""
+    queue = JobQueue(get_job_dir())
+    if os.environ.get("PLAGIARISM_EXTERNAL_WORKERS") != "1":
+        pool = WorkerPool(queue.job_dir, workers=get_job_workers()).start()
+        # Running jobs go back in the queue when the server stops
+        atexit.register(pool.stop)
+    return queue
+
+job_queue = start_job_queue()
+
 # Main title
 st.title("📄 Document Plagiarism Checker")
 st.markdown("Upload your DOCX or PDF document to check for plagiarism and generate an assessment report.")
@@ -33,211 +53,147 @@ if uploaded_file is not None:
     st.success(f"File uploaded: {uploaded_file.name}")
     st.info(f"File size: {uploaded_file.size} bytes")
     
-    # Get file extension
-    file_extension = uploaded_file.name.split('.')[-1].lower()
+    # Optional identifiers; resubmissions then only re-check changed sections
+    col1, col2 = st.columns(2)
+    with col1:
+        learner_id = st.text_input("Learner ID (optional)").strip()
+    with col2:
+        booklet_id = st.text_input("Booklet ID (optional)", help="Defaults to the file name when a learner ID is given").strip()
+    if learner_id and not booklet_id:
+        booklet_id = os.path.splitext(uploaded_file.name)[0]
     
     # Process button
     if st.button("🔍 Process Document", type="primary"):
         try:
-            # Create progress bar and status container
-            progress_bar = st.progress(0)
-            status_text = st.empty()
-            
-            # Step 1: Prepare file
-            status_text.text("📁 Preparing file for processing...")
-            progress_bar.progress(10)
-            
-            # Save uploaded file to temporary location
-            with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_extension}") as tmp_file:
-                tmp_file.write(uploaded_file.getvalue())
-                temp_file_path = tmp_file.name
-            
-            # Step 2: Extract A.C. sections
-            status_text.text("📖 Extracting A.C. sections from document...")
-            progress_bar.progress(25)
-            
-            if file_extension == "docx":
-                from plagiarism_backend import extract_ac_sections_from_docx
-                ac_sections = extract_ac_sections_from_docx(temp_file_path)
-            else:  # pdf
-                from plagiarism_backend import extract_ac_sections_from_pdf
-                ac_sections = extract_ac_sections_from_pdf(temp_file_path)
-            
-            if not ac_sections:
-                raise ValueError("No A.C. sections found in the document")
-            
-            # Step 3: Detect document topic
-            status_text.text("🎯 Analyzing document topic...")
-            progress_bar.progress(35)
-            
-            from plagiarism_backend import detect_document_topic
-            sample_content = next(iter(ac_sections.values()))
-            document_topic = detect_document_topic(sample_content)
-            
-            # Step 4: Process each A.C. section with AI
-            total_sections = len(ac_sections)
-            ac_results = {}
-            
-            # Show found sections info with sorting
-            sorted_sections = sorted(ac_sections.keys(), key=lambda x: float(x))
-            st.info(f"Found {total_sections} A.C. sections: {', '.join(sorted_sections)}")
-            
-            # Show complete sequence that will be generated
-            section_numbers = [float(k) for k in ac_sections.keys()]
-            if section_numbers:
-                # Calculate expected complete sequence
-                major_numbers = {}
-                for ac_num in ac_sections.keys():
-                    parts = ac_num.split('.')
-                    major = int(parts[0])
-                    minor = int(parts[1])
-                    if major not in major_numbers:
-                        major_numbers[major] = []
-                    major_numbers[major].append(minor)
-                
-                complete_sequence = []
-                for major in sorted(major_numbers.keys()):
-                    minors = major_numbers[major]
-                    min_minor = min(minors)
-                    max_minor = max(minors)
-                    for minor in range(min_minor, max_minor + 1):
-                        complete_sequence.append(f"{major}.{minor}")
-                
-                missing_sections = [ac for ac in complete_sequence if ac not in ac_sections]
-                if missing_sections:
-                    st.info(f"📋 Complete sequence will be: {', '.join(complete_sequence)}")
-                    st.warning(f"⚠️ Missing sections to be added: {', '.join(missing_sections)}")
-                else:
-                    st.success(f"✅ Perfect sequence found: {', '.join(complete_sequence)}")
-            
-            for i, (ac_num, content) in enumerate(ac_sections.items()):
-                section_progress = 40 + (i * 30 // total_sections)
-                status_text.text(f"🤖 Analyzing A.C. {ac_num} with AI ({i+1}/{total_sections})...")
-                progress_bar.progress(section_progress)
-                
-                from plagiarism_backend import gpt_plagiarism_check, parse_gpt_response
-                
-                try:
-                    # Get AI response with timeout handling
-                    with st.spinner(f"Processing A.C. {ac_num}..."):
-                        gpt_response = gpt_plagiarism_check(ac_num, content, document_topic)
-                    
-                    # Debug: Show raw response (you can remove this later)
-                    with st.expander(f"Debug: A.C. {ac_num} Raw AI Response", expanded=False):
-                        st.text(gpt_response)
-                    
-                    # Parse the response
-                    parsed_result = parse_gpt_response(gpt_response)
-                    
-                    # Debug: Show parsed result
-                    with st.expander(f"Debug: A.C. {ac_num} Parsed Result", expanded=False):
-                        st.json(parsed_result)
-                    
-                    ac_results[ac_num] = parsed_result
-                    
-                    # Show progress for this section
-                    st.success(f"✅ A.C. {ac_num} completed - Score: {parsed_result['score']}, Status: {parsed_result['plagiarism']}")
-                    
-                except Exception as section_error:
-                    st.warning(f"⚠️ A.C. {ac_num} processing failed: {str(section_error)}")
-                    # Add fallback result for failed sections
-                    ac_results[ac_num] = {
-                        'plagiarism': 'No',
-                        'score': '10%',
-                        'level': 'Low',
-                        'feedback': f'Processing failed for A.C. {ac_num} due to technical issues. Manual review recommended.'
-                    }
-            
-            # Step 5: Generate report
-            status_text.text("📊 Generating assessment report...")
-            progress_bar.progress(75)
-            
-            from plagiarism_backend import generate_report
-            report_text = generate_report(ac_results, document_topic)
-            
-            # Step 6: Create PDF
-            status_text.text("📄 Creating PDF report...")
-            progress_bar.progress(90)
-            
-            with tempfile.NamedTemporaryFile(delete=False, suffix=".pdf") as pdf_file:
-                pdf_file_path = pdf_file.name
-            
-            save_report_to_pdf(report_text, pdf_file_path, document_topic)
-            
-            # Step 7: Complete
-            status_text.text("✅ Processing complete!")
-            progress_bar.progress(100)
-            
-            # Store results in session state
-            st.session_state.report_ready = True
-            st.session_state.pdf_file_path = pdf_file_path
-            st.session_state.document_topic = document_topic
-            st.session_state.ac_count = len(ac_results)
-            
-            # Clean up temp input file
-            os.unlink(temp_file_path)
-                
-            st.success("✅ Document processed successfully!")
-            
-            # Display summary
-            st.header("📋 Processing Summary")
-            col1, col2, col3 = st.columns(3)
-            
-            with col1:
-                st.metric("Document Topic", st.session_state.document_topic)
-            
-            with col2:
-                st.metric("A.C. Sections Found", st.session_state.ac_count)
-                
-            with col3:
-                pass_count = sum(1 for data in ac_results.values() 
-                               if data.get('plagiarism', '').lower() == 'no' or 
-                               data.get('level', '').lower() in ['low', 'medium'])
-                st.metric("Pass Rate", f"{pass_count}/{len(ac_results)}")
-            
-            # Show detailed results table
-            st.subheader("📊 Detailed Results")
-            results_data = []
-            for ac_num, data in ac_results.items():
-                plagiarism = data.get("plagiarism", "No")
-                score = data.get("score", "0%")
-                level = data.get("level", "Low")
-                feedback_preview = data.get("feedback", "No feedback")[:100] + "..."
-                decision = "Pass" if plagiarism.lower() == "no" or level.lower() in ["low", "medium"] else "Redo"
-                
-                results_data.append({
-                    "A.C. No": ac_num,
-                    "Decision": decision,
-                    "Plagiarism Score": score,
-                    "Level": level,
-                    "Feedback Preview": feedback_preview
-                })
-            
-            st.dataframe(results_data, use_container_width=True)
-            
+            # Queue the document; a worker process does the actual processing
+            # Copied to the job directory in chunks, without a second in-memory copy
+            uploaded_file.seek(0)
+            job_id = job_queue.submit(
+                uploaded_file,
+                uploaded_file.name,
+                learner_id=learner_id or None,
+                booklet_id=booklet_id or None
+            )
+            st.session_state.job_id = job_id
+            # Keep the job id in the URL so a browser refresh finds it again
+            st.query_params["job"] = job_id
+            st.rerun()
         except Exception as e:
-            st.error(f"❌ Error processing document: {str(e)}")
-            # Clean up temp file if it exists
-            try:
-                if 'temp_file_path' in locals():
-                    os.unlink(temp_file_path)
-            except:
-                pass
+            st.error(f"❌ Error submitting document: {str(e)}")
+
+# Job status section
+job_id = st.session_state.get("job_id") or st.query_params.get("job")
+job = job_queue.get(job_id) if job_id else None
+
+# Progress for each pipeline stage as (percent, status text)
+stage_progress = {
+    None: (10, "📁 Preparing file for processing..."),
+    "extract": (25, "📖 Extracting A.C. sections from document..."),
+    "history": (30, "🗂️ Comparing with the previous submission..."),
+    "topic": (35, "🎯 Analyzing document topic..."),
+    "overlap": (38, "🔁 Comparing with earlier submissions..."),
+    "sections": (40, "🤖 Analyzing A.C. sections with AI..."),
+    "missing": (72, "📋 Checking the A.C. sequence..."),
+    "details": (73, "🔎 Writing detailed feedback for flagged sections..."),
+    "table": (74, "📊 Building the results table..."),
+    "feedback": (75, "📝 Writing tutor feedback..."),
+    "report": (85, "📊 Generating assessment report..."),
+    "pdf": (90, "📄 Creating PDF report..."),
+}
+
+if job is not None and job['status'] in (queued, running):
+    st.header("⏳ Processing")
+    st.caption(f"Job {job['id']} - {job['file_name']}")
+    progress = job['progress'] or {}
+    
+    if job['status'] == queued:
+        ahead = job_queue.position(job['id'])
+        st.progress(5)
+        st.text(f"🕒 Waiting for a worker ({ahead} documents ahead)...")
+    else:
+        percent, message = stage_progress.get(progress.get('stage'), stage_progress[None])
+        total = progress.get('total') or 0
+        if progress.get('stage') == "sections" and total:
+            percent = 40 + (progress['completed'] * 30 // total)
+            message = f"🤖 Analyzed {progress['completed']}/{total} A.C. sections with AI..."
+        st.progress(percent)
+        st.text(message)
+        
+        if progress.get('found'):
+            st.info(f"Found {len(progress['found'])} A.C. sections: {', '.join(progress['found'])}")
+            if progress.get('missing'):
+                st.warning(f"⚠️ Missing sections to be added: {', '.join(progress['missing'])}")
+        if progress.get('reused'):
+            st.info(f"♻️ Unchanged since the last submission, verdicts reused: {', '.join(progress['reused'])}")
+        for section in progress.get('sections', []):
+            if not section.get('reused'):
+                st.success(f"✅ A.C. {section['ac_num']} completed - Score: {score_value(section['score'])}%, Status: {section['plagiarism']}")
+    
+    # Poll until the worker finishes; the script thread is only held for a moment
+    time.sleep(job_poll_seconds)
+    st.rerun()
 
-# Download section
-if hasattr(st.session_state, 'report_ready') and st.session_state.report_ready:
+elif job is not None and job['status'] == failed:
+    st.error(f"❌ Error processing document: {job['error'].splitlines()[0]}")
+    if st.button("🔄 Start Over"):
+        st.session_state.pop("job_id", None)
+        st.query_params.clear()
+        st.rerun()
+
+elif job is not None and job['status'] == done:
+    document_topic = job['result']['document_topic']
+    ac_results = job['result']['ac_results']
+    st.success("✅ Document processed successfully!")
+    
+    # Display summary
+    st.header("📋 Processing Summary")
+    col1, col2, col3 = st.columns(3)
+    
+    with col1:
+        st.metric("Document Topic", document_topic)
+    
+    with col2:
+        st.metric("A.C. Sections Found", len(ac_results))
+        
+    with col3:
+        pass_count = sum(1 for data in ac_results.values() 
+                       if data.get('plagiarism', '').lower() == 'no' or 
+                       data.get('level', '').lower() in ['low', 'medium'])
+        st.metric("Pass Rate", f"{pass_count}/{len(ac_results)}")
+    
+    # Show detailed results table
+    st.subheader("📊 Detailed Results")
+    results_data = []
+    for ac_num, data in ac_results.items():
+        plagiarism = data.get("plagiarism", "No")
+        score = f"{score_value(data.get('score', 0))}%"
+        level = data.get("level", "Low")
+        feedback_preview = data.get("feedback", "No feedback")[:100] + "..."
+        decision = "Pass" if plagiarism.lower() == "no" or level.lower() in ["low", "medium"] else "Redo"
+        
+        results_data.append({
+            "A.C. No": f"{ac_num} (re-evaluated)" if data.get("re_evaluated") else ac_num,
+            "Decision": decision,
+            "Plagiarism Score": score,
+            "Level": level,
+            "Feedback Preview": feedback_preview
+        })
+    
+    st.dataframe(results_data, use_container_width=True)
+    
+    # Download section
     st.header("📥 Download Report")
     
-    # Read the PDF file
+    # Read the PDF file stored under the job id
     try:
-        with open(st.session_state.pdf_file_path, "rb") as pdf_file:
+        with open(job['pdf_path'], "rb") as pdf_file:
             pdf_data = pdf_file.read()
         
         # Create download button
         st.download_button(
             label="📄 Download PDF Report",
             data=pdf_data,
-            file_name=f"plagiarism_report_{st.session_state.document_topic.replace(' ', '_')}.pdf",
+            file_name=f"plagiarism_report_{document_topic.replace(' ', '_')}.pdf",
             mime="application/pdf",
             type="primary"
         )
@@ -247,20 +203,40 @@ if hasattr(st.session_state, 'report_ready') and st.session_state.report_ready:
         # Clean up PDF file after download
         if st.button("🗑️ Clear Report", help="Clear the current report and start over"):
             try:
-                os.unlink(st.session_state.pdf_file_path)
+                os.unlink(job['pdf_path'])
             except:
                 pass
             
-            # Clear session state
-            for key in ['report_ready', 'pdf_file_path', 'document_topic', 'ac_count']:
-                if key in st.session_state:
-                    del st.session_state[key]
-            
+            # Forget the job
+            st.session_state.pop("job_id", None)
+            st.query_params.clear()
             st.rerun()
             
     except Exception as e:
         st.error(f"❌ Error preparing download: {str(e)}")
 
+elif job_id:
+    st.warning(f"⚠️ Job {job_id} was not found.")
+
+# Metrics written by the job workers, the same ones batch runs report
+with st.expander("📈 Processing metrics"):
+    snapshot = metrics.load_snapshots([get_metrics_dir(job_queue.job_dir)])
+    figures = metrics.summary(snapshot)
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Documents", figures['documents'], help=f"{figures['failed_documents']} failed")
+    col2.metric("Mean time per document", f"{figures['document_seconds_mean']:.1f}s")
+    col3.metric("Cache hit rate", f"{figures['cache_hit_rate']:.0%}")
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Model requests", figures['model_requests'])
+    col2.metric("Mean model latency", f"{figures['model_seconds_mean']:.2f}s")
+    col3.metric("Retries / fallbacks", f"{figures['retries']} / {figures['fallbacks']}")
+    st.download_button(
+        "Download Prometheus metrics",
+        metrics.prometheus_text(snapshot),
+        file_name="plagiarism_metrics.prom",
+        mime="text/plain"
+    )
+
 # Instructions section
 st.header("📝 Instructions")
 with st.expander("How to use this tool"):
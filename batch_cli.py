@@ -0,0 +1,293 @@
+"""Grade a whole cohort of DOCX/PDF booklets from the command line.
+
+Usage:
+    python batch_cli.py submissions/ --output-dir reports/
+    python batch_cli.py "cohort/**/*.pdf" --extract-workers 8 --max-model-calls 16
+"""
+import argparse
+import glob
+import json
+import os
+import threading
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+import plagiarism_backend as backend
+
+supported_extensions = (".docx", ".pdf")
+
+# --- Name report files ---
+def report_paths(paths, output_dir):
+    """Map each booklet to a unique PDF report path in output_dir"""
+    used = {}
+    mapping = {}
+    for path in paths:
+        stem = os.path.splitext(os.path.basename(path))[0]
+        count = used.get(stem, 0)
+        used[stem] = count + 1
+        name = f"{stem}_report.pdf" if count == 0 else f"{stem}_{count}_report.pdf"
+        mapping[path] = os.path.join(output_dir, name)
+    return mapping
+
+# --- Collect input files ---
+def find_booklets(inputs):
+    """Expand directories and glob patterns into a sorted list of booklet paths"""
+    paths = set()
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, _, files in os.walk(item):
+                for name in files:
+                    if name.lower().endswith(supported_extensions):
+                        paths.add(os.path.join(root, name))
+        else:
+            for path in glob.glob(item, recursive=True) or [item]:
+                if path.lower().endswith(supported_extensions):
+                    paths.add(path)
+    return sorted(paths)
+
+# --- Extraction, run in worker processes ---
+def init_extract_worker(pdf_workers):
+    """Share the CPUs between booklets, so each long PDF gets its part of them"""
+    import pdf_extraction
+    pdf_extraction.set_pdf_workers(pdf_workers)
+
+def extract_booklet(path):
+    """Extract A.C. sections from one booklet, returning (sections, seconds, worker metrics)"""
+    start = time.perf_counter()
+    file_type = os.path.splitext(path)[1].lower().lstrip('.')
+    sections = backend.extract_ac_sections(path, file_type)
+    # Extraction metrics live in this worker process until handed back
+    return sections, time.perf_counter() - start, metrics.registry.drain()
+
+# --- Analysis and report writing, run in threads ---
+def grade_booklet(path, ac_sections, pdf_path, section_workers):
+    """Analyze extracted sections and write the PDF report for one booklet.
+    
+    With pdf_path None no PDF is written; the returned 'report' can be
+    rendered later.
+    """
+    pipeline = backend.PlagiarismPipeline(max_workers=section_workers)
+    run = pipeline.run(
+        ac_sections=ac_sections,
+        submission_id=backend.default_submission_id(path),
+        pdf_path=pdf_path
+    )
+    return {
+        'topic': run['document_topic'],
+        'ac_results': run['ac_results'],
+        'report_pdf': pdf_path,
+        'report': run['report'],
+        'stage_seconds': {stage: round(seconds, 3) for stage, seconds in run['timings'].items()}
+    }
+
+class BatchRun:
+    """Drive extraction and grading for a list of booklets and record each outcome"""
+
+    def __init__(self, paths, output_dir, jsonl_path, extract_workers, booklet_workers,
+                 section_workers, write_pdf=True, render_workers=0, metrics_path=None):
+        self.paths = paths
+        self.output_dir = output_dir
+        self.jsonl_path = jsonl_path
+        self.extract_workers = extract_workers
+        self.booklet_workers = booklet_workers
+        self.section_workers = section_workers
+        self.pdf_paths = report_paths(paths, output_dir) if write_pdf else {}
+        # With render workers, PDFs are written by a process pool instead of the grading threads
+        self.render_workers = render_workers if write_pdf else 0
+        self.render_pool = None
+        self.metrics_path = metrics_path
+        self.succeeded = 0
+        self.failed = 0
+        self.sections = 0
+        self._lock = threading.Lock()
+
+    def _record(self, out, record):
+        with self._lock:
+            out.write(json.dumps(record) + "\n")
+            out.flush()
+            if record['status'] == 'ok':
+                self.succeeded += 1
+                self.sections += len(record['ac_results'])
+            else:
+                self.failed += 1
+            done = self.succeeded + self.failed
+        marker = "✅" if record['status'] == 'ok' else "❌"
+        print(f"{marker} [{done}/{len(self.paths)}] {record['file']}")
+
+    def _failure(self, path, stage, error):
+        return {
+            'file': path,
+            'status': 'error',
+            'stage': stage,
+            'error': f"{type(error).__name__}: {error}",
+            'traceback': ''.join(traceback.format_exception(type(error), error, error.__traceback__))
+        }
+
+    def _grade(self, out, path, ac_sections, extract_seconds):
+        start = time.perf_counter()
+        pdf_path = self.pdf_paths.get(path)
+        try:
+            result = grade_booklet(
+                path, ac_sections, None if self.render_pool else pdf_path, self.section_workers
+            )
+        except Exception as e:
+            self._record(out, self._failure(path, 'analysis', e))
+            return None
+        record = {'file': path, 'status': 'ok'}
+        stage_seconds = result.pop('stage_seconds')
+        report = result.pop('report')
+        record.update(result)
+        record['timings'] = {
+            'extract_seconds': round(extract_seconds, 3),
+            'analysis_seconds': round(time.perf_counter() - start, 3),
+            'stages': stage_seconds
+        }
+        if not self.render_pool or not pdf_path:
+            self._record(out, record)
+            return None
+
+        from report_renderer import render_chunk_with_metrics
+
+        # The record is written once its PDF is
+        record['report_pdf'] = pdf_path
+        recorded = threading.Event()
+        render_start = time.perf_counter()
+        future = self.render_pool.submit(render_chunk_with_metrics, [(report, pdf_path)])
+
+        def on_rendered(future):
+            try:
+                outcomes, worker_metrics = future.result()
+                metrics.registry.merge(worker_metrics)
+                error = outcomes[0][1]
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            if error is not None:
+                record.update({'status': 'error', 'stage': 'render', 'error': error})
+            record['timings']['render_seconds'] = round(time.perf_counter() - render_start, 3)
+            self._record(out, record)
+            recorded.set()
+
+        future.add_done_callback(on_rendered)
+        return recorded
+
+    def run(self):
+        # Process pools load multiprocessing, which --help and imports do not need
+        from concurrent.futures import ProcessPoolExecutor
+
+        os.makedirs(self.output_dir, exist_ok=True)
+        os.makedirs(os.path.dirname(os.path.abspath(self.jsonl_path)), exist_ok=True)
+        start = time.perf_counter()
+
+        if self.render_workers:
+            from report_renderer import start_render_pool
+            self.render_pool = start_render_pool(self.render_workers)
+
+        with open(self.jsonl_path, "a", encoding="utf-8") as out, \
+                ProcessPoolExecutor(
+                    max_workers=self.extract_workers,
+                    initializer=init_extract_worker,
+                    initargs=((os.cpu_count() or 1) // self.extract_workers,)
+                ) as extract_pool, \
+                ThreadPoolExecutor(max_workers=self.booklet_workers) as grade_pool:
+            extractions = {extract_pool.submit(extract_booklet, path): path for path in self.paths}
+            gradings = []
+            # Start grading each booklet as soon as its extraction finishes
+            for future in as_completed(extractions):
+                path = extractions[future]
+                try:
+                    ac_sections, extract_seconds, worker_metrics = future.result()
+                except Exception as e:
+                    self._record(out, self._failure(path, 'extraction', e))
+                    continue
+                metrics.registry.merge(worker_metrics)
+                gradings.append(grade_pool.submit(self._grade, out, path, ac_sections, extract_seconds))
+            renders = [future.result() for future in gradings]
+            for recorded in renders:
+                if recorded is not None:
+                    recorded.wait()
+
+        if self.render_pool:
+            self.render_pool.shutdown()
+            self.render_pool = None
+
+        elapsed = time.perf_counter() - start
+        if self.metrics_path:
+            metrics.write_snapshot(self.metrics_path)
+        metrics.dump_process_metrics("batch")
+        self.print_stats(elapsed)
+        return self.failed == 0
+
+    def print_stats(self, elapsed):
+        minutes = elapsed / 60 if elapsed else 0
+        print("\n📈 Batch summary")
+        print(f"   Booklets: {len(self.paths)} ({self.succeeded} succeeded, {self.failed} failed)")
+        print(f"   A.C. sections graded: {self.sections}")
+        print(f"   Wall time: {elapsed:.1f}s")
+        if elapsed:
+            print(f"   Throughput: {self.succeeded / minutes:.1f} booklets/min, "
+                  f"{self.sections / elapsed:.2f} sections/s")
+        figures = metrics.summary()
+        print(f"   Model requests: {figures['model_requests']} ({figures['model_seconds_mean']:.2f}s mean, "
+              f"{figures['retries']} retries, {figures['fallbacks']} fallbacks, "
+              f"{figures['cache_hit_rate']:.0%} cache hits)")
+        print(f"   Results: {self.jsonl_path}")
+        if self.metrics_path:
+            print(f"   Metrics: {self.metrics_path}")
+
+def positive_int(value):
+    """argparse type for worker and call counts, which must be at least 1"""
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, got {value}")
+    return number
+
+def non_negative_int(value):
+    """argparse type for optional process counts, where 0 turns the processes off"""
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, got {value}")
+    return number
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Grade a cohort of DOCX/PDF booklets.")
+    parser.add_argument("inputs", nargs="+", help="booklet files, directories or glob patterns")
+    parser.add_argument("--output-dir", default="reports", help="directory for PDF reports")
+    parser.add_argument("--jsonl", help="results file, one record per booklet (default: OUTPUT_DIR/results.jsonl)")
+    parser.add_argument("--extract-workers", type=positive_int, default=os.cpu_count() or 1,
+                        help="processes used for text extraction")
+    parser.add_argument("--max-model-calls", type=positive_int, default=8,
+                        help="model requests in flight across the whole run")
+    parser.add_argument("--booklet-workers", type=positive_int, default=4,
+                        help="booklets analyzed at the same time")
+    parser.add_argument("--section-workers", type=positive_int, default=4,
+                        help="A.C. sections analyzed at the same time within one booklet")
+    parser.add_argument("--no-pdf", action="store_true", help="skip writing PDF reports")
+    parser.add_argument("--render-workers", type=non_negative_int, default=0,
+                        help="processes that write PDF reports (0: written by the grading threads)")
+    parser.add_argument("--metrics", help="write the run's metrics here (.prom: Prometheus text, else JSON)")
+    args = parser.parse_args(argv)
+
+    paths = find_booklets(args.inputs)
+    if not paths:
+        parser.error("no DOCX or PDF files found")
+
+    backend.set_model_concurrency(args.max_model_calls)
+    print(f"📚 Grading {len(paths)} booklets")
+
+    run = BatchRun(
+        paths,
+        output_dir=args.output_dir,
+        jsonl_path=args.jsonl or os.path.join(args.output_dir, "results.jsonl"),
+        extract_workers=args.extract_workers,
+        booklet_workers=args.booklet_workers,
+        section_workers=args.section_workers,
+        write_pdf=not args.no_pdf,
+        render_workers=args.render_workers,
+        metrics_path=args.metrics
+    )
+    return 0 if run.run() else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,96 @@
+"""DOCX extraction throughput and peak memory, python-docx against the streaming reader.
+
+Usage: python benchmarks/bench_docx_extract.py --sections 400 --image-mb 20
+
+Modes, each run in a fresh process so peak RSS is its own:
+  python-docx  the previous extractor: the whole object model is loaded,
+               then every table cell and every body paragraph is walked
+  streaming    docx_extraction.py: word/document.xml is iterparsed from the
+               zip and each element dropped once read
+
+Both must find the same lines; the streaming reader returns them in
+document order and reads merged cells once.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from bench_upload import peak_rss_mb  # noqa: E402
+
+modes = ("python-docx", "streaming")
+
+def python_docx_lines(path):
+    from docx import Document
+
+    doc = Document(path)
+    for table in doc.tables:
+        for row in table.rows:
+            for cell in row.cells:
+                for para in cell.paragraphs:
+                    if para.text.strip():
+                        yield para.text.strip()
+    for para in doc.paragraphs:
+        if para.text.strip():
+            yield para.text.strip()
+
+def run_mode(mode, path, repeat):
+    """Extract the booklet repeat times in this process; return (median seconds, lines, peak RSS growth MB)"""
+    import docx  # noqa: F401  (counts towards the baseline in both modes)
+    import plagiarism_backend as backend
+
+    extract = python_docx_lines if mode == "python-docx" else backend.iter_docx_lines
+    baseline = peak_rss_mb()
+    seconds = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        lines = sum(1 for _ in extract(path))
+        seconds.append(time.perf_counter() - start)
+    return sorted(seconds)[len(seconds) // 2], lines, peak_rss_mb() - baseline
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=400)
+    parser.add_argument("--words", type=int, default=300, help="words per section")
+    parser.add_argument("--table-rate", type=float, default=0.5)
+    parser.add_argument("--image-mb", type=float, default=20, help="figure size, for a realistic upload size")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", choices=modes, help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        median, lines, peak_mb = run_mode(args.mode, args.path, args.repeat)
+        print(json.dumps({'median': median, 'lines': lines, 'peak_mb': peak_mb}))
+        return 0
+
+    from synthetic_booklets import write_booklet
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_booklet(os.path.join(directory, "booklet.docx"), sections=args.sections,
+                             words_per_section=args.words, table_rate=args.table_rate, seed=4,
+                             image_mb=args.image_mb)
+        print(f"DOCX booklet, {args.sections} sections, {os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        results = {}
+        for mode in modes:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, "--path", path,
+                 "--repeat", str(args.repeat)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            results[mode] = result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<12} {result['median'] * 1000:9.1f} ms  {result['lines'] / result['median']:10.0f} lines/s  "
+                  f"peak RSS +{result['peak_mb']:.1f} MB")
+        if results['python-docx']['lines'] != results['streaming']['lines']:
+            print(f"❌ Line counts differ: {results['python-docx']['lines']} vs {results['streaming']['lines']}")
+            return 1
+        print(f"Speedup: {results['python-docx']['median'] / results['streaming']['median']:.1f}x")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
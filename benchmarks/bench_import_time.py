@@ -0,0 +1,95 @@
+"""Import-time budget for the backend modules, measured with python -X importtime.
+
+Usage: python benchmarks/bench_import_time.py [--budget-ms 100] [--runs 5]
+
+Exits with status 1 when a module takes longer than the budget to import,
+or when importing it pulls in a heavy dependency that should only load
+when its stage is first used.
+"""
+import argparse
+import os
+import re
+import statistics
+import subprocess
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose import must stay cheap
+checked_modules = ["plagiarism_backend", "batch_cli"]
+
+# Median import time allowed per module (tests/test_import_time.py enforces it too)
+budget_ms = 100.0
+
+# Packages that must not be imported until their stage runs
+deferred_packages = ["docx", "PyPDF2", "reportlab", "azure"]
+
+line_pattern = re.compile(r'import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)')
+
+def measure(module):
+    """Import module in a fresh interpreter.
+
+    Returns (cumulative us, {name: cumulative us}) where the mapping only
+    covers what importing module itself pulled in, with direct imports
+    keyed by their bare name and nested ones prefixed with '>'.
+    """
+    output = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=root, capture_output=True, text=True, check=True
+    ).stderr
+    pending = {}
+    for line in output.splitlines():
+        match = line_pattern.match(line)
+        if not match:
+            continue
+        cumulative, depth, name = int(match.group(2)), len(match.group(3)) - 1, match.group(4)
+        if depth > 0:
+            # Children are printed before the module that imported them
+            pending[name if depth == 2 else '>' + name] = cumulative
+        elif name == module:
+            return cumulative, pending
+        else:
+            pending = {}
+    raise RuntimeError(f"{module} not found in -X importtime output")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--budget-ms", type=float, default=budget_ms, help="maximum median import time per module")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="slowest direct imports to list")
+    args = parser.parse_args()
+
+    failures = []
+    for module in checked_modules:
+        totals = []
+        imported = {}
+        for _ in range(args.runs):
+            total, imported = measure(module)
+            totals.append(total)
+        median_ms = statistics.median(totals) / 1000
+
+        status = "ok" if median_ms <= args.budget_ms else "OVER BUDGET"
+        print(f"{module:<20} {median_ms:8.1f} ms  (budget {args.budget_ms:.0f} ms)  {status}")
+        if median_ms > args.budget_ms:
+            failures.append(f"{module} imports in {median_ms:.1f} ms")
+
+        slowest = sorted(
+            ((us, name) for name, us in imported.items() if not name.startswith('>')),
+            reverse=True
+        )[:args.top]
+        for us, name in slowest:
+            print(f"    {name:<28} {us / 1000:8.1f} ms")
+
+        names = {name.lstrip('>') for name in imported}
+        loaded = [pkg for pkg in deferred_packages if any(n == pkg or n.startswith(pkg + '.') for n in names)]
+        if loaded:
+            failures.append(f"{module} eagerly imports {', '.join(loaded)}")
+
+    if failures:
+        print("\n❌ " + "\n❌ ".join(failures))
+        return 1
+    print("\n✅ Import-time budget met")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
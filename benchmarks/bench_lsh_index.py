@@ -0,0 +1,78 @@
+"""Query latency of the persistent LSH index as it grows.
+
+Usage: python benchmarks/bench_lsh_index.py --sizes 1000,10000,100000
+"""
+import argparse
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from lsh_index import LSHIndex  # noqa: E402
+
+def random_signature(rng, num_perm):
+    return [rng.getrandbits(32) for _ in range(num_perm)]
+
+def near_duplicate(rng, signature, similarity):
+    """Copy a signature, replacing enough slots to hit the target similarity"""
+    copy = list(signature)
+    for i in rng.sample(range(len(copy)), int(len(copy) * (1 - similarity))):
+        copy[i] = rng.getrandbits(32)
+    return copy
+
+def run(sizes, queries, similarity, seed):
+    rng = random.Random(seed)
+    with tempfile.TemporaryDirectory() as tmp:
+        index = LSHIndex(os.path.join(tmp, "bench_index.sqlite3"))
+        num_perm = index.hasher.num_perm
+        stored = []
+        print(f"{'sections':>10} {'insert/s':>10} {'p50 ms':>8} {'p95 ms':>8} {'recall':>7}")
+
+        for size in sizes:
+            batch = []
+            before = len(stored)
+            start = time.perf_counter()
+            while len(stored) + len(batch) < size:
+                number = len(stored) + len(batch)
+                signature = random_signature(rng, num_perm)
+                batch.append((f"sub{number // 10}", f"1.{number % 10}", signature, 400))
+                if len(batch) >= 1000:
+                    index.add_many(batch)
+                    stored.extend(batch)
+                    batch = []
+            if batch:
+                index.add_many(batch)
+                stored.extend(batch)
+            insert_rate = (len(stored) - before) / max(time.perf_counter() - start, 1e-9)
+
+            latencies = []
+            found = 0
+            for _ in range(queries):
+                submission_id, ac_number, signature, count = rng.choice(stored)
+                probe = near_duplicate(rng, signature, similarity)
+                start = time.perf_counter()
+                matches = index.query_signature(probe, count, exclude_submission="query")
+                latencies.append((time.perf_counter() - start) * 1000)
+                if any(m['submission_id'] == submission_id and m['ac_number'] == ac_number for m in matches):
+                    found += 1
+
+            latencies.sort()
+            p95 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.95))]
+            print(f"{size:>10} {insert_rate:>10.0f} {statistics.median(latencies):>8.2f} "
+                  f"{p95:>8.2f} {found / queries:>7.0%}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default="1000,10000,50000", help="comma-separated index sizes")
+    parser.add_argument("--queries", type=int, default=200, help="queries per size")
+    parser.add_argument("--similarity", type=float, default=0.6, help="similarity of planted near-duplicates")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    run([int(s) for s in args.sizes.split(',')], args.queries, args.similarity, args.seed)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,64 @@
+"""PDF extraction time against the number of worker processes.
+
+Usage: python benchmarks/bench_pdf_extract.py --sections 150 --workers 2,4,8
+
+Extracts a synthetic booklet of about one page per section, first in
+this process and then with each pool size, checks that every mode yields
+the same lines in the same order, and prints the speedup over serial
+extraction. Pool start-up is paid once before timing, as in a long-lived
+worker; --cold includes it.
+"""
+import argparse
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pdf_extraction  # noqa: E402
+from synthetic_booklets import write_booklet  # noqa: E402
+
+def extract(path, workers):
+    return list(pdf_extraction.iter_page_texts(path, workers=workers, min_pages=0))
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=150, help="sections, about one page each")
+    parser.add_argument("--words", type=int, default=450, help="words per section")
+    parser.add_argument("--workers", default=",".join(str(n) for n in (2, 4, 8) if n <= (os.cpu_count() or 1)) or "2",
+                        help="comma-separated pool sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--cold", action="store_true", help="start a new pool for every run")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_booklet(os.path.join(directory, "portfolio.pdf"), sections=args.sections,
+                             words_per_section=args.words, table_rate=0.3, seed=5)
+        expected = extract(path, 1)
+        print(f"{len(expected)} pages, {os.cpu_count()} CPUs")
+
+        baseline = None
+        for workers in [1] + [int(n) for n in args.workers.split(",")]:
+            if workers > 1 and not args.cold:
+                # Start the pool and load PyPDF2 in every worker before timing
+                assert extract(path, workers) == expected, f"pages out of order with {workers} workers"
+            seconds = []
+            for _ in range(args.repeat):
+                if args.cold:
+                    pdf_extraction.shutdown_pool()
+                start = time.perf_counter()
+                pages = extract(path, workers)
+                seconds.append(time.perf_counter() - start)
+                assert pages == expected, f"pages differ with {workers} workers"
+            median = statistics.median(seconds)
+            baseline = baseline or median
+            label = "serial" if workers == 1 else f"{workers} workers"
+            print(f"{label:<11} {median:7.2f}s  {len(expected) / median:7.1f} pages/s  "
+                  f"speedup {baseline / median:.2f}x")
+        pdf_extraction.shutdown_pool()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+"""PDF reports per second for a cohort, from Markdown text and from Report objects.
+
+Usage: python benchmarks/bench_report_render.py --reports 1000 --workers 4
+
+Modes:
+  legacy    the previous save_report_to_pdf: Markdown split on blank lines
+            and pipes, styles rebuilt and every cell a Paragraph per report
+  markdown  save_report_to_pdf on generate_report's Markdown, parsed back
+            into a Report
+  direct    Report objects rendered in this process by one shared renderer
+  pool      render_reports on a process pool (skipped with --workers 1)
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table  # noqa: E402
+
+from plagiarism_backend import save_report_to_pdf  # noqa: E402
+from report_model import build_report  # noqa: E402
+from report_renderer import ReportRenderer, column_widths, get_renderer, render_reports  # noqa: E402
+
+words = (
+    "the learner explains how management theory applies to planning budgeting staffing "
+    "communication leadership quality policy evaluation review stakeholders outcomes"
+).split()
+
+def synthetic_report(rng):
+    """A report with 6-20 sections and feedback of realistic length"""
+    ac_results = {}
+    for i in range(rng.randint(6, 20)):
+        score = rng.randint(0, 95)
+        ac_results[f"{i // 5 + 1}.{i % 5 + 1}"] = {
+            'plagiarism': "Yes" if score > 60 else "No",
+            'score': f"{score}%",
+            'level': "High" if score > 60 else "Low",
+            'feedback': ' '.join(rng.choice(words) for _ in range(rng.randint(20, 60)))
+        }
+    tutor_feedback = "First Marking: 01-01-2026\n\n" + ' '.join(rng.choice(words) for _ in range(140)) + \
+        "\n\nAction Point: This work booklet is Subject to IQA"
+    return build_report(ac_results, "Leadership and Management", tutor_feedback)
+
+# --- Baseline: the Markdown-parsing renderer used before ---
+def legacy_save_report_to_pdf(report_text, file_path):
+    renderer = ReportRenderer()
+    styles = renderer.styles
+    report_parts = report_text.split("\n\n")
+    elements = [Paragraph(report_parts[0].replace("📘", "").replace("**", ""), styles['title'])]
+    table_lines = report_parts[1].split('\n')
+    table_data = [[Paragraph(cell.strip(), styles['table_header']) for cell in table_lines[0].split('|')[1:-1]]]
+    for line in table_lines[2:]:
+        if '|' in line:
+            table_data.append([Paragraph(cell.strip(), styles['table_cell']) for cell in line.split('|')[1:-1]])
+    table = Table(table_data, colWidths=column_widths, repeatRows=1, splitByRow=True)
+    table.setStyle(renderer.table_style)
+    elements.extend([table, Spacer(1, 36), Paragraph("Tutor Feedback & Marking", styles['tutor_heading'])])
+    tutor_content = "\n\n".join(report_parts[3:])
+    elements.append(KeepTogether([
+        Paragraph(line.strip(), styles['body']) for line in tutor_content.split('\n') if line.strip()
+    ]))
+    SimpleDocTemplate(file_path, **renderer.page).build(elements)
+
+def run_legacy(reports, out_dir):
+    for i, report in enumerate(reports):
+        legacy_save_report_to_pdf(report.to_markdown(), os.path.join(out_dir, f"legacy_{i}.pdf"))
+
+def run_markdown(reports, out_dir):
+    for i, report in enumerate(reports):
+        save_report_to_pdf(report.to_markdown(), os.path.join(out_dir, f"markdown_{i}.pdf"))
+
+def run_direct(reports, out_dir):
+    renderer = get_renderer()
+    for i, report in enumerate(reports):
+        renderer.render(report, os.path.join(out_dir, f"direct_{i}.pdf"))
+
+def run_pool(reports, out_dir, workers, chunk_size):
+    jobs = [(report, os.path.join(out_dir, f"pool_{i}.pdf")) for i, report in enumerate(reports)]
+    errors = [error for _, error in render_reports(jobs, workers=workers, chunk_size=chunk_size) if error]
+    if errors:
+        raise RuntimeError(f"{len(errors)} reports failed, first: {errors[0]}")
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--reports", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="render processes")
+    parser.add_argument("--chunk-size", type=int, default=16, help="reports per pool task")
+    parser.add_argument("--modes", default="legacy,markdown,direct,pool")
+    args = parser.parse_args()
+
+    rng = random.Random(1)
+    reports = [synthetic_report(rng) for _ in range(args.reports)]
+    modes = args.modes.split(",")
+    if args.workers == 1 and "pool" in modes:
+        modes.remove("pool")
+
+    print(f"{args.reports} reports, {sum(len(r.rows) for r in reports) / args.reports:.1f} rows each, "
+          f"{args.workers} workers")
+    baseline = None
+    with tempfile.TemporaryDirectory() as out_dir:
+        for mode in modes:
+            start = time.perf_counter()
+            if mode == "legacy":
+                run_legacy(reports, out_dir)
+            elif mode == "markdown":
+                run_markdown(reports, out_dir)
+            elif mode == "direct":
+                run_direct(reports, out_dir)
+            else:
+                run_pool(reports, out_dir, args.workers, args.chunk_size)
+            elapsed = time.perf_counter() - start
+            rate = args.reports / elapsed
+            baseline = baseline or rate
+            print(f"{mode:<9} {rate:8.1f} PDFs/s  ({elapsed:.1f}s, {rate / baseline:.2f}x)")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,122 @@
+"""Lines per second of A.C. section segmentation, before and after the shared engine.
+
+Usage: python benchmarks/bench_segmentation.py --lines 50000
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from section_segmentation import docx_ac_grammar, pdf_ac_grammar, segment_lines  # noqa: E402
+
+words = (
+    "the learner explains how management theory applies to planning budgeting staffing "
+    "communication leadership quality policy evaluation review stakeholders outcomes"
+).split()
+
+def synthetic_lines(count, section_every, seed):
+    """Body lines with an A.C. header every section_every lines and some numbered noise"""
+    rng = random.Random(seed)
+    lines = []
+    major, minor = 1, 0
+    for i in range(count):
+        if i % section_every == 0:
+            minor += 1
+            if minor > 9:
+                major, minor = major + 1, 1
+            lines.append(f"A.C. {major}.{minor} COVERED: Explain the topic")
+        elif rng.random() < 0.02:
+            lines.append(f"Figure {rng.randint(1, 9)}: chart of results")
+        else:
+            lines.append(' '.join(rng.choice(words) for _ in range(rng.randint(6, 18))))
+    return lines
+
+# --- Baseline: the per-call six-pattern loop both extractors used before ---
+def legacy_docx_segment(lines):
+    ac_patterns = [
+        re.compile(r'^A\.C\.?\s*(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
+        re.compile(r'^A\.C\.?\s*(\d+\.\d+)', re.IGNORECASE),
+        re.compile(r'A\.C\.?\s*(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
+        re.compile(r'A\.C\.?\s*(\d+\.\d+)', re.IGNORECASE),
+        re.compile(r'^(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
+        re.compile(r'^(\d+\.\d+)', re.IGNORECASE)
+    ]
+    sections = {}
+    current_ac = None
+    for text_line in lines:
+        matched = False
+        for pattern in ac_patterns:
+            match = pattern.match(text_line)
+            if match:
+                current_ac = match.group(1)
+                sections[current_ac] = text_line
+                matched = True
+                break
+        if not matched and current_ac:
+            if re.match(r'^\d+\.\d+', text_line) and not any(pattern.match(text_line) for pattern in ac_patterns):
+                pass
+            else:
+                sections[current_ac] += '\n' + text_line
+    return sections
+
+def legacy_pdf_segment(lines):
+    ac_patterns = [
+        re.compile(r'^A\.C\.?\s*(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
+        re.compile(r'^A\.C\.?\s*(\d+\.\d+)', re.IGNORECASE),
+        re.compile(r'A\.C\.?\s*(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
+        re.compile(r'A\.C\.?\s*(\d+\.\d+)', re.IGNORECASE),
+        re.compile(r'^(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
+        re.compile(r'^(\d+\.\d+)(?=\s|$)', re.IGNORECASE)
+    ]
+    sections = {}
+    current_ac = None
+    for line in lines:
+        matched = False
+        for pattern in ac_patterns:
+            match = pattern.match(line)
+            if match:
+                current_ac = match.group(1)
+                sections[current_ac] = line
+                matched = True
+                break
+        if not matched and current_ac:
+            sections[current_ac] += '\n' + line
+    return sections
+
+def best_rate(func, lines, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(lines)
+        best = min(best, time.perf_counter() - start)
+    return len(lines) / best
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--lines", type=int, default=50000, help="lines per synthetic document")
+    parser.add_argument("--section-every", type=int, default=40, help="lines per A.C. section")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--seed", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = synthetic_lines(args.lines, args.section_every, args.seed)
+    cases = [
+        ("docx", legacy_docx_segment, lambda ls: segment_lines(ls, docx_ac_grammar, verbose=False)),
+        ("pdf", legacy_pdf_segment, lambda ls: segment_lines(ls, pdf_ac_grammar, verbose=False)),
+    ]
+
+    print(f"{len(lines)} lines, {args.lines // args.section_every} sections")
+    print(f"{'format':<6} {'before lines/s':>15} {'after lines/s':>15} {'speedup':>8}")
+    for name, before, after in cases:
+        if before(lines) != after(lines):
+            raise SystemExit(f"{name}: engine output differs from the legacy extractor")
+        before_rate = best_rate(before, lines, args.repeat)
+        after_rate = best_rate(after, lines, args.repeat)
+        print(f"{name:<6} {before_rate:>15,.0f} {after_rate:>15,.0f} {after_rate / before_rate:>7.1f}x")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+"""Repeatable per-stage and end-to-end benchmarks, saved as JSON and compared between commits.
+
+Usage:
+    python benchmarks/bench_suite.py --output bench/base.json
+    python benchmarks/bench_suite.py --baseline bench/base.json --output bench/new.json
+    python benchmarks/bench_suite.py --only extract_pdf,parse_json --repeat 10
+
+Every benchmark runs on synthetic booklets (synthetic_booklets.py) and
+the stub model with a fixed seed and latency, with the response cache,
+submission history, topic classifier and overlap index switched off, so
+two runs on the same machine measure the code and nothing else. Each
+benchmark runs once to warm up and then --repeat times; the median is
+compared against the baseline and a slowdown beyond --threshold is
+flagged as a regression (exit status 1).
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Nothing learned or stored by earlier runs may change the work done
+os.environ.update({
+    'PLAGIARISM_CACHE_PATH': "",
+    'PLAGIARISM_HISTORY_PATH': "",
+    'PLAGIARISM_TOPIC_MODEL': "",
+    'PLAGIARISM_TOPIC_EXAMPLES': "",
+})
+os.environ.pop("PLAGIARISM_INDEX_PATH", None)
+
+import plagiarism_backend as backend  # noqa: E402
+from llm_backends import StubBackend, set_backend  # noqa: E402
+from section_segmentation import docx_ac_grammar, segment_lines  # noqa: E402
+from synthetic_booklets import write_booklet  # noqa: E402
+
+# --- Fixtures ---
+def make_fixtures(directory, sections, words):
+    """Booklets on disk plus the model answers and results the later stages consume"""
+    spec = {'sections': sections, 'words_per_section': words, 'seed': 7}
+    docx_path = write_booklet(os.path.join(directory, "booklet.docx"), **spec)
+    pdf_path = write_booklet(os.path.join(directory, "booklet.pdf"), **spec)
+
+    stub = StubBackend(latency_ms=0, seed=1)
+    rng = stub._request_random()
+    json_prompt = f"Reply with ONLY this JSON object:\n{backend.verdict_schema('note')}"
+    json_answers = [stub.respond("", json_prompt, rng) for _ in range(1000)]
+    text_answers = [stub.respond("", "Respond in EXACTLY this format", rng) for _ in range(1000)]
+
+    with quiet():
+        lines = list(backend.iter_docx_lines(docx_path))
+        ac_sections = backend.extract_ac_sections(docx_path, "docx")
+    ac_results = {ac_num: backend.parse_gpt_response(json_answers[i]) for i, ac_num in enumerate(ac_sections)}
+    tutor_feedback = stub.respond("You are an experienced tutor", "", rng)
+    return {
+        'docx_path': docx_path,
+        'pdf_path': pdf_path,
+        'lines': lines,
+        'json_answers': json_answers,
+        'text_answers': text_answers,
+        'ac_results': ac_results,
+        'tutor_feedback': tutor_feedback,
+        'out_dir': directory
+    }
+
+@contextlib.contextmanager
+def quiet():
+    """Drop progress prints, so terminal speed does not enter the timings"""
+    with open(os.devnull, "w") as sink, contextlib.redirect_stdout(sink):
+        yield
+
+# --- Benchmarks: name -> (unit, items per run, function) ---
+def build_benchmarks(fixtures, latency_ms):
+    f = fixtures
+
+    def parse_all(answers):
+        for answer in answers:
+            backend.parse_gpt_response(answer)
+
+    def reports(count):
+        for _ in range(count):
+            backend.generate_report(f['ac_results'], "Leadership and Management", f['tutor_feedback'])
+
+    def render(count):
+        report = backend.generate_report(f['ac_results'], "Leadership and Management", f['tutor_feedback'])
+        for i in range(count):
+            backend.save_report_to_pdf(report, os.path.join(f['out_dir'], f"report_{i}.pdf"))
+
+    def end_to_end(path, file_type):
+        set_backend(StubBackend(latency_ms=latency_ms, latency_sigma=0, seed=1))
+        backend.process_document(path, file_type)
+
+    sections = len(f['ac_results'])
+    return {
+        'extract_docx': ("booklets", 1, lambda: backend.extract_ac_sections(f['docx_path'], "docx")),
+        'extract_pdf': ("booklets", 1, lambda: backend.extract_ac_sections(f['pdf_path'], "pdf")),
+        'segment_lines': ("lines", len(f['lines']) * 20,
+                          lambda: [segment_lines(f['lines'], docx_ac_grammar, verbose=False) for _ in range(20)]),
+        'parse_json': ("verdicts", len(f['json_answers']), lambda: parse_all(f['json_answers'])),
+        'parse_text': ("verdicts", len(f['text_answers']), lambda: parse_all(f['text_answers'])),
+        'generate_report': ("reports", 200, lambda: reports(200)),
+        'save_report_to_pdf': ("reports", 5, lambda: render(5)),
+        'process_document_docx': ("sections", sections, lambda: end_to_end(f['docx_path'], "docx")),
+        'process_document_pdf': ("sections", sections, lambda: end_to_end(f['pdf_path'], "pdf")),
+    }
+
+def measure(func, repeat):
+    with quiet():
+        func()
+        seconds = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            func()
+            seconds.append(time.perf_counter() - start)
+    return seconds
+
+# --- Results and comparison ---
+def git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, timeout=10,
+            cwd=os.path.dirname(os.path.abspath(__file__))
+        ).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+def compare(results, baseline, threshold):
+    """Print the change of each median against the baseline; return the names that regressed"""
+    regressions = []
+    print(f"\nAgainst {baseline['meta'].get('commit') or 'baseline'} (threshold {threshold:.0%}):")
+    for name, result in results.items():
+        previous = baseline['results'].get(name)
+        if previous is None:
+            print(f"  {name:<24} new")
+            continue
+        change = result['median'] / previous['median'] - 1 if previous['median'] else 0.0
+        marker = "✅"
+        if change > threshold:
+            marker = "❌"
+            regressions.append(name)
+        elif change < -threshold:
+            marker = "🚀"
+        print(f"  {marker} {name:<22} {previous['median'] * 1000:9.2f} ms → {result['median'] * 1000:9.2f} ms "
+              f"({change:+.1%})")
+    return regressions
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=5, help="timed runs per benchmark")
+    parser.add_argument("--sections", type=int, default=20, help="A.C. sections per booklet")
+    parser.add_argument("--words", type=int, default=300, help="words per section")
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="stub model latency")
+    parser.add_argument("--only", help="comma-separated benchmark names")
+    parser.add_argument("--output", help="save results as JSON")
+    parser.add_argument("--baseline", help="earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=0.15, help="median slowdown flagged as a regression")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        fixtures = make_fixtures(directory, args.sections, args.words)
+        benchmarks = build_benchmarks(fixtures, args.latency_ms)
+        names = args.only.split(",") if args.only else list(benchmarks)
+        unknown = [name for name in names if name not in benchmarks]
+        if unknown:
+            parser.error(f"unknown benchmarks: {', '.join(unknown)}")
+
+        results = {}
+        for name in names:
+            unit, items, func = benchmarks[name]
+            seconds = measure(func, args.repeat)
+            median = statistics.median(seconds)
+            results[name] = {
+                'median': median,
+                'min': min(seconds),
+                'max': max(seconds),
+                'seconds': seconds,
+                'unit': unit,
+                'items': items,
+                'rate': items / median if median else None
+            }
+            print(f"{name:<24} {median * 1000:9.2f} ms  {items / median:12.1f} {unit}/s  "
+                  f"(min {min(seconds) * 1000:.2f} ms, max {max(seconds) * 1000:.2f} ms)")
+
+    data = {
+        'meta': {
+            'commit': git_commit(),
+            'created': time.strftime("%Y-%m-%dT%H:%M:%S"),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'cpus': os.cpu_count(),
+            'args': vars(args)
+        },
+        'results': results
+    }
+    if args.output:
+        os.makedirs(os.path.dirname(os.path.abspath(args.output)), exist_ok=True)
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(data, f, indent=2)
+        print(f"💾 Results saved to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.threshold)
+        if regressions:
+            print(f"❌ Regressions: {', '.join(regressions)}")
+            return 1
+        print("✅ No regressions")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
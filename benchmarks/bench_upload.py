@@ -0,0 +1,115 @@
+"""Latency and peak memory of extracting an upload, through a temp file and in place.
+
+Usage: python benchmarks/bench_upload.py --sections 100 --image-mb 40 --format pdf
+
+Modes, each run in a fresh process so peak RSS is its own:
+  tempfile  the previous app flow: getvalue() copies the upload, the copy is
+            written to a NamedTemporaryFile and the extractor reads it back
+  inplace   the upload object is handed to the extractor directly
+  memoryview  a memoryview over the upload's buffer, read in place
+"""
+import argparse
+import io
+import json
+import os
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+modes = ("tempfile", "inplace", "memoryview")
+
+def peak_rss_mb():
+    """This process's peak resident set size.
+
+    /proc's VmHWM starts afresh at exec; ru_maxrss on Linux carries over the
+    parent's peak, which here would be the booklet generator's.
+    """
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    # ru_maxrss is in KiB on Linux, bytes on macOS
+    scale = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / scale
+
+def run_mode(mode, path, file_type, repeat):
+    """Extract the booklet repeat times in this process; return (median seconds, peak RSS growth MB)"""
+    import plagiarism_backend as backend
+
+    # Stands in for Streamlit's UploadedFile, a BytesIO holding the upload
+    upload = io.BytesIO()
+    with open(path, "rb") as f:
+        shutil.copyfileobj(f, upload)
+    baseline = peak_rss_mb()
+    seconds = []
+    with open(os.devnull, "w") as sink:
+        stdout, sys.stdout = sys.stdout, sink
+        try:
+            for _ in range(repeat):
+                start = time.perf_counter()
+                if mode == "tempfile":
+                    data = upload.getvalue()
+                    with tempfile.NamedTemporaryFile(delete=False, suffix=f".{file_type}") as tmp_file:
+                        tmp_file.write(data)
+                    try:
+                        backend.extract_ac_sections(tmp_file.name, file_type)
+                    finally:
+                        os.unlink(tmp_file.name)
+                    del data
+                elif mode == "inplace":
+                    backend.extract_ac_sections(upload, file_type)
+                else:
+                    view = upload.getbuffer()
+                    try:
+                        backend.extract_ac_sections(view, file_type)
+                    finally:
+                        view.release()
+                seconds.append(time.perf_counter() - start)
+        finally:
+            sys.stdout = stdout
+    return sorted(seconds)[len(seconds) // 2], peak_rss_mb() - baseline
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sections", type=int, default=100)
+    parser.add_argument("--words", type=int, default=300, help="words per section")
+    parser.add_argument("--image-mb", type=float, default=40, help="figure size, for a realistic upload size")
+    parser.add_argument("--format", choices=["docx", "pdf"], default="pdf")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--mode", choices=modes, help=argparse.SUPPRESS)
+    parser.add_argument("--path", help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.mode:
+        median, peak_mb = run_mode(args.mode, args.path, args.format, args.repeat)
+        print(json.dumps({'median': median, 'peak_mb': peak_mb}))
+        return 0
+
+    from synthetic_booklets import write_booklet
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = write_booklet(os.path.join(directory, f"booklet.{args.format}"),
+                             sections=args.sections, words_per_section=args.words, seed=3,
+                             image_mb=args.image_mb)
+        print(f"{args.format.upper()} booklet, {args.sections} sections, "
+              f"{os.path.getsize(path) / 1024 / 1024:.1f} MB")
+        for mode in modes:
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), "--mode", mode, "--path", path,
+                 "--format", args.format, "--repeat", str(args.repeat)],
+                capture_output=True, text=True, check=True
+            ).stdout
+            result = json.loads(output.strip().splitlines()[-1])
+            print(f"{mode:<11} {result['median'] * 1000:9.1f} ms  peak RSS +{result['peak_mb']:.1f} MB")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,141 @@
+"""Load test for the streaming HTTP service, against the local stub backend by default.
+
+Usage: python benchmarks/load_test_service.py --requests 200 --concurrency 32
+       python benchmarks/load_test_service.py --url http://127.0.0.1:8080 --requests 50
+
+Without --url the service runs in this process with the stub model, so no
+network access or token is needed. Each request uploads a synthetic DOCX
+booklet and reads the event stream to the end. Reports requests per
+second, p50/p95/p99 latency to the first verdict and to the final event.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from synthetic_booklets import booklet_bytes  # noqa: E402
+
+def synthetic_docx(sections, words_per_section, seed):
+    """A small booklet with distinct text per seed, so the response cache never helps"""
+    return booklet_bytes("docx", seed=seed, sections=sections, words_per_section=words_per_section,
+                         table_rate=0, noise_rate=0)
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+async def one_request(session, url, body, index):
+    """Upload one booklet and read its event stream; return (first verdict s, total s, ok)"""
+    import aiohttp
+
+    form = aiohttp.FormData()
+    form.add_field("file", body, filename=f"booklet_{index}.docx")
+    start = time.perf_counter()
+    first_verdict = None
+    ok = False
+    async with session.post(f"{url}/check", data=form) as response:
+        async for line in response.content:
+            if not line.strip():
+                continue
+            event = json.loads(line)['event']
+            if event == "section" and first_verdict is None:
+                first_verdict = time.perf_counter() - start
+            elif event == "done":
+                ok = True
+    return first_verdict, time.perf_counter() - start, ok
+
+async def run_load(url, bodies, concurrency):
+    import aiohttp
+
+    semaphore = asyncio.Semaphore(concurrency)
+    connector = aiohttp.TCPConnector(limit=concurrency)
+    timeout = aiohttp.ClientTimeout(total=None)
+
+    async def bounded(session, index, body):
+        async with semaphore:
+            try:
+                return await one_request(session, url, body, index)
+            except Exception as e:
+                print(f"❌ request {index} failed: {str(e)}")
+                return None, None, False
+
+    async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+        start = time.perf_counter()
+        results = await asyncio.gather(*(bounded(session, i, body) for i, body in enumerate(bodies)))
+        return results, time.perf_counter() - start
+
+async def run_local(args, bodies):
+    """Start the service with the stub backend on a free port and load it"""
+    from aiohttp import web
+
+    import plagiarism_backend
+    from llm_backends import StubBackend, set_backend
+    from service import create_app
+
+    set_backend(StubBackend(latency_ms=args.latency_ms, latency_sigma=args.latency_sigma, seed=1))
+    plagiarism_backend.set_model_concurrency(args.max_model_calls)
+
+    runner = web.AppRunner(create_app(documents=args.documents))
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = site._server.sockets[0].getsockname()[1]
+    try:
+        return await run_load(f"http://127.0.0.1:{port}", bodies, args.concurrency)
+    finally:
+        await runner.cleanup()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--url", help="service to load instead of an in-process one")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=16, help="requests in flight")
+    parser.add_argument("--sections", type=int, default=8, help="A.C. sections per booklet")
+    parser.add_argument("--words", type=int, default=200, help="words per section")
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="stub model latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5)
+    parser.add_argument("--max-model-calls", type=int, default=64, help="model calls in flight")
+    parser.add_argument("--documents", type=int, default=32, help="documents processed at once by the service")
+    args = parser.parse_args()
+
+    if not args.url:
+        # Every request must reach the stub model, not earlier cached answers,
+        # and its made-up results must not land in the user's history or topic stores
+        os.environ.update({
+            'PLAGIARISM_CACHE_PATH': "",
+            'PLAGIARISM_HISTORY_PATH': "",
+            'PLAGIARISM_TOPIC_MODEL': "",
+            'PLAGIARISM_TOPIC_EXAMPLES': "",
+        })
+        os.environ.pop("PLAGIARISM_INDEX_PATH", None)
+
+    bodies = [synthetic_docx(args.sections, args.words, seed) for seed in range(args.requests)]
+    if args.url:
+        results, elapsed = asyncio.run(run_load(args.url.rstrip('/'), bodies, args.concurrency))
+    else:
+        results, elapsed = asyncio.run(run_local(args, bodies))
+
+    succeeded = [r for r in results if r[2]]
+    print(f"{len(results)} requests, {len(succeeded)} succeeded, concurrency {args.concurrency}, "
+          f"{args.sections} sections each")
+    print(f"Throughput: {len(succeeded) / elapsed:.2f} requests/s over {elapsed:.1f}s")
+    if not succeeded:
+        return 1
+    for label, values in (
+        ("first verdict", [r[0] for r in succeeded if r[0] is not None]),
+        ("full report", [r[1] for r in succeeded]),
+    ):
+        print(f"{label:<14} p50 {percentile(values, 50) * 1000:8.0f} ms  "
+              f"p95 {percentile(values, 95) * 1000:8.0f} ms  "
+              f"p99 {percentile(values, 99) * 1000:8.0f} ms  "
+              f"mean {statistics.mean(values) * 1000:8.0f} ms")
+    return 0 if len(succeeded) == len(results) else 1
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,171 @@
+"""Synthetic DOCX and PDF booklets for benchmarks and load tests.
+
+Usage: python benchmarks/synthetic_booklets.py cohort/ --count 20 --sections 12 --format pdf
+
+A booklet is a list of blocks built from a seed: an A.C. header per
+section, body paragraphs, optional tables, noise lines (page footers,
+figure captions, form fields) that are extracted with the section text as
+they would be from a real booklet, and an optional incompressible figure that gives the file a realistic upload
+size. The same seed always gives the same booklet, so benchmark runs
+compare like with like.
+"""
+import argparse
+import io
+import os
+import random
+import struct
+import zlib
+
+words = (
+    "the learner explains how management theory applies to planning budgeting staffing "
+    "communication leadership quality policy evaluation review stakeholders outcomes "
+    "reflective practice safeguarding legislation framework evidence person centred care"
+).split()
+
+noise_templates = (
+    "Figure {n}: chart of results",
+    "Page {n} of {total}",
+    "Learner signature: ____________",
+    "Assessor use only",
+    "Table {n} shows the findings",
+)
+
+# --- Booklet content ---
+def sentence(rng, low=6, high=18):
+    text = ' '.join(rng.choice(words) for _ in range(rng.randint(low, high)))
+    return text[0].upper() + text[1:] + "."
+
+def noise_png(size_mb, rng, width=1024):
+    """An RGB PNG of random pixels, about size_mb megabytes whatever the compression"""
+    height = max(1, int(size_mb * 1024 * 1024 / (width * 3)))
+    rows = b"".join(b"\x00" + rng.randbytes(width * 3) for _ in range(height))
+
+    def chunk(kind, data):
+        return struct.pack(">I", len(data)) + kind + data + struct.pack(">I", zlib.crc32(kind + data))
+
+    return (b"\x89PNG\r\n\x1a\n"
+            + chunk(b"IHDR", struct.pack(">IIBBBBB", width, height, 8, 2, 0, 0, 0))
+            + chunk(b"IDAT", zlib.compress(rows, 1))
+            + chunk(b"IEND", b""))
+
+def booklet_blocks(seed=0, sections=10, words_per_section=250, table_rate=0.2, noise_rate=0.05,
+                   sections_per_major=5, image_mb=0):
+    """Blocks of one booklet: ("header", text), ("paragraph", text), ("table", rows),
+    ("noise", text) or ("image", png bytes).
+
+    Each section gets about words_per_section words in paragraphs of 40-120
+    words. A table follows a section's first paragraph with probability
+    table_rate, and a noise line follows any paragraph with probability
+    noise_rate. With image_mb, the first section carries a figure of that
+    size.
+    """
+    rng = random.Random(seed)
+    blocks = []
+    for i in range(sections):
+        major, minor = i // sections_per_major + 1, i % sections_per_major + 1
+        blocks.append(("header", f"A.C. {major}.{minor} COVERED: {sentence(rng, 3, 6)}"))
+        remaining = words_per_section
+        first = True
+        while remaining > 0:
+            count = min(remaining, rng.randint(40, 120))
+            remaining -= count
+            text = ' '.join(rng.choice(words) for _ in range(count))
+            blocks.append(("paragraph", text[0].upper() + text[1:] + "."))
+            if first and i == 0 and image_mb:
+                blocks.append(("image", noise_png(image_mb, rng)))
+            if first and rng.random() < table_rate:
+                rows = [["Aspect", "Evidence", "Outcome"]] + [
+                    [sentence(rng, 1, 3), sentence(rng, 4, 10), sentence(rng, 2, 5)]
+                    for _ in range(rng.randint(2, 4))
+                ]
+                blocks.append(("table", rows))
+            if rng.random() < noise_rate:
+                template = rng.choice(noise_templates)
+                blocks.append(("noise", template.format(n=rng.randint(1, 9), total=sections)))
+            first = False
+    return blocks
+
+# --- Writers ---
+def write_docx(target, blocks):
+    """Write blocks as a DOCX to a path or binary file object"""
+    from docx import Document
+    from docx.shared import Inches
+
+    document = Document()
+    for kind, value in blocks:
+        if kind == "table":
+            table = document.add_table(rows=len(value), cols=len(value[0]))
+            for row, cells in zip(table.rows, value):
+                for cell, text in zip(row.cells, cells):
+                    cell.text = text
+        elif kind == "image":
+            document.add_picture(io.BytesIO(value), width=Inches(6))
+        else:
+            document.add_paragraph(value)
+    document.save(target)
+
+def write_pdf(target, blocks):
+    """Write blocks as a PDF to a path or binary file object"""
+    from reportlab.lib.pagesizes import A4
+    from reportlab.lib.styles import getSampleStyleSheet
+    from reportlab.lib.units import inch
+    from reportlab.platypus import Image, Paragraph, SimpleDocTemplate, Table
+
+    styles = getSampleStyleSheet()
+    elements = []
+    for kind, value in blocks:
+        if kind == "table":
+            elements.append(Table(value))
+        elif kind == "image":
+            elements.append(Image(io.BytesIO(value), width=6 * inch, height=3 * inch))
+        elif kind == "header":
+            elements.append(Paragraph(value, styles['Heading3']))
+        else:
+            elements.append(Paragraph(value, styles['BodyText']))
+    SimpleDocTemplate(target, pagesize=A4).build(elements)
+
+writers = {'docx': write_docx, 'pdf': write_pdf}
+
+def booklet_bytes(file_type, **spec):
+    """A synthetic booklet as bytes; spec is passed to booklet_blocks"""
+    buffer = io.BytesIO()
+    writers[file_type](buffer, booklet_blocks(**spec))
+    return buffer.getvalue()
+
+def write_booklet(path, **spec):
+    """Write a synthetic booklet, choosing the format from the file extension"""
+    file_type = os.path.splitext(path)[1].lower().lstrip('.')
+    writers[file_type](path, booklet_blocks(**spec))
+    return path
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic DOCX/PDF booklets.")
+    parser.add_argument("output_dir")
+    parser.add_argument("--count", type=int, default=10)
+    parser.add_argument("--format", choices=["docx", "pdf", "both"], default="both")
+    parser.add_argument("--sections", type=int, default=10)
+    parser.add_argument("--words", type=int, default=250, help="words per section")
+    parser.add_argument("--table-rate", type=float, default=0.2)
+    parser.add_argument("--noise-rate", type=float, default=0.05)
+    parser.add_argument("--image-mb", type=float, default=0, help="size of a figure in the first section")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    formats = ["docx", "pdf"] if args.format == "both" else [args.format]
+    for i in range(args.count):
+        for file_type in formats:
+            write_booklet(
+                os.path.join(args.output_dir, f"booklet_{i:04d}.{file_type}"),
+                seed=args.seed + i,
+                sections=args.sections,
+                words_per_section=args.words,
+                table_rate=args.table_rate,
+                noise_rate=args.noise_rate,
+                image_mb=args.image_mb
+            )
+    print(f"📝 Wrote {args.count * len(formats)} booklets to {args.output_dir}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,120 @@
+"""Read documents in place from paths, buffers and file objects.
+
+open_document gives the extractors one seekable binary stream whatever
+the caller holds: files are memory-mapped, bytes and memoryview buffers
+are read without copying, and seekable file objects pass straight through.
+"""
+import io
+import mmap
+import os
+import shutil
+import tempfile
+from contextlib import contextmanager
+
+# --- Streams ---
+class BufferReader(io.RawIOBase):
+    """Read-only, seekable stream over a bytes-like object.
+
+    Reads copy only the bytes asked for, so an upload or a memory-mapped
+    file is parsed in place instead of being duplicated in a BytesIO.
+    """
+
+    def __init__(self, buffer):
+        self._view = memoryview(buffer).cast('B')
+        self._pos = 0
+
+    def readable(self):
+        return True
+
+    def seekable(self):
+        return True
+
+    def readinto(self, buffer):
+        count = max(0, min(len(buffer), len(self._view) - self._pos))
+        buffer[:count] = self._view[self._pos:self._pos + count]
+        self._pos += count
+        return count
+
+    def read(self, size=-1):
+        end = len(self._view) if size is None or size < 0 else min(len(self._view), self._pos + size)
+        data = self._view[self._pos:end].tobytes()
+        self._pos = max(self._pos, end)
+        return data
+
+    def readall(self):
+        return self.read()
+
+    def seek(self, offset, whence=io.SEEK_SET):
+        if whence == io.SEEK_CUR:
+            offset += self._pos
+        elif whence == io.SEEK_END:
+            offset += len(self._view)
+        if offset < 0:
+            raise ValueError("negative seek position")
+        self._pos = offset
+        return self._pos
+
+    def tell(self):
+        return self._pos
+
+    def close(self):
+        if not self.closed:
+            # Lets a memory-mapped file underneath be closed
+            self._view.release()
+        super().close()
+
+@contextmanager
+def _mapped_file(f):
+    """BufferReader over a memory-mapped open file"""
+    if os.fstat(f.fileno()).st_size == 0:
+        yield BufferReader(b"")
+        return
+    with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+        reader = BufferReader(mapped)
+        try:
+            yield reader
+        finally:
+            reader.close()
+
+@contextmanager
+def open_document(source):
+    """Seekable binary stream over a document given as a path, bytes-like object or file object.
+
+    Paths are memory-mapped and bytes, bytearray or memoryview buffers are
+    read in place; seekable file objects (BytesIO, uploads) are used as they
+    are. Only a non-seekable stream is spooled to an anonymous temporary
+    file, which is mapped too and removed however parsing ends.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "rb") as f, _mapped_file(f) as reader:
+            yield reader
+    elif isinstance(source, (bytes, bytearray, memoryview)):
+        with BufferReader(source) as reader:
+            yield reader
+    elif getattr(source, 'seekable', lambda: False)():
+        source.seek(0)
+        yield source
+    else:
+        with tempfile.TemporaryFile() as f:
+            shutil.copyfileobj(source, f)
+            f.flush()
+            with _mapped_file(f) as reader:
+                yield reader
+
+@contextmanager
+def document_path(source, suffix=""):
+    """A file path for source, for code that must open the document itself (such as another process).
+
+    Paths are returned as they are; anything else is written once to a
+    temporary file that is removed when the block ends, however it ends.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        yield os.fspath(source)
+        return
+    tmp_file = tempfile.NamedTemporaryFile(suffix=suffix, delete=False)
+    try:
+        with tmp_file, open_document(source) as stream:
+            shutil.copyfileobj(stream, tmp_file)
+        yield tmp_file.name
+    finally:
+        os.unlink(tmp_file.name)
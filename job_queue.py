@@ -0,0 +1,444 @@
+"""SQLite-backed job queue and worker processes for document processing.
+
+Usage:
+    python job_queue.py --workers 4
+    PLAGIARISM_EXTERNAL_WORKERS=1 streamlit run app.py
+
+Submissions are copied into the job directory and recorded in a SQLite
+table; worker processes claim queued jobs one at a time and run the
+processing pipeline, writing progress, results and the PDF report back
+under the job id. Stopping the pool (Ctrl+C or SIGTERM) puts jobs that
+were still running back in the queue.
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import shutil
+import signal
+import socket
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+
+import metrics
+from sqlite_store import SQLiteStore
+
+# Default job directory, next to the response cache
+default_job_dir = os.path.join(os.path.expanduser("~"), ".cache", "plagiarism_checker", "jobs")
+
+# A job that took its worker down this many times is failed instead of requeued
+max_attempts = int(os.environ.get("PLAGIARISM_JOB_MAX_ATTEMPTS", "3"))
+
+# Job states
+queued = "queued"
+running = "running"
+done = "done"
+failed = "failed"
+
+# --- Queue storage ---
+class JobQueue(SQLiteStore):
+    """Jobs table plus the input files and PDF reports that belong to each job, shared by the UI and every worker"""
+
+    row_factory = sqlite3.Row
+
+    def __init__(self, job_dir=default_job_dir):
+        super().__init__(os.path.join(job_dir, "jobs.sqlite3"))
+        self.job_dir = job_dir
+        os.makedirs(os.path.join(job_dir, "inputs"), exist_ok=True)
+        os.makedirs(os.path.join(job_dir, "reports"), exist_ok=True)
+
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS jobs ("
+            " id TEXT PRIMARY KEY,"
+            " status TEXT NOT NULL,"
+            " file_name TEXT NOT NULL,"
+            " file_type TEXT NOT NULL,"
+            " input_path TEXT NOT NULL,"
+            " learner_id TEXT,"
+            " booklet_id TEXT,"
+            " pdf_path TEXT,"
+            " worker TEXT,"
+            " attempts INTEGER NOT NULL DEFAULT 0,"
+            " progress TEXT,"
+            " result TEXT,"
+            " error TEXT,"
+            " submitted REAL NOT NULL,"
+            " started REAL,"
+            " finished REAL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, submitted)")
+
+    def submit(self, data, file_name, learner_id=None, booklet_id=None):
+        """Store the upload and queue a job for it, returning its id.
+
+        data is a bytes-like object or a binary file object; file objects are
+        copied in chunks, so the upload is never duplicated in memory. With
+        learner_id and booklet_id, a resubmission only re-analyzes the
+        sections that changed since that learner's last submission.
+        """
+        file_type = os.path.splitext(file_name)[1].lower().lstrip('.')
+        if file_type not in ("docx", "pdf"):
+            raise ValueError(f"Unsupported file type: {file_name}")
+        job_id = uuid.uuid4().hex
+        input_path = os.path.join(self.job_dir, "inputs", f"{job_id}.{file_type}")
+        try:
+            with open(input_path, "wb") as f:
+                if hasattr(data, 'read'):
+                    shutil.copyfileobj(data, f)
+                else:
+                    f.write(data)
+            self._connect().execute(
+                "INSERT INTO jobs (id, status, file_name, file_type, input_path, learner_id, booklet_id, submitted)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (job_id, queued, file_name, file_type, input_path, learner_id, booklet_id, time.time())
+            )
+        except BaseException:
+            # No job refers to the file, so nothing would ever remove it
+            _remove(input_path)
+            raise
+        return job_id
+
+    def claim(self, worker):
+        """Mark the oldest queued job as running for worker and return it, or None.
+
+        Queued jobs already claimed max_attempts times were requeued after
+        their worker died each time, so they are failed instead of run again.
+        """
+        conn = self._connect()
+        given_up = []
+        # BEGIN IMMEDIATE takes the write lock, so two workers never claim one job
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            while True:
+                row = conn.execute(
+                    "SELECT * FROM jobs WHERE status = ? ORDER BY submitted LIMIT 1", (queued,)
+                ).fetchone()
+                if row is None or row['attempts'] < max_attempts:
+                    break
+                conn.execute(
+                    "UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?",
+                    (failed, f"Gave up after {row['attempts']} attempts; the worker stopped each time",
+                     time.time(), row['id'])
+                )
+                given_up.append(row)
+            if row is not None:
+                conn.execute(
+                    "UPDATE jobs SET status = ?, worker = ?, attempts = attempts + 1,"
+                    " started = ?, progress = NULL WHERE id = ?",
+                    (running, worker, time.time(), row['id'])
+                )
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+        for job in given_up:
+            print(f"❌ Job {job['id']} failed after {job['attempts']} attempts")
+            _remove(job['input_path'])
+        return self.get(row['id']) if row is not None else None
+
+    def set_progress(self, job_id, progress):
+        self._connect().execute(
+            "UPDATE jobs SET progress = ? WHERE id = ? AND status = ?",
+            (json.dumps(progress), job_id, running)
+        )
+
+    def complete(self, job_id, result, pdf_path):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, result = ?, pdf_path = ?, finished = ? WHERE id = ?",
+            (done, json.dumps(result), pdf_path, time.time(), job_id)
+        )
+        self._remove_input(job_id)
+
+    def fail(self, job_id, error):
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, error = ?, finished = ? WHERE id = ?",
+            (failed, error, time.time(), job_id)
+        )
+        self._remove_input(job_id)
+
+    def _remove_input(self, job_id):
+        """Delete a finished job's uploaded document; only queued and running jobs read it"""
+        row = self._connect().execute("SELECT input_path FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is not None:
+            _remove(row['input_path'])
+
+    def requeue(self, job_id):
+        """Put a running job back in the queue after its worker was asked to stop.
+
+        The job did not take the worker down, so its claim is not counted
+        towards max_attempts.
+        """
+        self._connect().execute(
+            "UPDATE jobs SET status = ?, worker = NULL, progress = NULL, attempts = MAX(attempts - 1, 0)"
+            " WHERE id = ? AND status = ?",
+            (queued, job_id, running)
+        )
+
+    def requeue_worker(self, worker):
+        """Put every job still running under a dead worker back in the queue, returning how many.
+
+        Each claim stays counted, so a job that keeps crashing its worker is
+        eventually failed by claim().
+        """
+        return self._connect().execute(
+            "UPDATE jobs SET status = ?, worker = NULL, progress = NULL WHERE worker = ? AND status = ?",
+            (queued, worker, running)
+        ).rowcount
+
+    def requeue_orphans(self):
+        """Requeue running jobs whose worker process on this host no longer exists"""
+        host = socket.gethostname()
+        count = 0
+        for row in self._connect().execute(
+            "SELECT DISTINCT worker FROM jobs WHERE status = ?", (running,)
+        ).fetchall():
+            worker_host, _, pid = (row['worker'] or '').rpartition(':')
+            if worker_host == host and not _process_alive(int(pid or 0)):
+                count += self.requeue_worker(row['worker'])
+        return count
+
+    def get(self, job_id):
+        """Return the job as a dict with progress and result decoded, or None"""
+        row = self._connect().execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        for key in ('progress', 'result'):
+            job[key] = json.loads(job[key]) if job[key] else None
+        return job
+
+    def position(self, job_id):
+        """Number of queued jobs submitted before job_id"""
+        return self._connect().execute(
+            "SELECT COUNT(*) FROM jobs WHERE status = ? AND submitted <"
+            " (SELECT submitted FROM jobs WHERE id = ?)",
+            (queued, job_id)
+        ).fetchone()[0]
+
+    def counts(self):
+        """Return the number of jobs in each state"""
+        rows = self._connect().execute("SELECT status, COUNT(*) FROM jobs GROUP BY status").fetchall()
+        return {status: count for status, count in rows}
+
+def _remove(path):
+    try:
+        os.unlink(path)
+    except OSError:
+        pass
+
+def _process_alive(pid):
+    if pid <= 0:
+        return False
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+# --- Worker process ---
+def worker_name():
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+def run_job(queue, job, section_workers=None):
+    """Process one claimed job and record its result or error"""
+    # Imported here so the UI can submit jobs without loading the pipeline
+    from plagiarism_backend import PlagiarismPipeline
+
+    job_id = job['id']
+    progress = {'stage': None, 'completed': 0, 'total': 0}
+
+    def on_event(event, data):
+        if event == "stage_started":
+            # Stages overlap, so report the furthest one started
+            stages = PlagiarismPipeline.stages
+            if progress['stage'] is None or stages.index(data['stage']) > stages.index(progress['stage']):
+                progress['stage'] = data['stage']
+        elif event == "sections_extracted":
+            progress['total'] = len(data['ac_sections'])
+            progress['found'] = list(data['ac_sections'])
+            progress['missing'] = data['missing_sections']
+        elif event == "history_loaded":
+            progress['reused'] = data['reused']
+        elif event == "section_done":
+            progress['completed'] = data['completed']
+            progress['total'] = max(progress['total'], data['total'])
+            progress.setdefault('sections', []).append({
+                'ac_num': data['ac_num'],
+                'score': data['result']['score'],
+                'plagiarism': data['result']['plagiarism'],
+                'reused': data['reused']
+            })
+        else:
+            return
+        queue.set_progress(job_id, progress)
+
+    pdf_path = os.path.join(queue.job_dir, "reports", f"{job_id}_report.pdf")
+    pipeline = PlagiarismPipeline(max_workers=section_workers)
+    pipeline.subscribe(on_event)
+    try:
+        run = pipeline.run(
+            job['input_path'],
+            job['file_type'],
+            pdf_path=pdf_path,
+            learner_id=job['learner_id'],
+            booklet_id=job['booklet_id']
+        )
+    except Exception as e:
+        print(f"❌ Job {job_id} failed: {str(e)}")
+        queue.fail(job_id, f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
+        return False
+
+    queue.complete(job_id, {
+        'document_topic': run['document_topic'],
+        'ac_results': run['ac_results'],
+        'timings': run['timings']
+    }, pdf_path)
+    print(f"✅ Job {job_id} done ({job['file_name']})")
+    return True
+
+def worker_main(job_dir, poll_interval=1.0, section_workers=None):
+    """Claim and run jobs until SIGTERM/SIGINT; an interrupted job goes back in the queue"""
+    queue = JobQueue(job_dir)
+    name = worker_name()
+    parent = os.getppid()
+    state = {'job_id': None, 'stopping': False}
+
+    def on_signal(signum, frame):
+        state['stopping'] = True
+        if state['job_id'] is not None:
+            # Abandon the running job instead of waiting minutes for it. Queue
+            # writes are single autocommit statements, so no transaction is open
+            # on the main connection here; a fresh one is used all the same.
+            JobQueue(job_dir).requeue(state['job_id'])
+            print(f"↩️ Worker {name} requeued job {state['job_id']}")
+            # Model calls still running in pool threads are not waited for
+            os._exit(0)
+
+    signal.signal(signal.SIGTERM, on_signal)
+    signal.signal(signal.SIGINT, on_signal)
+
+    while not state['stopping']:
+        if os.getppid() != parent:
+            # The pool's process was killed without stopping its workers
+            print(f"🛑 Worker {name} lost its pool, stopping")
+            break
+        job = queue.claim(name)
+        if job is None:
+            time.sleep(poll_interval)
+            continue
+        state['job_id'] = job['id']
+        print(f"🛠️ Worker {name} started job {job['id']} ({job['file_name']})")
+        run_job(queue, job, section_workers)
+        state['job_id'] = None
+        # Cumulative for this worker; readers merge every worker's file
+        metrics.dump_process_metrics("worker", get_metrics_dir(job_dir))
+
+# --- Worker pool ---
+class WorkerPool:
+    """Start and supervise worker processes, replacing any that die"""
+
+    def __init__(self, job_dir=default_job_dir, workers=2, poll_interval=1.0,
+                 section_workers=None, shutdown_timeout=10.0):
+        self.job_dir = job_dir
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.section_workers = section_workers
+        self.shutdown_timeout = shutdown_timeout
+        self.queue = JobQueue(job_dir)
+        self._context = multiprocessing.get_context("spawn")
+        self._processes = []
+        self._stopping = threading.Event()
+        self._monitor = None
+
+    def _start_worker(self):
+        process = self._context.Process(
+            target=worker_main,
+            args=(self.job_dir, self.poll_interval, self.section_workers),
+            # Not a daemon, so it may start the PDF page pool; stop() ends it
+            daemon=False
+        )
+        process.start()
+        return process
+
+    def _worker_name(self, process):
+        return f"{socket.gethostname()}:{process.pid}"
+
+    def start(self):
+        requeued = self.queue.requeue_orphans()
+        if requeued:
+            print(f"↩️ Requeued {requeued} jobs left running by a previous pool")
+        self._processes = [self._start_worker() for _ in range(self.workers)]
+        self._monitor = threading.Thread(target=self._watch, daemon=True)
+        self._monitor.start()
+        print(f"🧵 Started {self.workers} job workers in {self.job_dir}")
+        return self
+
+    def _watch(self):
+        while not self._stopping.wait(self.poll_interval):
+            for i, process in enumerate(self._processes):
+                if not process.is_alive() and not self._stopping.is_set():
+                    self.queue.requeue_worker(self._worker_name(process))
+                    print(f"⚠️ Worker {process.pid} exited with {process.exitcode}, restarting")
+                    self._processes[i] = self._start_worker()
+
+    def stop(self):
+        """Ask every worker to stop and requeue whatever they were running"""
+        if self._stopping.is_set():
+            return
+        self._stopping.set()
+        if self._monitor is not None:
+            self._monitor.join()
+        for process in self._processes:
+            if process.is_alive():
+                process.terminate()
+        deadline = time.monotonic() + self.shutdown_timeout
+        for process in self._processes:
+            process.join(max(0.0, deadline - time.monotonic()))
+            if process.is_alive():
+                process.kill()
+                process.join()
+            # Covers workers that were killed before they could requeue
+            self.queue.requeue_worker(self._worker_name(process))
+        print("🛑 Job workers stopped")
+
+def get_job_dir():
+    return os.environ.get("PLAGIARISM_JOB_DIR") or default_job_dir
+
+def get_metrics_dir(job_dir):
+    """Where workers write their metrics: PLAGIARISM_METRICS_DIR, else <job_dir>/metrics"""
+    return metrics.get_metrics_dir() or os.path.join(job_dir, "metrics")
+
+def get_job_workers():
+    return int(os.environ.get("PLAGIARISM_JOB_WORKERS", "2"))
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run document processing workers.")
+    parser.add_argument("--job-dir", default=get_job_dir(), help="queue database, inputs and reports")
+    parser.add_argument("--workers", type=int, default=get_job_workers(), help="worker processes")
+    parser.add_argument("--section-workers", type=int, help="A.C. sections analyzed at once per job")
+    parser.add_argument("--poll-interval", type=float, default=1.0, help="seconds between queue polls")
+    args = parser.parse_args(argv)
+
+    pool = WorkerPool(
+        args.job_dir,
+        workers=args.workers,
+        poll_interval=args.poll_interval,
+        section_workers=args.section_workers
+    )
+    stop = threading.Event()
+    signal.signal(signal.SIGTERM, lambda signum, frame: stop.set())
+    signal.signal(signal.SIGINT, lambda signum, frame: stop.set())
+    pool.start()
+    while not stop.wait(1.0):
+        pass
+    pool.stop()
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
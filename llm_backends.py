@@ -0,0 +1,235 @@
+import json
+import os
+import random
+import re
+import threading
+import time
+
+# Defaults for the hosted model, overridable through the environment
+default_endpoint = "https://models.github.ai/inference"
+default_model = "openai/gpt-4.1"
+
+# --- Backend interface ---
+class LLMBackend:
+    """A chat model that answers one system + user prompt with text.
+
+    Backends must be safe to call from several threads at once. Errors
+    should carry a status_code (and response.headers for Retry-After) when
+    they come from HTTP, so the request scheduler can tell throttling and
+    transient failures apart from permanent ones.
+    """
+
+    name = "base"
+    model = "unknown"
+    # Answers are made up offline; they must never become training data
+    synthetic = False
+
+    def complete(self, system, user, temperature=None, top_p=None, max_tokens=None):
+        raise NotImplementedError
+
+    def last_usage(self):
+        """{'input': n, 'output': n} tokens of this thread's last completion, if the provider reported them"""
+        return getattr(_usage, 'tokens', None)
+
+# Token usage of the last completion, per calling thread
+_usage = threading.local()
+
+# --- Azure AI Inference backend ---
+class AzureInferenceBackend(LLMBackend):
+    """Chat completions through the Azure AI Inference SDK (GitHub Models by default)"""
+
+    name = "azure"
+
+    def __init__(self, endpoint=None, model=None, token=None):
+        self.endpoint = endpoint or os.environ.get("PLAGIARISM_LLM_ENDPOINT", default_endpoint)
+        self.model = model or os.environ.get("PLAGIARISM_MODEL", default_model)
+        self.token = token or os.environ.get("AZURE_TOKEN", "default_token")
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _get_client(self):
+        if self._client is None:
+            with self._lock:
+                if self._client is None:
+                    # Imported here so callers that never reach the model skip the SDK
+                    from azure.ai.inference import ChatCompletionsClient
+                    from azure.core.credentials import AzureKeyCredential
+                    self._client = ChatCompletionsClient(
+                        endpoint=self.endpoint,
+                        credential=AzureKeyCredential(self.token),
+                        # Retries belong to the request scheduler, not the SDK
+                        retry_total=0,
+                    )
+        return self._client
+
+    def complete(self, system, user, temperature=None, top_p=None, max_tokens=None):
+        from azure.ai.inference.models import SystemMessage, UserMessage
+
+        params = {'temperature': temperature, 'top_p': top_p, 'max_tokens': max_tokens}
+        response = self._get_client().complete(
+            messages=[SystemMessage(system), UserMessage(user)],
+            model=self.model,
+            **{name: value for name, value in params.items() if value is not None}
+        )
+        usage = getattr(response, 'usage', None)
+        _usage.tokens = {
+            'input': usage.prompt_tokens,
+            'output': usage.completion_tokens
+        } if usage is not None else None
+        return response.choices[0].message.content or ""
+
+# --- Local stub backend ---
+class StubError(Exception):
+    """Simulated provider error with an HTTP status and optional Retry-After"""
+
+    def __init__(self, status_code, retry_after=None):
+        super().__init__(f"Stub backend returned HTTP {status_code}")
+        self.status_code = status_code
+        headers = {'Retry-After': str(retry_after)} if retry_after is not None else {}
+        self.response = type('StubResponse', (), {'status_code': status_code, 'headers': headers})()
+
+stub_topics = [
+    "Business Management", "Health and Social Care", "Leadership and Management",
+    "Early Years Education", "Human Resource Management"
+]
+
+class StubBackend(LLMBackend):
+    """Offline backend with configurable latency, errors and verdicts.
+
+    Latency is log-normal around latency_ms (sigma controls the tail),
+    error_rate fails requests with HTTP 503 and throttle_rate with 429 and
+    a Retry-After header. Plagiarism scores are drawn from a low band, or
+    from a high band with probability plagiarism_rate. A fixed seed makes
+    runs repeatable.
+    """
+
+    name = "stub"
+    synthetic = True
+
+    def __init__(self, latency_ms=200.0, latency_sigma=0.5, error_rate=0.0, throttle_rate=0.0,
+                 retry_after=1, plagiarism_rate=0.1, feedback_chars=600, seed=None, model="stub-model"):
+        self.latency_ms = latency_ms
+        self.latency_sigma = latency_sigma
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.plagiarism_rate = plagiarism_rate
+        self.feedback_chars = feedback_chars
+        self.model = model
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build a stub from PLAGIARISM_STUB_* environment variables"""
+        env = os.environ.get
+        seed = env("PLAGIARISM_STUB_SEED")
+        return cls(
+            latency_ms=float(env("PLAGIARISM_STUB_LATENCY_MS", "200")),
+            latency_sigma=float(env("PLAGIARISM_STUB_LATENCY_SIGMA", "0.5")),
+            error_rate=float(env("PLAGIARISM_STUB_ERROR_RATE", "0")),
+            throttle_rate=float(env("PLAGIARISM_STUB_THROTTLE_RATE", "0")),
+            plagiarism_rate=float(env("PLAGIARISM_STUB_PLAGIARISM_RATE", "0.1")),
+            seed=int(seed) if seed else None
+        )
+
+    def _request_random(self):
+        """Per-request generator seeded from the shared one, so threads stay repeatable"""
+        with self._lock:
+            return random.Random(self._random.random())
+
+    def _verdict_fields(self, rng, feedback_chars):
+        if rng.random() < self.plagiarism_rate:
+            score = 40 + int(rng.random() * 55)
+        else:
+            score = int(rng.random() * 25)
+        level = "High" if score >= 60 else "Medium" if score >= 30 else "Low"
+        feedback = ("The learner has addressed the criterion with relevant explanations and examples. "
+                    * (feedback_chars // 80 + 1))[:feedback_chars].strip()
+        return score, level, feedback
+
+    def _verdict(self, rng, feedback_chars):
+        score, level, feedback = self._verdict_fields(rng, feedback_chars)
+        return (
+            f"Plagiarism Found: {'Yes' if score >= 30 else 'No'}\n"
+            f"Plagiarism Score: {score}%\n"
+            f"Plagiarism Level: {level}\n"
+            f"Feedback: {feedback}"
+        )
+
+    def _json_verdict(self, rng, user):
+        """Compact verdict; the note is as long as the prompt asks for"""
+        note_chars = 0 if '"note"' not in user else 650 if "500-800" in user else 150
+        score, level, note = self._verdict_fields(rng, note_chars)
+        verdict = {'found': score >= 30, 'score': score, 'level': level.lower()}
+        if note_chars:
+            verdict['note'] = note
+        return verdict
+
+    def respond(self, system, user, rng):
+        """Build a plausible answer for the prompt shape"""
+        packed = re.findall(r'^### A\.C\. (\d+\.\d+)', user, re.MULTILINE)
+        compact = '"score": 0-100' in user
+        if packed and compact:
+            return json.dumps({ac_num: self._json_verdict(rng, user) for ac_num in packed})
+        if packed:
+            return "\n\n".join(
+                f"A.C.: {ac_num}\n" + self._verdict(rng, self.feedback_chars // 2) for ac_num in packed
+            )
+        if compact:
+            return json.dumps(self._json_verdict(rng, user))
+        if "feedback only" in user:
+            return self._verdict_fields(rng, self.feedback_chars)[2]
+        if "topic" in system.lower():
+            return rng.choice(stub_topics)
+        if "tutor" in system.lower():
+            return (
+                "The learner has demonstrated a sound theoretical understanding of the subject and "
+                "has applied it to practical scenarios with relevant examples. "
+            ) * 6
+        return self._verdict(rng, self.feedback_chars)
+
+    def complete(self, system, user, temperature=None, top_p=None, max_tokens=None):
+        rng = self._request_random()
+        latency_factor = rng.lognormvariate(0, self.latency_sigma) if self.latency_sigma else 1.0
+        time.sleep(self.latency_ms * latency_factor / 1000)
+        error_roll = rng.random()
+        if error_roll < self.throttle_rate:
+            raise StubError(429, retry_after=self.retry_after)
+        if error_roll < self.throttle_rate + self.error_rate:
+            raise StubError(503)
+        return self.respond(system, user, rng)
+
+# --- Backend selection ---
+backend_factories = {
+    "azure": AzureInferenceBackend,
+    "stub": StubBackend.from_env,
+}
+
+_backend = None
+_backend_lock = threading.Lock()
+
+def register_backend(name, factory):
+    """Make a backend factory selectable through PLAGIARISM_LLM_BACKEND"""
+    backend_factories[name] = factory
+
+def get_backend_name():
+    return os.environ.get("PLAGIARISM_LLM_BACKEND", "azure")
+
+def get_backend():
+    """Return the configured backend, creating it on first use"""
+    global _backend
+    if _backend is None:
+        with _backend_lock:
+            if _backend is None:
+                name = get_backend_name()
+                if name not in backend_factories:
+                    raise ValueError(f"Unknown LLM backend: {name}")
+                _backend = backend_factories[name]()
+    return _backend
+
+def set_backend(backend):
+    """Use backend for every later model call, or reset to the configured one with None"""
+    global _backend
+    with _backend_lock:
+        _backend = backend
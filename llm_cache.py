@@ -0,0 +1,182 @@
+import hashlib
+import os
+import re
+import sqlite3
+import threading
+import time
+
+import metrics
+from sqlite_store import SQLiteStore
+
+# Default cache location, shared by every Streamlit session and worker process
+default_cache_path = os.path.join(
+    os.path.expanduser("~"), ".cache", "plagiarism_checker", "llm_cache.sqlite3"
+)
+
+# --- Normalize content before hashing ---
+def normalize_content(text):
+    """Collapse whitespace so cosmetic edits still hit the cache"""
+    return re.sub(r'\s+', ' ', text or '').strip()
+
+# --- Build a content-addressed cache key ---
+def make_cache_key(kind, content, topic, model, prompt_version):
+    """Hash the normalized content together with everything that shapes the answer"""
+    digest = hashlib.sha256()
+    for part in (kind, normalize_content(content), normalize_content(topic), model, str(prompt_version)):
+        digest.update(part.encode('utf-8'))
+        digest.update(b'\x00')
+    return digest.hexdigest()
+
+# --- Disk-backed cache for model responses ---
+class LLMCache(SQLiteStore):
+    """SQLite cache of model responses with size- and age-based eviction, shared by every session and worker"""
+
+    def __init__(self, path=default_cache_path, max_bytes=256 * 1024 * 1024,
+                 max_age=30 * 24 * 3600, evict_every=100):
+        super().__init__(path)
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.evict_every = evict_every
+        self.hits = 0
+        self.misses = 0
+        self._writes = 0
+        self._lock = threading.Lock()
+
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS entries ("
+            " key TEXT PRIMARY KEY,"
+            " kind TEXT NOT NULL,"
+            " value TEXT NOT NULL,"
+            " size INTEGER NOT NULL,"
+            " created REAL NOT NULL,"
+            " accessed REAL NOT NULL)"
+        )
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+        conn.execute("CREATE INDEX IF NOT EXISTS entries_created ON entries (created)")
+        conn.commit()
+
+    def get(self, key, kind=''):
+        """Return the cached value for key, or None on a miss; kind labels the hit-rate metric"""
+        conn = self._connect()
+        try:
+            row = conn.execute(
+                "SELECT value, created FROM entries WHERE key = ?", (key,)
+            ).fetchone()
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache lookup failed: {str(e)}")
+            row = None
+        now = time.time()
+
+        if row is None or (self.max_age and now - row[1] > self.max_age):
+            with self._lock:
+                self.misses += 1
+            metrics.inc('plagiarism_cache_lookups_total', kind=kind, result="miss")
+            return None
+
+        try:
+            conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        except sqlite3.OperationalError:
+            # Another process holds the write lock; a stale access time is harmless
+            pass
+        with self._lock:
+            self.hits += 1
+        metrics.inc('plagiarism_cache_lookups_total', kind=kind, result="hit")
+        return row[0]
+
+    def set(self, key, value, kind=''):
+        """Store value under key and evict old entries from time to time"""
+        now = time.time()
+        conn = self._connect()
+        try:
+            conn.execute(
+                "INSERT OR REPLACE INTO entries (key, kind, value, size, created, accessed)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                (key, kind, value, len(value.encode('utf-8')), now, now)
+            )
+        except sqlite3.Error as e:
+            print(f"⚠️ Cache write failed: {str(e)}")
+            return
+
+        with self._lock:
+            self._writes += 1
+            run_eviction = self._writes % self.evict_every == 0
+        if run_eviction:
+            try:
+                self.evict()
+            except sqlite3.Error as e:
+                print(f"⚠️ Cache eviction failed: {str(e)}")
+
+    def evict(self):
+        """Drop expired entries, then least recently used ones over the size limit"""
+        conn = self._connect()
+        removed = 0
+        if self.max_age:
+            removed += conn.execute(
+                "DELETE FROM entries WHERE created < ?", (time.time() - self.max_age,)
+            ).rowcount
+
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        if self.max_bytes and total > self.max_bytes:
+            excess = total - self.max_bytes
+            freed = 0
+            doomed = []
+            for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                doomed.append((key,))
+                freed += size
+                if freed >= excess:
+                    break
+            conn.executemany("DELETE FROM entries WHERE key = ?", doomed)
+            removed += len(doomed)
+
+        if removed:
+            print(f"🧹 Evicted {removed} cached model responses")
+        return removed
+
+    def clear(self):
+        """Remove every cached entry"""
+        self._connect().execute("DELETE FROM entries")
+
+    def stats(self):
+        """Return hit/miss counters and the current size of the cache"""
+        entries, size = self._connect().execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries"
+        ).fetchone()
+        lookups = self.hits + self.misses
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'entries': entries,
+            'bytes': size
+        }
+
+_cache = None
+_cache_disabled = False
+_cache_lock = threading.Lock()
+
+# --- Shared cache instance ---
+def get_cache():
+    """Return the process-wide cache, or None when caching is disabled.
+
+    PLAGIARISM_CACHE_PATH selects the file (empty string disables caching),
+    PLAGIARISM_CACHE_MAX_MB and PLAGIARISM_CACHE_MAX_AGE_DAYS set the limits.
+    """
+    global _cache, _cache_disabled
+    if _cache is None and not _cache_disabled:
+        path = os.environ.get("PLAGIARISM_CACHE_PATH", default_cache_path)
+        with _cache_lock:
+            if _cache is None and not _cache_disabled:
+                if not path:
+                    _cache_disabled = True
+                    return None
+                try:
+                    _cache = LLMCache(
+                        path,
+                        max_bytes=int(float(os.environ.get("PLAGIARISM_CACHE_MAX_MB", "256")) * 1024 * 1024),
+                        max_age=float(os.environ.get("PLAGIARISM_CACHE_MAX_AGE_DAYS", "30")) * 24 * 3600
+                    )
+                except (OSError, sqlite3.Error) as e:
+                    print(f"⚠️ Response cache disabled: {str(e)}")
+                    _cache_disabled = True
+    return _cache
@@ -0,0 +1,173 @@
+import os
+import threading
+import zlib
+from array import array
+
+from similarity import estimate_jaccard, get_minhasher, shingle
+from sqlite_store import SQLiteStore
+
+# 32 bands of 4 rows catch pairs from roughly 0.4 Jaccard similarity upwards
+default_bands = 32
+
+# --- Persistent locality-sensitive hashing index ---
+class LSHIndex(SQLiteStore):
+    """On-disk MinHash LSH index with one entry per (submission, A.C. number).
+
+    Signatures and band buckets live in SQLite, so memory use is bounded by
+    the page cache rather than the number of indexed sections. A query looks
+    up one bucket per band through an index and only scores the candidates
+    found there, so its cost does not grow with the size of the index.
+    """
+
+    def __init__(self, path, bands=default_bands, hasher=None):
+        super().__init__(path)
+        self.hasher = hasher or get_minhasher()
+        if self.hasher.num_perm % bands:
+            raise ValueError(f"{bands} bands do not divide {self.hasher.num_perm} permutations")
+        self.bands = bands
+        self.rows = self.hasher.num_perm // bands
+
+        conn = self._connect()
+        conn.executescript(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            " id INTEGER PRIMARY KEY,"
+            " submission_id TEXT NOT NULL,"
+            " ac_number TEXT NOT NULL,"
+            " shingle_count INTEGER NOT NULL,"
+            " signature BLOB NOT NULL,"
+            " UNIQUE (submission_id, ac_number));"
+            "CREATE TABLE IF NOT EXISTS buckets ("
+            " band INTEGER NOT NULL,"
+            " bucket INTEGER NOT NULL,"
+            " section_id INTEGER NOT NULL);"
+            "CREATE INDEX IF NOT EXISTS buckets_lookup ON buckets (band, bucket);"
+            "CREATE INDEX IF NOT EXISTS buckets_section ON buckets (section_id);"
+        )
+
+    def __len__(self):
+        return self._connect().execute("SELECT COUNT(*) FROM sections").fetchone()[0]
+
+    def _band_keys(self, signature):
+        rows = self.rows
+        return [
+            (band, zlib.crc32(array('I', signature[band * rows:(band + 1) * rows]).tobytes()))
+            for band in range(self.bands)
+        ]
+
+    def add(self, submission_id, ac_number, text):
+        """Index one section; an existing entry for the same key is replaced"""
+        shingles = shingle(text)
+        signature = self.hasher.signature(shingles)
+        self.add_signature(submission_id, ac_number, signature, len(shingles))
+        return signature
+
+    def add_signature(self, submission_id, ac_number, signature, shingle_count):
+        """Index a precomputed MinHash signature"""
+        self.add_many([(submission_id, ac_number, signature, shingle_count)])
+
+    def add_many(self, entries):
+        """Index (submission_id, ac_number, signature, shingle_count) tuples in one transaction"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for submission_id, ac_number, signature, shingle_count in entries:
+                row = conn.execute(
+                    "SELECT id FROM sections WHERE submission_id = ? AND ac_number = ?",
+                    (submission_id, ac_number)
+                ).fetchone()
+                if row:
+                    conn.execute("DELETE FROM buckets WHERE section_id = ?", (row[0],))
+                    conn.execute("DELETE FROM sections WHERE id = ?", (row[0],))
+
+                section_id = conn.execute(
+                    "INSERT INTO sections (submission_id, ac_number, shingle_count, signature)"
+                    " VALUES (?, ?, ?, ?)",
+                    (submission_id, ac_number, shingle_count, array('I', signature).tobytes())
+                ).lastrowid
+                conn.executemany(
+                    "INSERT INTO buckets (band, bucket, section_id) VALUES (?, ?, ?)",
+                    [(band, bucket, section_id) for band, bucket in self._band_keys(signature)]
+                )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def query(self, text, exclude_submission=None, threshold=0.2, top_k=5):
+        """Return the closest indexed sections, best first"""
+        shingles = shingle(text)
+        if not shingles:
+            return []
+        signature = self.hasher.signature(shingles)
+        return self.query_signature(signature, len(shingles), exclude_submission, threshold, top_k)
+
+    def query_signature(self, signature, shingle_count, exclude_submission=None, threshold=0.2, top_k=5):
+        """Return the closest indexed sections for a precomputed signature.
+
+        'overlap' estimates the share of the queried section found in the
+        match, derived from the Jaccard estimate and both shingle counts.
+        """
+        conn = self._connect()
+        candidates = set()
+        for band, bucket in self._band_keys(signature):
+            candidates.update(
+                row[0] for row in conn.execute(
+                    "SELECT section_id FROM buckets WHERE band = ? AND bucket = ?", (band, bucket)
+                )
+            )
+        if not candidates:
+            return []
+
+        matches = []
+        candidate_ids = list(candidates)
+        for start in range(0, len(candidate_ids), 500):
+            chunk = candidate_ids[start:start + 500]
+            placeholders = ','.join('?' * len(chunk))
+            for submission_id, ac_number, other_count, blob in conn.execute(
+                "SELECT submission_id, ac_number, shingle_count, signature FROM sections"
+                f" WHERE id IN ({placeholders})", chunk
+            ):
+                if submission_id == exclude_submission:
+                    continue
+                jaccard = estimate_jaccard(signature, array('I', blob))
+                if jaccard < threshold:
+                    continue
+                shared = jaccard * (shingle_count + other_count) / (1 + jaccard)
+                matches.append({
+                    'submission_id': submission_id,
+                    'ac_number': ac_number,
+                    'jaccard': round(jaccard, 3),
+                    'overlap': round(min(1.0, shared / shingle_count), 3) if shingle_count else 0.0
+                })
+
+        matches.sort(key=lambda m: (m['overlap'], m['jaccard']), reverse=True)
+        return matches[:top_k]
+
+    def remove_submission(self, submission_id):
+        """Drop every section of one submission from the index"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "DELETE FROM buckets WHERE section_id IN"
+                " (SELECT id FROM sections WHERE submission_id = ?)", (submission_id,)
+            )
+            conn.execute("DELETE FROM sections WHERE submission_id = ?", (submission_id,))
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+_index = None
+_index_lock = threading.Lock()
+
+# --- Shared index instance ---
+def get_index():
+    """Return the process-wide index from PLAGIARISM_INDEX_PATH, or None when unset"""
+    global _index
+    path = os.environ.get("PLAGIARISM_INDEX_PATH")
+    if _index is None and path:
+        with _index_lock:
+            if _index is None:
+                _index = LSHIndex(path)
+    return _index
@@ -0,0 +1,288 @@
+"""Process-wide counters and latency histograms, exported as Prometheus text or JSON.
+
+Usage:
+    python metrics.py ~/.cache/plagiarism_checker/jobs/metrics            # Prometheus text
+    python metrics.py reports/metrics.json --format json
+    python metrics.py worker-dir/ --output /var/lib/node_exporter/plagiarism.prom
+
+Recording is a dict lookup, a bisect and a locked increment, so it stays on
+in hot paths. Every process keeps its own registry; job workers and batch
+runs write snapshots to files that this command merges into one view.
+"""
+import argparse
+import bisect
+import glob
+import json
+import os
+import sys
+import threading
+import time
+
+# Bucket upper bounds in seconds
+latency_buckets = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+unit_buckets = (0.0001, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.5, 1.0)
+
+# name: (type, help, buckets)
+definitions = {
+    'plagiarism_document_load_seconds': ('histogram', "Time to open and parse a document file", latency_buckets),
+    'plagiarism_extract_unit_seconds': ('histogram', "Text extraction time per PDF page or DOCX paragraph/cell", unit_buckets),
+    'plagiarism_stage_seconds': ('histogram', "Pipeline stage duration", latency_buckets),
+    'plagiarism_document_seconds': ('histogram', "End-to-end processing time per document", latency_buckets),
+    'plagiarism_documents_total': ('counter', "Documents processed, by outcome", None),
+    'plagiarism_sections_total': ('counter', "A.C. sections analyzed, by source of the verdict", None),
+    'plagiarism_model_request_seconds': ('histogram', "Latency of one model request attempt", latency_buckets),
+    'plagiarism_model_wait_seconds': ('histogram', "Time a model request waited for rate limits and a free slot", latency_buckets),
+    'plagiarism_model_tokens_total': ('counter', "Model tokens, reported by the provider or estimated", None),
+    'plagiarism_model_retries_total': ('counter', "Model requests retried by the scheduler", None),
+    'plagiarism_model_failures_total': ('counter', "Model requests that failed after all retries", None),
+    'plagiarism_verdict_retries_total': ('counter', "Verdicts asked for again because the answer was short or invalid", None),
+    'plagiarism_fallbacks_total': ('counter', "Default answers used because the model could not be reached", None),
+    'plagiarism_cache_lookups_total': ('counter', "Response cache lookups, by kind and result", None),
+    'plagiarism_render_seconds': ('histogram', "PDF report rendering time", latency_buckets),
+}
+
+# --- Metric families ---
+class Histogram:
+    """Cumulative-bucket histogram for one label set"""
+
+    __slots__ = ('bounds', 'counts', 'sum', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+class Registry:
+    """Counters and histograms keyed by metric name and label values"""
+
+    def __init__(self):
+        self._counters = {}
+        self._histograms = {}
+        self._lock = threading.Lock()
+        self.started = time.time()
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, value, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram(definitions[name][2] or latency_buckets)
+            histogram.counts[bisect.bisect_left(histogram.bounds, value)] += 1
+            histogram.sum += value
+            histogram.count += 1
+
+    def timer(self, name, **labels):
+        """Context manager that observes the time spent inside it"""
+        return _Timer(self, name, labels)
+
+    def snapshot(self, reset=False):
+        """JSON-serializable copy of every metric; reset=True also clears them"""
+        with self._lock:
+            counters = [
+                {'name': name, 'labels': dict(labels), 'value': value}
+                for (name, labels), value in self._counters.items()
+            ]
+            histograms = [
+                {
+                    'name': name,
+                    'labels': dict(labels),
+                    'bounds': list(h.bounds),
+                    'counts': list(h.counts),
+                    'sum': h.sum,
+                    'count': h.count
+                }
+                for (name, labels), h in self._histograms.items()
+            ]
+            if reset:
+                self._counters.clear()
+                self._histograms.clear()
+        return {'pid': os.getpid(), 'started': self.started, 'taken': time.time(),
+                'counters': counters, 'histograms': histograms}
+
+    def drain(self):
+        """Snapshot and reset, for handing a worker's metrics to its parent"""
+        return self.snapshot(reset=True)
+
+    def merge(self, snapshot_data):
+        """Add another registry's snapshot into this one"""
+        with self._lock:
+            for counter in snapshot_data['counters']:
+                key = (counter['name'], tuple(sorted(counter['labels'].items())))
+                self._counters[key] = self._counters.get(key, 0) + counter['value']
+            for item in snapshot_data['histograms']:
+                key = (item['name'], tuple(sorted(item['labels'].items())))
+                histogram = self._histograms.get(key)
+                if histogram is None:
+                    histogram = self._histograms[key] = Histogram(tuple(item['bounds']))
+                if list(histogram.bounds) != list(item['bounds']):
+                    continue
+                for i, count in enumerate(item['counts']):
+                    histogram.counts[i] += count
+                histogram.sum += item['sum']
+                histogram.count += item['count']
+
+class _Timer:
+    __slots__ = ('registry', 'name', 'labels', 'start')
+
+    def __init__(self, registry, name, labels):
+        self.registry = registry
+        self.name = name
+        self.labels = labels
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.registry.observe(self.name, time.perf_counter() - self.start, **self.labels)
+
+registry = Registry()
+
+# Shortcuts on the process-wide registry
+inc = registry.inc
+observe = registry.observe
+timer = registry.timer
+
+# --- Export ---
+def _label_text(labels, extra=None):
+    items = list(labels.items()) + (list(extra.items()) if extra else [])
+    if not items:
+        return ""
+    escaped = []
+    for key, value in items:
+        value = str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+        escaped.append(f'{key}="{value}"')
+    return "{" + ",".join(escaped) + "}"
+
+def _format_bound(bound):
+    return "+Inf" if bound == float("inf") else repr(float(bound))
+
+def prometheus_text(snapshot_data):
+    """Prometheus text exposition format of a snapshot"""
+    lines = []
+    by_name = {}
+    for counter in snapshot_data['counters']:
+        by_name.setdefault(counter['name'], []).append(counter)
+    for histogram in snapshot_data['histograms']:
+        by_name.setdefault(histogram['name'], []).append(histogram)
+
+    for name in sorted(by_name):
+        kind, help_text, _ = definitions.get(name, ('counter' if name.endswith('_total') else 'histogram', name, None))
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} {kind}")
+        for item in sorted(by_name[name], key=lambda entry: sorted(entry['labels'].items())):
+            labels = item['labels']
+            if kind == 'counter':
+                lines.append(f"{name}{_label_text(labels)} {item['value']}")
+                continue
+            cumulative = 0
+            for bound, count in zip(list(item['bounds']) + [float("inf")], item['counts']):
+                cumulative += count
+                lines.append(f"{name}_bucket{_label_text(labels, {'le': _format_bound(bound)})} {cumulative}")
+            lines.append(f"{name}_sum{_label_text(labels)} {item['sum']:.6f}")
+            lines.append(f"{name}_count{_label_text(labels)} {item['count']}")
+    return "\n".join(lines) + "\n"
+
+def write_snapshot(path, snapshot_data=None):
+    """Write a snapshot atomically; a .prom path gets Prometheus text, anything else JSON"""
+    snapshot_data = snapshot_data or registry.snapshot()
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        if path.endswith(".prom"):
+            f.write(prometheus_text(snapshot_data))
+        else:
+            json.dump(snapshot_data, f)
+    os.replace(tmp_path, path)
+
+def get_metrics_dir():
+    """Directory where processes drop their snapshots (PLAGIARISM_METRICS_DIR), or None"""
+    return os.environ.get("PLAGIARISM_METRICS_DIR") or None
+
+def dump_process_metrics(role, directory=None):
+    """Write this process's metrics to <directory>/<role>-<pid>.json, if a directory is set"""
+    directory = directory or get_metrics_dir()
+    if not directory:
+        return None
+    path = os.path.join(directory, f"{role}-{os.getpid()}.json")
+    try:
+        write_snapshot(path)
+    except OSError as e:
+        print(f"⚠️ Could not write metrics: {str(e)}")
+        return None
+    return path
+
+def load_snapshots(paths):
+    """Merge JSON snapshot files (or directories of them) into one snapshot"""
+    merged = Registry()
+    for path in paths:
+        files = sorted(glob.glob(os.path.join(path, "*.json"))) if os.path.isdir(path) else [path]
+        for file_path in files:
+            try:
+                with open(file_path, encoding="utf-8") as f:
+                    merged.merge(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"⚠️ Skipping metrics file {file_path}: {str(e)}", file=sys.stderr)
+    return merged.snapshot()
+
+def summary(snapshot_data=None):
+    """Headline figures of a snapshot: volumes, mean latencies, retries and cache hit rate"""
+    snapshot_data = snapshot_data or registry.snapshot()
+    counters = {}
+    for counter in snapshot_data['counters']:
+        counters.setdefault(counter['name'], []).append(counter)
+    histograms = {}
+    for item in snapshot_data['histograms']:
+        totals = histograms.setdefault(item['name'], [0, 0.0])
+        totals[0] += item['count']
+        totals[1] += item['sum']
+
+    def total(name, **match):
+        return sum(
+            c['value'] for c in counters.get(name, [])
+            if all(c['labels'].get(key) == value for key, value in match.items())
+        )
+
+    def mean(name):
+        count, seconds = histograms.get(name, (0, 0.0))
+        return seconds / count if count else 0.0
+
+    lookups = total('plagiarism_cache_lookups_total')
+    return {
+        'documents': total('plagiarism_documents_total', outcome="ok"),
+        'failed_documents': total('plagiarism_documents_total', outcome="failed"),
+        'document_seconds_mean': mean('plagiarism_document_seconds'),
+        'model_requests': histograms.get('plagiarism_model_request_seconds', (0, 0.0))[0],
+        'model_seconds_mean': mean('plagiarism_model_request_seconds'),
+        'tokens': total('plagiarism_model_tokens_total'),
+        'retries': total('plagiarism_model_retries_total') + total('plagiarism_verdict_retries_total'),
+        'fallbacks': total('plagiarism_fallbacks_total'),
+        'cache_hit_rate': total('plagiarism_cache_lookups_total', result="hit") / lookups if lookups else 0.0,
+        'render_seconds_mean': mean('plagiarism_render_seconds')
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge and export plagiarism checker metrics.")
+    parser.add_argument("paths", nargs="+", help="snapshot files or directories of them")
+    parser.add_argument("--format", choices=["prom", "json"], default="prom")
+    parser.add_argument("--output", help="write to this file instead of stdout")
+    args = parser.parse_args(argv)
+
+    snapshot_data = load_snapshots(args.paths)
+    if args.output:
+        write_snapshot(args.output, snapshot_data)
+    elif args.format == "prom":
+        sys.stdout.write(prometheus_text(snapshot_data))
+    else:
+        print(json.dumps(snapshot_data, indent=2))
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,152 @@
+"""PDF page text extraction, on a process pool for long documents.
+
+PyPDF2's extract_text is pure Python and CPU-bound, so a long PDF is split
+into page ranges that worker processes extract at the same time. Results
+come back in page order, and each range is yielded as soon as it and the
+ranges before it are done, so section checks still start on the first
+pages. Documents shorter than parallel_min_pages (or with one worker) are
+read in the calling process, where pool start-up and hand-over would cost
+more than they save. So is every document read in a daemon process, since
+those may not start processes of their own (job queue workers are not
+daemons, so they do use the pool).
+"""
+import os
+import threading
+import time
+from contextlib import ExitStack
+
+import metrics
+from document_sources import document_path, open_document
+
+# Worker processes for long PDFs (default: one per CPU; 1 disables the pool)
+pdf_workers = int(os.environ.get("PLAGIARISM_PDF_WORKERS", "0")) or os.cpu_count() or 1
+
+# Shorter documents are always extracted in the calling process
+parallel_min_pages = int(os.environ.get("PLAGIARISM_PDF_PARALLEL_MIN_PAGES", "40"))
+
+# Each worker gets about this many ranges, so fast workers pick up the slack
+ranges_per_worker = 3
+min_range_pages = 4
+
+def set_pdf_workers(count):
+    """Change how many processes extract one long PDF (1: always in this process)"""
+    global pdf_workers
+    pdf_workers = max(1, int(count))
+
+# --- Page text in page order ---
+def iter_page_texts(source, workers=None, min_pages=None):
+    """Yield the text of every page of a PDF in order.
+
+    source is a path, a bytes-like object or a binary file object. Buffers
+    and file objects are written once to a temporary file when the pool is
+    used, since the workers open the document themselves.
+    """
+    import multiprocessing
+    from PyPDF2 import PdfReader
+
+    workers = pdf_workers if workers is None else workers
+    min_pages = parallel_min_pages if min_pages is None else min_pages
+    with open_document(source) as stream:
+        with metrics.timer('plagiarism_document_load_seconds', file_type="pdf"):
+            reader = PdfReader(stream)
+        page_count = len(reader.pages)
+
+        if workers <= 1 or page_count < max(min_pages, 2) or multiprocessing.current_process().daemon:
+            for page in reader.pages:
+                start = time.perf_counter()
+                text = page.extract_text() or ""
+                metrics.observe('plagiarism_extract_unit_seconds', time.perf_counter() - start, unit="page")
+                yield text
+            return
+
+        with document_path(source if isinstance(source, (str, os.PathLike)) else stream, ".pdf") as path:
+            yield from _iter_parallel(path, page_count, workers)
+
+def _iter_parallel(path, page_count, workers):
+    stat = os.stat(path)
+    # Workers keep the last document open; size and mtime tell a changed file apart
+    document = (path, stat.st_size, stat.st_mtime_ns)
+    size = max(min_range_pages, -(-page_count // (workers * ranges_per_worker)))
+    pool = get_pool(workers)
+    futures = [
+        pool.submit(extract_page_range, document, start, min(page_count, start + size))
+        for start in range(0, page_count, size)
+    ]
+    try:
+        for future in futures:
+            texts, seconds = future.result()
+            for text, page_seconds in zip(texts, seconds):
+                metrics.observe('plagiarism_extract_unit_seconds', page_seconds, unit="page")
+                yield text
+    finally:
+        # Stopped early (an error, or the caller closed the generator)
+        for future in futures:
+            future.cancel()
+
+# --- Worker side ---
+_open_document = None
+
+def extract_page_range(document, start, stop):
+    """Text and extraction seconds of pages start..stop-1, in a worker process"""
+    reader = _reader_for(document)
+    texts, seconds = [], []
+    for index in range(start, stop):
+        began = time.perf_counter()
+        texts.append(reader.pages[index].extract_text() or "")
+        seconds.append(time.perf_counter() - began)
+    return texts, seconds
+
+def _reader_for(document):
+    """PdfReader for document, reused across the ranges of one document"""
+    global _open_document
+    from PyPDF2 import PdfReader
+
+    if _open_document is not None and _open_document[0] == document:
+        return _open_document[2]
+    if _open_document is not None:
+        _open_document[1].close()
+        _open_document = None
+    stack = ExitStack()
+    try:
+        reader = PdfReader(stack.enter_context(open_document(document[0])))
+    except BaseException:
+        stack.close()
+        raise
+    _open_document = (document, stack, reader)
+    return reader
+
+def _warm_up():
+    import PyPDF2  # noqa: F401
+
+# --- Shared pool ---
+_pool = None
+_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def get_pool(workers):
+    """The process-wide extraction pool, started on first use with workers processes"""
+    global _pool, _pool_workers
+    # multiprocessing is imported on first use, like PyPDF2, to keep imports cheap
+    import multiprocessing
+    from concurrent.futures import ProcessPoolExecutor
+
+    with _pool_lock:
+        if _pool is None or _pool_workers != workers:
+            if _pool is not None:
+                _pool.shutdown(wait=False, cancel_futures=True)
+            _pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_warm_up
+            )
+            _pool_workers = workers
+        return _pool
+
+def shutdown_pool():
+    """Stop the extraction pool; the next long PDF starts a new one"""
+    global _pool, _pool_workers
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+        _pool = None
+        _pool_workers = 0
@@ -1,248 +1,750 @@
 import os
+import queue
+from collections import deque
+import random
 import re
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
-from docx import Document
-from PyPDF2 import PdfReader
-from azure.ai.inference import ChatCompletionsClient
-from azure.ai.inference.models import SystemMessage, UserMessage
-from azure.core.credentials import AzureKeyCredential
-from reportlab.lib import colors
-from reportlab.lib.pagesizes import letter, landscape
-from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, PageBreak, KeepTogether
-from reportlab.lib.units import inch
-
-# Azure GPT setup
-endpoint = "https://models.github.ai/inference"
-model = "openai/gpt-4.1"
-token = os.environ.get("AZURE_TOKEN", "default_token")
-
-client = ChatCompletionsClient(
-    endpoint=endpoint,
-    credential=AzureKeyCredential(token),
+from llm_backends import get_backend
+from llm_cache import get_cache, make_cache_key
+from lsh_index import get_index
+import metrics
+from docx_extraction import iter_paragraph_texts
+from pdf_extraction import iter_page_texts
+from report_model import Report, build_report
+from section_segmentation import docx_ac_grammar, iter_sections, pdf_ac_grammar, segment_lines
+from similarity import find_cross_submission_matches
+from submission_history import get_history, section_fingerprint
+from topic_classifier import confident_answer, get_topic_classifier, record_example
+from verdicts import (VerdictError, format_verdict, note_max_tokens, parse_packed_verdicts,
+                      parse_verdict_json, score_value, verdict_schema)
+
+# The model backend (Azure by default, see llm_backends.py) is created on first use.
+# PyPDF2 and reportlab are imported inside the stage that needs them (DOCX files are
+# parsed with the standard library, see docx_extraction.py),
+# so importing this module (every Streamlit rerun, every batch worker) stays cheap.
+
+# Bump these whenever a prompt changes so cached responses are not reused
+topic_prompt_version = 1
+plagiarism_prompt_version = 1
+feedback_prompt_version = 1
+packed_prompt_version = 1
+section_feedback_prompt_version = 1
+
+# Number of A.C. sections analyzed at the same time
+max_concurrency = int(os.environ.get("PLAGIARISM_MAX_CONCURRENCY", "4"))
+
+# Oversized sections are split into overlapping chunks instead of being truncated
+chunked_analysis = os.environ.get("PLAGIARISM_CHUNKED_ANALYSIS", "1") != "0"
+chunk_max_tokens = 1500
+chunk_overlap_tokens = 150
+
+# Small sections can share one request, up to this many estimated input tokens
+packed_analysis = os.environ.get("PLAGIARISM_PACKED_ANALYSIS", "0") == "1"
+pack_token_budget = 3000
+pack_section_max_tokens = 600
+
+# Verdicts come back as compact JSON ("json") or the labelled text block ("text");
+# the JSON "note" is one sentence ("note"), full feedback ("full") or left out ("none")
+verdict_format = os.environ.get("PLAGIARISM_VERDICT_FORMAT", "json")
+verdict_feedback = os.environ.get("PLAGIARISM_VERDICT_FEEDBACK", "note")
+
+# Sections that get the long feedback of generate_section_feedback in place of the
+# short note: "flagged" (plagiarism found), "all" or "none"
+detailed_feedback = os.environ.get("PLAGIARISM_DETAILED_FEEDBACK", "flagged")
+
+# The local topic classifier answers only when at least this confident
+topic_min_confidence = float(os.environ.get("PLAGIARISM_TOPIC_MIN_CONFIDENCE", "0.6"))
+
+# --- Request scheduling: rate limits, backoff and adaptive concurrency ---
+class TokenBucket:
+    """Blocking token bucket refilled continuously at rate_per_minute"""
+    
+    def __init__(self, rate_per_minute):
+        self.rate_per_minute = rate_per_minute
+        self.capacity = float(rate_per_minute)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+    
+    def acquire(self, amount=1):
+        if not self.rate_per_minute:
+            return
+        # Requests larger than the bucket wait for a full bucket instead of forever
+        amount = min(amount, self.capacity)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate_per_minute / 60)
+                self.updated = now
+                if self.tokens >= amount:
+                    self.tokens -= amount
+                    return
+                wait = (amount - self.tokens) * 60 / self.rate_per_minute
+            time.sleep(wait)
+
+class RequestScheduler:
+    """Send every model request through shared rate limits and retries.
+    
+    Requests and estimated tokens per minute are limited by token buckets.
+    Throttling (429) and transient failures are retried with exponential
+    backoff and full jitter, waiting at least as long as Retry-After asks.
+    The number of requests in flight grows by one per window of successes
+    and halves on every throttle, or when timeouts, 5xx responses and
+    connection errors make up error_rate_threshold of the last error_window
+    requests, between 1 and max_concurrency.
+    """
+    
+    retryable_status = {408, 409, 429, 500, 502, 503, 504}
+    error_window = 20
+    error_rate_threshold = 0.25
+    min_error_samples = 4
+    
+    def __init__(self, max_concurrency=8, requests_per_minute=0, tokens_per_minute=0,
+                 max_retries=4, base_delay=1.0, max_delay=60.0):
+        self.max_concurrency = max(1, max_concurrency)
+        self.concurrency = float(self.max_concurrency)
+        self.request_bucket = TokenBucket(requests_per_minute)
+        self.token_bucket = TokenBucket(tokens_per_minute)
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.in_flight = 0
+        self.paused_until = 0.0
+        self.requests = 0
+        self.retries = 0
+        self.throttled = 0
+        self.failures = 0
+        # Recent outcomes, True for a transient error; cleared after each decrease
+        self.recent = deque(maxlen=self.error_window)
+        self.condition = threading.Condition()
+    
+    def set_max_concurrency(self, limit):
+        with self.condition:
+            self.max_concurrency = max(1, int(limit))
+            self.concurrency = max(1.0, min(self.concurrency, self.max_concurrency))
+            self.condition.notify_all()
+    
+    def _enter(self):
+        with self.condition:
+            while True:
+                pause = self.paused_until - time.monotonic()
+                if pause > 0:
+                    self.condition.wait(pause)
+                elif self.in_flight >= int(self.concurrency):
+                    self.condition.wait()
+                else:
+                    self.in_flight += 1
+                    self.requests += 1
+                    return
+    
+    def _leave(self, outcome, retrying):
+        """Record one request's outcome: ok, throttled, transient or error"""
+        with self.condition:
+            self.in_flight -= 1
+            if outcome == "throttled":
+                self.throttled += 1
+            if retrying:
+                self.retries += 1
+            elif outcome != "ok":
+                self.failures += 1
+            
+            if outcome == "ok":
+                self.recent.append(False)
+                # Additive increase: about +1 after a full window of successes
+                self.concurrency = min(self.max_concurrency, self.concurrency + 1 / self.concurrency)
+            elif outcome == "throttled":
+                # Multiplicative decrease
+                self.concurrency = max(1.0, self.concurrency / 2)
+                self.recent.clear()
+            elif outcome == "transient":
+                self.recent.append(True)
+                if (len(self.recent) >= self.min_error_samples
+                        and sum(self.recent) / len(self.recent) >= self.error_rate_threshold):
+                    self.concurrency = max(1.0, self.concurrency / 2)
+                    self.recent.clear()
+            self.condition.notify_all()
+    
+    def _pause(self, seconds):
+        with self.condition:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+    
+    @staticmethod
+    def _status_code(error):
+        status = getattr(error, 'status_code', None)
+        if status is None:
+            status = getattr(getattr(error, 'response', None), 'status_code', None)
+        return status
+    
+    @staticmethod
+    def _retry_after(error):
+        """Seconds the provider asked us to wait, if it said so"""
+        headers = getattr(getattr(error, 'response', None), 'headers', None) or {}
+        for name, scale in (('retry-after-ms', 0.001), ('x-ms-retry-after-ms', 0.001), ('retry-after', 1.0)):
+            value = headers.get(name) or headers.get(name.title())
+            if value:
+                try:
+                    return float(value) * scale
+                except ValueError:
+                    continue
+        return None
+    
+    def _backoff(self, attempt):
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+    
+    def run(self, call, estimated_tokens=0, label="model request"):
+        """Run call() under the rate limits, retrying throttled and transient failures"""
+        for attempt in range(self.max_retries + 1):
+            waited = time.perf_counter()
+            self.request_bucket.acquire(1)
+            self.token_bucket.acquire(estimated_tokens)
+            self._enter()
+            metrics.observe('plagiarism_model_wait_seconds', time.perf_counter() - waited)
+            outcome = "error"
+            retrying = False
+            try:
+                result = call()
+                outcome = "ok"
+                return result
+            except Exception as e:
+                status = self._status_code(e)
+                transient = (
+                    status in self.retryable_status
+                    or isinstance(e, (ConnectionError, TimeoutError))
+                    or type(e).__name__ in ('ServiceRequestError', 'ServiceResponseError')
+                )
+                if status == 429:
+                    outcome = "throttled"
+                elif transient:
+                    outcome = "transient"
+                if not transient or attempt == self.max_retries:
+                    metrics.inc('plagiarism_model_failures_total', reason=str(status or type(e).__name__))
+                    raise
+                
+                delay = self._backoff(attempt)
+                retry_after = self._retry_after(e)
+                if retry_after is not None:
+                    delay = max(delay, retry_after)
+                if outcome == "throttled":
+                    # Hold back every caller, not just this one
+                    self._pause(delay)
+                retrying = True
+                metrics.inc('plagiarism_model_retries_total', reason="throttled" if outcome == "throttled" else "transient")
+                print(f"🔄 {label} failed ({status or type(e).__name__}), retrying in {delay:.1f}s...")
+            finally:
+                self._leave(outcome, retrying)
+            time.sleep(delay)
+    
+    def stats(self):
+        with self.condition:
+            return {
+                'requests': self.requests,
+                'retries': self.retries,
+                'throttled': self.throttled,
+                'failures': self.failures,
+                'concurrency': round(self.concurrency, 2),
+                'in_flight': self.in_flight
+            }
+
+scheduler = RequestScheduler(
+    max_concurrency=int(os.environ.get("PLAGIARISM_MAX_MODEL_CALLS", "8")),
+    requests_per_minute=int(os.environ.get("PLAGIARISM_REQUESTS_PER_MINUTE", "0")),
+    tokens_per_minute=int(os.environ.get("PLAGIARISM_TOKENS_PER_MINUTE", "0")),
+    max_retries=int(os.environ.get("PLAGIARISM_MAX_RETRIES", "4"))
 )
 
+# --- Single entry point for model requests ---
+def complete_chat(system, user, kind="chat", **params):
+    """Send one system + user prompt to the model backend through the request scheduler.
+    
+    kind labels the request's latency and token metrics (topic, plagiarism, ...).
+    """
+    backend = get_backend()
+    estimated_tokens = (len(system) + len(user)) // 4 + (params.get('max_tokens') or 800)
+    
+    def attempt():
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            text = backend.complete(system, user, **params)
+            outcome = "ok"
+        finally:
+            metrics.observe('plagiarism_model_request_seconds', time.perf_counter() - start, kind=kind, outcome=outcome)
+        usage = backend.last_usage() or {
+            'input': (len(system) + len(user)) // 4,
+            'output': len(text) // 4
+        }
+        metrics.inc('plagiarism_model_tokens_total', usage['input'], kind=kind, direction="input")
+        metrics.inc('plagiarism_model_tokens_total', usage['output'], kind=kind, direction="output")
+        return text
+    
+    return scheduler.run(attempt, estimated_tokens)
+
+def set_model_concurrency(limit):
+    """Change how many model requests may be in flight at once"""
+    scheduler.set_max_concurrency(limit)
+
 # --- Extract A.C. sections from DOCX ---
-def extract_ac_sections_from_docx(docx_path):
-    doc = Document(docx_path)
-    
-    # Multiple patterns to catch different A.C. section formats
-    ac_patterns = [
-        re.compile(r'^A\.C\.?\s*(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
-        re.compile(r'^A\.C\.?\s*(\d+\.\d+)', re.IGNORECASE),
-        re.compile(r'A\.C\.?\s*(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
-        re.compile(r'A\.C\.?\s*(\d+\.\d+)', re.IGNORECASE),
-        re.compile(r'^(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
-        re.compile(r'^(\d+\.\d+)', re.IGNORECASE)
-    ]
-    
-    sections = {}
-    all_text_content = []
-
-    # Collect all text content first
-    # Extract from tables
-    for table in doc.tables:
-        for row in table.rows:
-            for cell in row.cells:
-                for para in cell.paragraphs:
-                    text = para.text.strip()
-                    if text:
-                        all_text_content.append(text)
-    
-    # Extract from regular paragraphs
-    for para in doc.paragraphs:
-        text = para.text.strip()
-        if text:
-            all_text_content.append(text)
+def iter_docx_lines(source):
+    """Yield stripped, non-empty paragraph texts in document order.
     
-    # Process all content to find A.C. sections
-    current_ac = None
-    for text_line in all_text_content:
-        # Try all patterns
-        matched = False
-        for pattern in ac_patterns:
-            match = pattern.match(text_line)
-            if match:
-                current_ac = match.group(1)
-                sections[current_ac] = text_line
-                matched = True
-                print(f"🔍 Found A.C. {current_ac}: {text_line[:50]}...")
-                break
-        
-        # If no pattern matched but we have a current AC, append to it
-        if not matched and current_ac:
-            # Stop adding to current AC if we hit another numbered section
-            if re.match(r'^\d+\.\d+', text_line) and not any(pattern.match(text_line) for pattern in ac_patterns):
-                # This might be a new section we didn't recognize
-                pass
-            else:
-                sections[current_ac] += '\n' + text_line
+    source is a path, a bytes-like object or a binary file object. The
+    document is streamed from the zip (see docx_extraction.py), so table
+    cells and body paragraphs come out in the order they appear.
+    """
+    for text in iter_paragraph_texts(source):
+        text = text.strip()
+        if text:
+            yield text
+
+def iter_ac_sections_from_docx(source, grammar=docx_ac_grammar):
+    """Yield (A.C. number, content) pairs as soon as each section is complete"""
+    return iter_sections(iter_docx_lines(source), grammar)
+
+def extract_ac_sections_from_docx(source, grammar=docx_ac_grammar):
+    sections = segment_lines(iter_docx_lines(source), grammar)
     
     print(f"📋 Extracted A.C. sections: {sorted(sections.keys(), key=lambda x: float(x))}")
     return sections
 
 # --- Extract A.C. sections from PDF ---
-def extract_ac_sections_from_pdf(pdf_path):
-    reader = PdfReader(pdf_path)
-    full_text = ""
-    for page in reader.pages:
-        full_text += page.extract_text() + "\n"
-
-    # Split text into lines for better processing
-    lines = full_text.split('\n')
-    
-    # Multiple patterns to catch different A.C. section formats
-    ac_patterns = [
-        re.compile(r'^A\.C\.?\s*(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
-        re.compile(r'^A\.C\.?\s*(\d+\.\d+)', re.IGNORECASE),
-        re.compile(r'A\.C\.?\s*(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
-        re.compile(r'A\.C\.?\s*(\d+\.\d+)', re.IGNORECASE),
-        re.compile(r'^(\d+\.\d+)\s+COVERED[:\-]?', re.IGNORECASE),
-        re.compile(r'^(\d+\.\d+)(?=\s|$)', re.IGNORECASE)
-    ]
-    
-    sections = {}
-    current_ac = None
+def iter_pdf_lines(source):
+    """Yield stripped, non-empty text lines one page at a time.
     
-    # Process line by line
-    for line in lines:
-        line = line.strip()
-        if not line:
-            continue
-            
-        # Try all patterns
-        matched = False
-        for pattern in ac_patterns:
-            match = pattern.match(line)
-            if match:
-                current_ac = match.group(1)
-                sections[current_ac] = line
-                matched = True
-                print(f"🔍 Found A.C. {current_ac}: {line[:50]}...")
-                break
-        
-        # If no pattern matched but we have a current AC, append to it
-        if not matched and current_ac:
-            sections[current_ac] += '\n' + line
-    
-    # Also try the original approach as fallback
-    if not sections:
-        print("📋 Trying fallback extraction method...")
-        for pattern in ac_patterns:
-            matches = list(pattern.finditer(full_text))
-            if matches:
-                for i, match in enumerate(matches):
-                    start = match.end()
-                    end = matches[i + 1].start() if i + 1 < len(matches) else len(full_text)
-                    ac_key = match.group(1)
-                    content = full_text[match.start():end].strip()
-                    
-                    if ac_key not in sections or len(content) > len(sections[ac_key]):
-                        sections[ac_key] = content
-                        print(f"🔍 Fallback found A.C. {ac_key}")
-                break
+    source is a path, a bytes-like object or a binary file object. Long
+    PDFs are extracted on a process pool (see pdf_extraction.py), with the
+    pages still coming back in order.
+    """
+    for page_text in iter_page_texts(source):
+        for line in page_text.split('\n'):
+            line = line.strip()
+            if line:
+                yield line
+
+def iter_ac_sections_from_pdf(source, grammar=pdf_ac_grammar):
+    """Yield (A.C. number, content) pairs while reading the PDF page by page.
+    
+    Each section is yielded as soon as the next header appears, so memory
+    stays bounded by the largest section rather than the whole document.
+    """
+    return iter_sections(iter_pdf_lines(source), grammar)
+
+def extract_ac_sections_from_pdf(source, grammar=pdf_ac_grammar):
+    sections = segment_lines(iter_pdf_lines(source), grammar)
     
     print(f"📋 Extracted A.C. sections: {sorted(sections.keys(), key=lambda x: float(x))}")
     return sections
 
 # --- Topic Detection ---
 def detect_document_topic(content_sample):
-    """Detect the main topic of the document using GPT"""
+    """Detect the main topic of the document, locally when the classifier is confident, else using GPT"""
+    classifier = get_topic_classifier()
+    if classifier is not None:
+        topic, confidence = classifier.predict(content_sample)
+        if topic and confidence >= topic_min_confidence:
+            print(f"🎯 Topic classified locally: {topic} ({confidence:.0%})")
+            return topic
+    
     prompt = (
         "Identify the main academic or professional topic of the following document excerpt. "
         "Respond with only the topic name in 3-5 words.\n\n"
         f"EXCERPT:\n{content_sample[:2000]}"
     )
     
+    cache = get_cache()
+    cache_key = make_cache_key("topic", content_sample[:2000], "", get_backend().model, topic_prompt_version)
+    if cache:
+        cached_topic = cache.get(cache_key, kind="topic")
+        if cached_topic is not None:
+            return cached_topic
+    
     try:
-        response = client.complete(
-            messages=[
-                SystemMessage("You are a topic classification assistant."),
-                UserMessage(prompt),
-            ],
+        response = complete_chat(
+            "You are a topic classification assistant.",
+            prompt,
+            kind="topic",
             temperature=0.3,
             top_p=1.0,
-            max_tokens=20,
-            model=model
+            max_tokens=20
         )
-        topic = response.choices[0].message.content.strip()
+        topic = response.strip()
         # Clean up GPT response
         topic = re.sub(r'[^a-zA-Z0-9\s]', '', topic)
+        if cache and topic:
+            cache.set(cache_key, topic, kind="topic")
+        # Plain answers from a real model become training examples for the local classifier
+        if not get_backend().synthetic and confident_answer(topic):
+            record_example(content_sample, topic)
         return topic
     except Exception:
+        metrics.inc('plagiarism_fallbacks_total', kind="topic")
         return "Academic Subject"
 
 # --- GPT Plagiarism Checker with error handling ---
+fallback_plagiarism_response = (
+    "Plagiarism Found: No\n"
+    "Plagiarism Score: 8%\n"
+    "Plagiarism Level: Low\n"
+    "Feedback: Content analysis completed successfully. The work demonstrates adequate understanding of key concepts and meets basic assessment criteria. The content shows appropriate academic structure and relevant subject knowledge with clear explanations."
+)
+
 def gpt_plagiarism_check(ac_number, content, document_topic):
     word_count = len(content.split())
     char_count = len(content)
     
-    # Truncate content if too large
+    # Large sections are analyzed in overlapping chunks, or truncated if chunking is off
     if word_count > 1500 or char_count > 8000:
+        if chunked_analysis:
+            return chunked_plagiarism_check(ac_number, content, document_topic)
         print(f"⚠️ Warning: A.C. {ac_number} content is large ({word_count} words). Truncating for processing.")
         content = content[:8000] + "... [Content truncated for analysis]"
     
-    user_prompt = (
-        f"Analyze this {document_topic} content for A.C. {ac_number}. "
-        f"Respond in EXACTLY this format:\n\n"
-        f"Plagiarism Found: [Yes/No]\n"
-        f"Plagiarism Score: [number]%\n"
-        f"Plagiarism Level: [Low/Medium/High]\n"
-        f"Feedback: [Provide detailed feedback about content quality, structure, and understanding in 500-800 characters]\n\n"
-        f"CONTENT:\n{content}"
-    )
+    response_text = request_plagiarism_verdict(ac_number, content, document_topic)
+    if response_text is None:
+        # Fallback response if all attempts fail
+        print(f"❌ All attempts failed for A.C. {ac_number}, using fallback response")
+        metrics.inc('plagiarism_fallbacks_total', kind="plagiarism")
+        return fallback_plagiarism_response
+    return response_text
+
+def request_plagiarism_verdict(ac_number, content, document_topic, part=None):
+    """Ask the model for one verdict, returning None if every attempt fails.
+    
+    part is an optional (index, total) pair used when content is one chunk
+    of a larger section.
+    """
+    label = f"A.C. {ac_number}" if part is None else f"A.C. {ac_number} (part {part[0]} of {part[1]})"
+    use_json = verdict_format == "json"
+    if use_json:
+        user_prompt = (
+            f"Analyze this {document_topic} content for {label}. "
+            f"Reply with ONLY this JSON object and no other text:\n"
+            f"{verdict_schema(verdict_feedback)}\n\n"
+            f"CONTENT:\n{content}"
+        )
+        max_tokens = note_max_tokens[verdict_feedback]
+        kind = f"plagiarism-json-{verdict_feedback}"
+    else:
+        user_prompt = (
+            f"Analyze this {document_topic} content for {label}. "
+            f"Respond in EXACTLY this format:\n\n"
+            f"Plagiarism Found: [Yes/No]\n"
+            f"Plagiarism Score: [number]%\n"
+            f"Plagiarism Level: [Low/Medium/High]\n"
+            f"Feedback: [Provide detailed feedback about content quality, structure, and understanding in 500-800 characters]\n\n"
+            f"CONTENT:\n{content}"
+        )
+        max_tokens = 600
+        kind = "plagiarism"
 
-    max_retries = 2
-    for attempt in range(max_retries):
+    cache = get_cache()
+    cache_key = make_cache_key(
+        kind, f"{label}\n{content}", document_topic, get_backend().model, plagiarism_prompt_version
+    )
+    if cache:
+        cached_response = cache.get(cache_key, kind="plagiarism")
+        if cached_response is not None:
+            print(f"💾 Using cached response for {label}")
+            return cached_response
+    
+    # Short answers get one more try; errors are retried by the request scheduler
+    max_attempts = 2
+    for attempt in range(max_attempts):
         try:
-            print(f"📤 Sending request for A.C. {ac_number} (attempt {attempt + 1})...")
+            print(f"📤 Sending request for {label} (attempt {attempt + 1})...")
             start_time = time.time()
             
-            response = client.complete(
-                messages=[
-                    SystemMessage("You are an expert academic assessment assistant. Be concise and structured."),
-                    UserMessage(user_prompt),
-                ],
+            response = complete_chat(
+                "You are an expert academic assessment assistant. Be concise and structured.",
+                user_prompt,
+                kind="plagiarism",
                 temperature=0.5,
                 top_p=0.9,
-                model=model,
-                max_tokens=600
+                max_tokens=max_tokens
             )
             
             end_time = time.time()
             duration = end_time - start_time
-            print(f"✅ Received response for A.C. {ac_number} in {duration:.2f} seconds")
+            print(f"✅ Received response for {label} in {duration:.2f} seconds")
             
-            response_text = response.choices[0].message.content.strip()
-            if response_text and len(response_text) > 50:
-                return response_text
-            else:
-                print(f"⚠️ Short response for A.C. {ac_number}, retrying...")
+            response_text = response.strip()
+            if use_json:
+                try:
+                    parse_verdict_json(response_text)
+                except VerdictError as e:
+                    print(f"⚠️ Invalid verdict for {label} ({str(e)}), retrying...")
+                    metrics.inc('plagiarism_verdict_retries_total', reason="invalid")
+                    continue
+            elif not response_text or len(response_text) <= 50:
+                print(f"⚠️ Short response for {label}, retrying...")
+                metrics.inc('plagiarism_verdict_retries_total', reason="short")
                 continue
+            if cache:
+                cache.set(cache_key, response_text, kind="plagiarism")
+            return response_text
                 
         except Exception as e:
-            print(f"❌ Attempt {attempt + 1} failed for A.C. {ac_number}: {str(e)}")
-            if attempt < max_retries - 1:
-                print(f"🔄 Retrying A.C. {ac_number} in 2 seconds...")
-                time.sleep(2)
+            # The scheduler already retried throttling and transient errors
+            print(f"❌ Request failed for {label}: {str(e)}")
+            return None
+    
+    return None
+
+# --- Detailed section feedback on demand ---
+def generate_section_feedback(ac_number, content, document_topic, result=None):
+    """Ask for 500-800 characters of feedback on one section.
+    
+    Compact verdicts carry at most a short note, so the long feedback is
+    requested only for the sections someone wants to read it for (the
+    pipeline's details stage, see PLAGIARISM_DETAILED_FEEDBACK).
+    """
+    verdict = ""
+    if result is not None:
+        verdict = (
+            f"The plagiarism check found: plagiarism {result['plagiarism']}, "
+            f"score {score_value(result['score'])}%, level {result['level']}.\n"
+        )
+    user_prompt = (
+        f"{verdict}Give detailed feedback about the content quality, structure, and understanding "
+        f"shown in this {document_topic} content for A.C. {ac_number}, in 500-800 characters. "
+        f"Reply with the feedback only.\n\n"
+        f"CONTENT:\n{content[:8000]}"
+    )
+    
+    cache = get_cache()
+    cache_key = make_cache_key(
+        "section-feedback", f"{verdict}{ac_number}\n{content}", document_topic, get_backend().model,
+        section_feedback_prompt_version
+    )
+    feedback = cache.get(cache_key, kind="section-feedback") if cache else None
+    if feedback is None:
+        print(f"📤 Requesting detailed feedback for A.C. {ac_number}...")
+        feedback = complete_chat(
+            "You are an expert academic assessment assistant.",
+            user_prompt,
+            kind="section-feedback",
+            temperature=0.5,
+            top_p=0.9,
+            max_tokens=300
+        ).strip()
+        if cache and feedback:
+            cache.set(cache_key, feedback, kind="section-feedback")
+    return feedback
+
+# --- Chunked analysis of oversized sections ---
+def estimate_tokens(word):
+    """Rough token count for one word (about four characters per token)"""
+    return len(word) // 4 + 1
+
+def split_into_chunks(content, max_tokens=None, overlap_tokens=None):
+    """Split content into word chunks of at most max_tokens, overlapping by overlap_tokens"""
+    max_tokens = max_tokens or chunk_max_tokens
+    overlap_tokens = chunk_overlap_tokens if overlap_tokens is None else overlap_tokens
+    words = content.split()
+    costs = [estimate_tokens(word) for word in words]
+    
+    chunks = []
+    start = 0
+    while start < len(words):
+        end = start
+        used = 0
+        while end < len(words) and (end == start or used + costs[end] <= max_tokens):
+            used += costs[end]
+            end += 1
+        chunks.append(' '.join(words[start:end]))
+        if end >= len(words):
+            break
+        
+        # Step back far enough to repeat overlap_tokens worth of words
+        next_start = end
+        carried = 0
+        while next_start > start + 1 and carried + costs[next_start - 1] <= overlap_tokens:
+            next_start -= 1
+            carried += costs[next_start]
+        start = next_start
+    return chunks
+
+level_rank = {'low': 0, 'medium': 1, 'high': 2}
+
+def merge_chunk_verdicts(ac_number, verdicts):
+    """Reduce per-chunk verdicts to one JSON verdict.
+    
+    The highest score and level win, plagiarism is found if any chunk found
+    it, and the feedback comes from the highest-scoring chunk (earliest on
+    ties), so the same chunk verdicts always give the same result.
+    """
+    parsed = [parse_gpt_response(verdict) for verdict in verdicts]
+    scores = [result['score'] for result in parsed]
+    worst = max(range(len(parsed)), key=lambda i: (scores[i], -i))
+    
+    plagiarism = "Yes" if any(result['plagiarism'].lower().startswith('y') for result in parsed) else "No"
+    level = max(
+        (result['level'] for result in parsed),
+        key=lambda value: level_rank.get(value.lower(), 0)
+    )
+    feedback = (
+        f"Analyzed in {len(parsed)} overlapping parts. {parsed[worst]['feedback']}"
+    )
+    return format_verdict({'plagiarism': plagiarism, 'score': scores[worst], 'level': level, 'feedback': feedback})
+
+def chunked_plagiarism_check(ac_number, content, document_topic):
+    """Analyze every chunk of a large section concurrently and merge the verdicts"""
+    chunks = split_into_chunks(content)
+    total = len(chunks)
+    print(f"✂️ A.C. {ac_number} is large, analyzing it in {total} overlapping chunks")
+    
+    # No more threads than the scheduler lets into the model at once; the rest would only wait
+    with ThreadPoolExecutor(max_workers=min(total, scheduler.max_concurrency)) as executor:
+        responses = list(executor.map(
+            lambda item: request_plagiarism_verdict(ac_number, item[1], document_topic, part=(item[0], total)),
+            enumerate(chunks, start=1)
+        ))
+    
+    verdicts = [response for response in responses if response is not None]
+    if not verdicts:
+        print(f"❌ All attempts failed for A.C. {ac_number}, using fallback response")
+        metrics.inc('plagiarism_fallbacks_total', kind="plagiarism")
+        return fallback_plagiarism_response
+    if len(verdicts) < total:
+        print(f"⚠️ {total - len(verdicts)} of {total} chunks failed for A.C. {ac_number}")
+    return merge_chunk_verdicts(ac_number, verdicts)
+
+# --- Packed analysis of small sections ---
+packed_header_pattern = re.compile(r'^\s*A\.C\.?\s*(?:No\.?|Number)?\s*:?\s*(\d+\.\d+)\s*$', re.IGNORECASE)
+
+def estimate_content_tokens(content):
+    return sum(estimate_tokens(word) for word in content.split())
+
+def pack_sections(ac_sections, token_budget=None, section_max_tokens=None):
+    """Group small sections into packs that fit the token budget.
+    
+    Returns a list of A.C. number lists in A.C. order; sections that are
+    empty or too large for packing get a group of their own.
+    """
+    token_budget = token_budget or pack_token_budget
+    section_max_tokens = section_max_tokens or pack_section_max_tokens
+    groups = []
+    pack = []
+    pack_tokens = 0
+    for ac_num, content in ac_sections.items():
+        tokens = estimate_content_tokens(content)
+        if not content.strip() or tokens > section_max_tokens:
+            groups.append([ac_num])
             continue
+        if pack and pack_tokens + tokens > token_budget:
+            groups.append(pack)
+            pack = []
+            pack_tokens = 0
+        pack.append(ac_num)
+        pack_tokens += tokens
+    if pack:
+        groups.append(pack)
+    return groups
+
+def parse_packed_response(response_text, expected):
+    """Split a packed response into single-section responses keyed by A.C. number.
     
-    # Fallback response if all attempts fail
-    print(f"❌ All attempts failed for A.C. {ac_number}, using fallback response")
-    return (
-        "Plagiarism Found: No\n"
-        "Plagiarism Score: 8%\n"
-        "Plagiarism Level: Low\n"
-        "Feedback: Content analysis completed successfully. The work demonstrates adequate understanding of key concepts and meets basic assessment criteria. The content shows appropriate academic structure and relevant subject knowledge with clear explanations."
+    Only blocks for expected A.C. numbers that carry a score are kept, so
+    anything the model skipped or mangled can be retried on its own.
+    """
+    blocks = {}
+    current_ac = None
+    for line in response_text.strip().split('\n'):
+        header = packed_header_pattern.match(line)
+        if header:
+            current_ac = header.group(1)
+            blocks[current_ac] = []
+        elif current_ac is not None:
+            blocks[current_ac].append(line)
+    
+    verdicts = {}
+    for ac_num, lines in blocks.items():
+        block = '\n'.join(lines).strip()
+        if ac_num in expected and 'Plagiarism Score:' in block:
+            verdicts[ac_num] = block
+    return verdicts
+
+def packed_plagiarism_check(group_sections, document_topic):
+    """Check several small sections in one request.
+    
+    Returns {ac_num: result} for the sections the model answered in the
+    expected format; callers check the rest one by one.
+    """
+    ac_numbers = list(group_sections)
+    sections_text = "\n\n".join(
+        f"### A.C. {ac_num}\n{content}" for ac_num, content in group_sections.items()
     )
+    use_json = verdict_format == "json"
+    if use_json:
+        user_prompt = (
+            f"Analyze each of the following {len(ac_numbers)} {document_topic} sections separately. "
+            f"Reply with ONLY one JSON object and no other text, mapping each section number "
+            f"to its verdict: {{\"{ac_numbers[0]}\": {verdict_schema(verdict_feedback)}, ...}}\n\n"
+            f"SECTIONS:\n{sections_text}"
+        )
+        max_tokens = (note_max_tokens[verdict_feedback] + 10) * len(ac_numbers)
+        kind = f"plagiarism-packed-json-{verdict_feedback}"
+    else:
+        user_prompt = (
+            f"Analyze each of the following {len(ac_numbers)} {document_topic} sections separately. "
+            f"For EACH section, respond with a block in EXACTLY this format, in the same order:\n\n"
+            f"A.C.: [section number]\n"
+            f"Plagiarism Found: [Yes/No]\n"
+            f"Plagiarism Score: [number]%\n"
+            f"Plagiarism Level: [Low/Medium/High]\n"
+            f"Feedback: [Feedback about content quality, structure, and understanding in 300-500 characters]\n\n"
+            f"SECTIONS:\n{sections_text}"
+        )
+        max_tokens = 250 * len(ac_numbers)
+        kind = "plagiarism-packed"
+    
+    cache = get_cache()
+    cache_key = make_cache_key(kind, sections_text, document_topic, get_backend().model, packed_prompt_version)
+    response_text = cache.get(cache_key, kind="plagiarism-packed") if cache else None
+    
+    if response_text is None:
+        label = f"A.C. {', '.join(ac_numbers)}"
+        try:
+            print(f"📤 Sending packed request for {label}...")
+            start_time = time.time()
+            response = complete_chat(
+                "You are an expert academic assessment assistant. Be concise and structured.",
+                user_prompt,
+                kind="packed",
+                temperature=0.5,
+                top_p=0.9,
+                max_tokens=max_tokens
+            )
+            print(f"✅ Received packed response for {label} in {time.time() - start_time:.2f} seconds")
+            response_text = response.strip()
+        except Exception as e:
+            print(f"❌ Packed request failed for {label}: {str(e)}")
+            return {}
+    
+    if use_json:
+        verdicts = parse_packed_verdicts(response_text, ac_numbers)
+    else:
+        verdicts = {
+            ac_num: parse_gpt_response(block)
+            for ac_num, block in parse_packed_response(response_text, ac_numbers).items()
+        }
+    if cache and len(verdicts) == len(ac_numbers):
+        cache.set(cache_key, response_text, kind="plagiarism-packed")
+    return verdicts
 
 # --- Generate AI-based tutor feedback ---
-def generate_tutor_feedback(ac_results, document_topic):
+def generate_tutor_feedback(ac_results, document_topic, fallback=True):
+    """Tutor feedback for the whole booklet.
+    
+    If the model fails, the canned fallback_tutor_feedback is returned, or
+    None with fallback=False so the caller can tell the two apart.
+    """
     # Prepare summary of results for GPT
     summary = "Assessment Criteria Summary:\n"
     for ac_num, data in ac_results.items():
-        summary += f"- A.C. {ac_num}: Plagiarism {data['plagiarism']}, Score {data['score']}%, Level {data['level']}\n"
+        summary += f"- A.C. {ac_num}: Plagiarism {data['plagiarism']}, Score {score_value(data['score'])}%, Level {data['level']}\n"
         summary += f"  Feedback: {data['feedback'][:150]}...\n"
 
     date_str = datetime.now().strftime("%d-%m-%Y")
@@ -263,17 +765,24 @@ def generate_tutor_feedback(ac_results, document_topic):
     )
 
     try:
-        print("📤 Generating tutor feedback with GPT...")
-        response = client.complete(
-            messages=[
-                SystemMessage("You are an experienced tutor providing academic feedback."),
-                UserMessage(prompt),
-            ],
-            temperature=0.4,
-            top_p=0.9,
-            model=model
-        )
-        feedback = response.choices[0].message.content.strip()
+        cache = get_cache()
+        cache_key = make_cache_key("feedback", summary, document_topic, get_backend().model, feedback_prompt_version)
+        feedback = cache.get(cache_key, kind="feedback") if cache else None
+        
+        if feedback is None:
+            print("📤 Generating tutor feedback with GPT...")
+            response = complete_chat(
+                "You are an experienced tutor providing academic feedback.",
+                prompt,
+                kind="feedback",
+                temperature=0.4,
+                top_p=0.9
+            )
+            feedback = response.strip()
+            if cache and feedback:
+                cache.set(cache_key, feedback, kind="feedback")
+        else:
+            print("💾 Using cached tutor feedback")
         
         # Ensure proper formatting
         if not feedback.startswith("First Marking:"):
@@ -284,251 +793,64 @@ def generate_tutor_feedback(ac_results, document_topic):
         return feedback
     except Exception as e:
         print(f"❌ Tutor feedback generation failed: {str(e)}")
-        return (
-            f"First Marking: {date_str}\n\n"
-            f"The learner has demonstrated comprehensive understanding of {document_topic} principles "
-            "across all assessment criteria. Their work shows strong theoretical knowledge effectively "
-            "applied to practical scenarios, with appropriate references to relevant frameworks. "
-            "The booklet provides insightful analysis of key concepts supported by concrete examples. "
-            "The work meets all assessment criteria with professionally presented content.\n\n"
-            "Action Point: This work booklet is Subject to IQA"
-        )
+        metrics.inc('plagiarism_fallbacks_total', kind="feedback")
+        return fallback_tutor_feedback(document_topic) if fallback else None
+
+def fallback_tutor_feedback(document_topic):
+    """Generic feedback used when the model cannot be reached"""
+    date_str = datetime.now().strftime("%d-%m-%Y")
+    return (
+        f"First Marking: {date_str}\n\n"
+        f"The learner has demonstrated comprehensive understanding of {document_topic} principles "
+        "across all assessment criteria. Their work shows strong theoretical knowledge effectively "
+        "applied to practical scenarios, with appropriate references to relevant frameworks. "
+        "The booklet provides insightful analysis of key concepts supported by concrete examples. "
+        "The work meets all assessment criteria with professionally presented content.\n\n"
+        "Action Point: This work booklet is Subject to IQA"
+    )
 
 # --- Final Report Generator ---
-def generate_report(ac_results, document_topic):
-    report_lines = []
-    report_lines.append(f"📘 **{document_topic} - Plagiarism Assessment Report**\n")
-    report_lines.append("| A.C No | Pass/Redo | Plagiarism Score | Feedback |\n|--------|------------|------------------|----------|")
-
-    # Create a complete sequence of A.C. sections based on what we found
-    # Find the range of sections we should have
-    ac_numbers = [float(ac) for ac in ac_results.keys()]
-    if not ac_numbers:
-        return "\n".join(report_lines)
-    
-    # Group by major number and find complete ranges
-    major_numbers = {}
-    for ac_num in ac_results.keys():
-        parts = ac_num.split('.')
-        major = int(parts[0])
-        minor = int(parts[1])
-        if major not in major_numbers:
-            major_numbers[major] = []
-        major_numbers[major].append(minor)
-    
-    # Generate complete sequence for each major number
-    complete_sequence = []
-    for major in sorted(major_numbers.keys()):
-        minors = major_numbers[major]
-        min_minor = min(minors)
-        max_minor = max(minors)
-        # Create complete sequence from min to max
-        for minor in range(min_minor, max_minor + 1):
-            complete_sequence.append(f"{major}.{minor}")
-    
-    # Process each A.C. section in perfect order
-    for ac_num in complete_sequence:
-        if ac_num in ac_results:
-            data = ac_results[ac_num]
-            # Ensure all fields have values
-            plagiarism = data.get("plagiarism", "No")
-            score = data.get("score", "0%")
-            level = data.get("level", "Low")
-            feedback = data.get("feedback", "Analysis completed successfully.")
-            
-            # Clean score format - ensure it has %
-            if not score.endswith('%'):
-                score_num = ''.join(filter(str.isdigit, str(score)))
-                score = f"{score_num}%" if score_num else "0%"
-            
-            # Determine pass/redo decision
-            decision = "Pass" if plagiarism.lower() == "no" or level.lower() in ["low", "medium"] else "Redo"
-            
-            # Ensure feedback is not empty
-            if not feedback or len(feedback.strip()) < 10:
-                feedback = "Content demonstrates understanding of key concepts and meets assessment criteria."
-        else:
-            # Missing section - add placeholder
-            decision = "Pass"
-            score = "0%"
-            feedback = f"A.C. {ac_num} section was not found in the document but was expected based on the sequence. Please verify this section exists in your original document."
-        
-        report_lines.append(
-            f"| {ac_num} | {decision} | {score} | {feedback} |"
-        )
+def generate_report(ac_results, document_topic, tutor_feedback=None):
+    """Markdown report for ac_results; see build_report for the structured form"""
+    report = build_report(ac_results, document_topic)
+    if ac_results:
+        # Generate AI-based tutor feedback unless the caller already has it
+        if tutor_feedback is None:
+            tutor_feedback = generate_tutor_feedback(ac_results, document_topic)
+        report.tutor_feedback = tutor_feedback
+    return report.to_markdown()
 
-    # Generate AI-based tutor feedback
-    tutor_feedback = generate_tutor_feedback(ac_results, document_topic)
-    report_lines.append("\n### 📑 Tutor Feedback & Marking\n")
-    report_lines.append(tutor_feedback)
-    
-    return "\n".join(report_lines)
-
-# --- Save Report as PDF with updated formatting ---
-def save_report_to_pdf(report_text, file_path, document_topic):
-    # Create PDF document in landscape mode
-    doc = SimpleDocTemplate(
-        file_path,
-        pagesize=landscape(letter),
-        rightMargin=0.5*inch,
-        leftMargin=0.5*inch,
-        topMargin=0.5*inch,
-        bottomMargin=0.5*inch
-    )
-    
-    styles = getSampleStyleSheet()
-    elements = []
-    
-    # Custom styles
-    title_style = ParagraphStyle(
-        'Title',
-        parent=styles['Heading1'],
-        fontName='Helvetica-Bold',
-        fontSize=20,
-        alignment=1,
-        spaceAfter=0.3*inch,
-        textColor=colors.HexColor("#2E5984")
-    )
-    
-    section_style = ParagraphStyle(
-        'Section',
-        parent=styles['Heading2'],
-        fontName='Helvetica-Bold',
-        fontSize=16,
-        spaceBefore=0.2*inch,
-        spaceAfter=0.1*inch,
-        textColor=colors.HexColor("#1E3A5F")
-    )
-    
-    body_style = ParagraphStyle(
-        'Body',
-        parent=styles['BodyText'],
-        fontName='Helvetica',
-        fontSize=10,
-        leading=14,
-        spaceAfter=0.1*inch
-    )
-    
-    table_header_style = ParagraphStyle(
-        'TableHeader',
-        parent=styles['BodyText'],
-        fontName='Helvetica-Bold',
-        fontSize=12,
-        alignment=1,
-        textColor=colors.white
-    )
-    
-    table_cell_style = ParagraphStyle(
-        'TableCell',
-        parent=styles['BodyText'],
-        fontName='Helvetica',
-        fontSize=9,
-        leading=11,
-        wordWrap='LTR',
-        splitLongWords=False,
-        spaceBefore=0.05*inch,
-        spaceAfter=0.05*inch
-    )
-    
-    # Split report into sections
-    report_parts = report_text.split("\n\n")
-    
-    # Add title
-    title = report_parts[0].replace("📘", "").replace("**", "")
-    elements.append(Paragraph(title, title_style))
-    
-    # Create table data
-    table_data = []
-    table_lines = report_parts[1].split('\n')
-    
-    # Process header row
-    header_row = []
-    for cell in table_lines[0].split('|')[1:-1]:
-        header_row.append(Paragraph(cell.strip(), table_header_style))
-    table_data.append(header_row)
-    
-    # Process data rows
-    for line in table_lines[2:]:
-        if '|' not in line:
-            continue
-            
-        row = []
-        cells = line.split('|')[1:-1]
-        
-        for i, cell in enumerate(cells):
-            cell_text = cell.strip()
-            row.append(Paragraph(cell_text, table_cell_style))
-        table_data.append(row)
-    
-    # Create table with optimized column widths for landscape
-    col_widths = [0.7*inch, 0.9*inch, 1.1*inch, 5.3*inch]
-    
-    table = Table(table_data, colWidths=col_widths, repeatRows=1, splitByRow=True)
-    table.setStyle(TableStyle([
-        # Header styling
-        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#4A6FA5")),
-        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
-        ('ALIGN', (0,0), (-1,0), 'CENTER'),
-        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
-        ('FONT', (0,0), (-1,0), 'Helvetica-Bold', 12),
-        
-        # Cell styling
-        ('BACKGROUND', (0,1), (-1,-1), colors.HexColor("#F0F8FF")),
-        ('GRID', (0,0), (-1,-1), 1, colors.HexColor("#B0C4DE")),
-        ('FONT', (0,1), (-1,-1), 'Helvetica', 9),
-        ('ALIGN', (0,0), (2,-1), 'CENTER'),
-        ('ALIGN', (3,0), (3,-1), 'LEFT'),
-        ('LEFTPADDING', (0,0), (-1,-1), 8),
-        ('RIGHTPADDING', (0,0), (-1,-1), 8),
-        ('TOPPADDING', (0,0), (-1,-1), 8),
-        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
-        ('WORDWRAP', (0,0), (-1,-1), 'WORD'),
-        ('VALIGN', (0,0), (-1,-1), 'TOP'),
-    ]))
-    
-    elements.append(table)
-    
-    # Check if we need a new page for tutor feedback
-    # Only add page break if the table is too long
-    elements.append(Spacer(1, 0.5*inch))
-    
-    # Tutor feedback heading - use conditional page break
-    tutor_heading_style = ParagraphStyle(
-        'TutorHeading',
-        parent=styles['Heading2'],
-        fontName='Helvetica-Bold',
-        fontSize=16,
-        alignment=1,
-        spaceBefore=0.3*inch,
-        spaceAfter=0.2*inch,
-        textColor=colors.HexColor("#2E5984"),
-        keepWithNext=True
-    )
+# --- Save Report as PDF ---
+def save_report_to_pdf(report, file_path, document_topic=None, table_elements=None):
+    """Write the report as a landscape PDF.
     
-    elements.append(Paragraph("Tutor Feedback & Marking", tutor_heading_style))
+    report is a Report, or the Markdown text from generate_report, which is
+    parsed back into one. table_elements may come from the renderer ahead
+    of time, so the table is laid out while the feedback is still pending.
+    """
+    from report_renderer import get_renderer
     
-    # Process tutor feedback content and keep it together
-    tutor_content = "\n\n".join(report_parts[3:])
-    tutor_elements = []
-    
-    for line in tutor_content.split('\n'):
-        if line.strip():
-            tutor_elements.append(Paragraph(line.strip(), body_style))
-    
-    # Keep tutor feedback together on the same page
-    if tutor_elements:
-        elements.append(KeepTogether(tutor_elements))
-    
-    # Build PDF
-    doc.build(elements)
+    if not isinstance(report, Report):
+        report = Report.from_markdown(report, document_topic)
+    get_renderer().render(report, file_path, table_elements=table_elements)
 
 # --- Parse GPT response ---
 def parse_gpt_response(response_text):
-    """Parse the GPT response to extract structured data"""
+    """Parse a JSON or labelled-text verdict into plagiarism, numeric score, level and feedback"""
+    if response_text.lstrip().startswith('{'):
+        try:
+            result = parse_verdict_json(response_text)
+        except VerdictError:
+            result = None
+        if result is not None:
+            if len(result['feedback']) < 10:
+                result['feedback'] = 'Content analysis completed. The work demonstrates understanding of key concepts.'
+            return result
+    
     lines = response_text.strip().split('\n')
     result = {
         'plagiarism': 'No',
-        'score': '0%',
+        'score': 0,
         'level': 'Low',
         'feedback': 'Analysis completed successfully.'
     }
@@ -543,13 +865,7 @@ def parse_gpt_response(response_text):
             plagiarism_value = line.split(':', 1)[1].strip()
             result['plagiarism'] = plagiarism_value if plagiarism_value else 'No'
         elif line.startswith('Plagiarism Score:'):
-            score_text = line.split(':', 1)[1].strip()
-            # Extract number and ensure % format
-            score_num = ''.join(filter(str.isdigit, score_text))
-            if score_num:
-                result['score'] = f"{score_num}%"
-            else:
-                result['score'] = '0%'
+            result['score'] = score_value(line.split(':', 1)[1])
         elif line.startswith('Plagiarism Level:'):
             level_value = line.split(':', 1)[1].strip()
             result['level'] = level_value if level_value else 'Low'
@@ -572,53 +888,59 @@ def parse_gpt_response(response_text):
     
     return result
 
-# --- Main processing function ---
-def process_document(file_path, file_type):
-    """Process document and generate plagiarism report"""
-    
-    # Extract A.C. sections based on file type
-    if file_type == "docx":
-        ac_sections = extract_ac_sections_from_docx(file_path)
-    else:  # pdf
-        ac_sections = extract_ac_sections_from_pdf(file_path)
-    
-    if not ac_sections:
-        raise ValueError("No A.C. sections found in the document")
-    
-    # Sort A.C. sections by number for consistent processing
-    ac_sections = dict(sorted(ac_sections.items(), key=lambda x: float(x[0])))
-    
-    print(f"📊 Processing {len(ac_sections)} A.C. sections in order: {list(ac_sections.keys())}")
-    
-    # Detect document topic
-    sample_content = next(iter(ac_sections.values()))
-    document_topic = detect_document_topic(sample_content)
+# --- Analyze a single A.C. section ---
+def analyze_ac_section(ac_num, content, document_topic):
+    """Check one A.C. section and return its parsed result"""
+    # Ensure content is not empty
+    if not content.strip():
+        print(f"⚠️ A.C. {ac_num} has no content, adding placeholder")
+        return {
+            'plagiarism': 'No',
+            'score': 0,
+            'level': 'Low',
+            'feedback': f'A.C. {ac_num} section was found but contained no analyzable content.'
+        }
     
-    # Process each A.C. section
-    ac_results = {}
-    for ac_num, content in ac_sections.items():
-        print(f"🔄 Processing A.C. {ac_num}...")
-        
-        # Ensure content is not empty
-        if not content.strip():
-            print(f"⚠️ A.C. {ac_num} has no content, adding placeholder")
-            ac_results[ac_num] = {
-                'plagiarism': 'No',
-                'score': '0%',
-                'level': 'Low',
-                'feedback': f'A.C. {ac_num} section was found but contained no analyzable content.'
-            }
-            continue
-            
-        gpt_response = gpt_plagiarism_check(ac_num, content, document_topic)
-        parsed_result = parse_gpt_response(gpt_response)
-        ac_results[ac_num] = parsed_result
-        print(f"✅ A.C. {ac_num} processed - Score: {parsed_result['score']}")
+    gpt_response = gpt_plagiarism_check(ac_num, content, document_topic)
+    result = parse_gpt_response(gpt_response)
+    if gpt_response == fallback_plagiarism_response:
+        # A placeholder, not a verdict: never reused on resubmission
+        result['fallback'] = True
+    return result
+
+# --- Analyze a group of A.C. sections packed into one request ---
+def analyze_ac_group(group_sections, document_topic):
+    """Check a pack of sections together, falling back to single-section calls"""
+    if len(group_sections) == 1:
+        ac_num, content = next(iter(group_sections.items()))
+        return {ac_num: analyze_ac_section(ac_num, content, document_topic)}
     
-    # *** CORRECTED MISSING SECTION DETECTION LOGIC ***
+    verdicts = packed_plagiarism_check(group_sections, document_topic)
+    results = {}
+    for ac_num, content in group_sections.items():
+        if ac_num in verdicts:
+            results[ac_num] = verdicts[ac_num]
+        else:
+            print(f"⚠️ Packed response missing A.C. {ac_num}, checking it on its own")
+            results[ac_num] = analyze_ac_section(ac_num, content, document_topic)
+    return results
+
+def failed_section_result(ac_num):
+    """Result recorded for a section whose analysis raised"""
+    return {
+        'plagiarism': 'No',
+        'score': 10,
+        'level': 'Low',
+        'feedback': f'Processing failed for A.C. {ac_num} due to technical issues. Manual review recommended.',
+        'fallback': True
+    }
+
+# --- A.C. sequence helpers ---
+def expected_ac_sequence(ac_numbers):
+    """Return every A.C. number from the first to the last minor number of each major series"""
     # Group sections by major number (1.x, 2.x, 3.x, etc.)
     series_sections = {}
-    for section_num in ac_results.keys():
+    for section_num in ac_numbers:
         parts = section_num.split('.')
         if len(parts) == 2:
             major = int(parts[0])
@@ -627,33 +949,598 @@ def process_document(file_path, file_type):
                 series_sections[major] = []
             series_sections[major].append(minor)
     
-    # Find missing sections within each series
-    missing_sections = []
-    for major, minors in series_sections.items():
-        minors.sort()
-        # Check for gaps in the sequence from first to last
+    complete_sequence = []
+    for major in sorted(series_sections.keys()):
+        minors = sorted(series_sections[major])
         # Example: if we have [1, 2, 4, 5] then 3 is missing
-        for i in range(minors[0], minors[-1] + 1):
-            if i not in minors:
-                expected_section = f"{major}.{i}"
-                missing_sections.append(expected_section)
-    
+        for minor in range(minors[0], minors[-1] + 1):
+            complete_sequence.append(f"{major}.{minor}")
+    return complete_sequence
+
+def find_missing_sections(ac_numbers):
+    """A.C. numbers missing from gaps inside each major series"""
+    present = set(ac_numbers)
+    return [ac_num for ac_num in expected_ac_sequence(ac_numbers) if ac_num not in present]
+
+def fill_missing_sections(ac_results):
+    """Add placeholder results for missing sections and return results in A.C. order"""
+    missing_sections = find_missing_sections(ac_results.keys())
     if missing_sections:
         print(f"⚠️ Missing A.C. sections detected: {missing_sections}")
         for missing_ac in missing_sections:
             ac_results[missing_ac] = {
                 'plagiarism': 'No',
-                'score': '0%',
+                'score': 0,
                 'level': 'Low',
                 'feedback': f'A.C. {missing_ac} section was not found in the document or could not be extracted. Please verify this section exists in your original document.'
             }
     
     # Sort results for consistent output
-    ac_results = dict(sorted(ac_results.items(), key=lambda x: float(x[0])))
+    return dict(sorted(ac_results.items(), key=lambda x: float(x[0])))
+
+# --- Stage dependency graph ---
+class StageGraph:
+    """Run named stages on a thread pool, each as soon as its dependencies are done.
     
-    print(f"📈 Final A.C. sections in report: {list(ac_results.keys())}")
+    A dependency is either another stage or a milestone: a point that a
+    running stage reports with context['mark'](name) before it finishes,
+    such as "first section extracted". A stage's milestones also count as
+    reached once it finishes. End-to-end time is therefore set by the
+    critical path through the graph rather than the sum of all stages.
+    """
     
-    # Generate report
-    report_text = generate_report(ac_results, document_topic)
+    def __init__(self):
+        self.stages = {}
+        self.milestones = {}
+    
+    def add(self, name, func, deps=(), milestones=()):
+        """Register func(context) to run once every name in deps is done"""
+        self.stages[name] = (func, tuple(deps))
+        for milestone in milestones:
+            self.milestones[milestone] = name
+    
+    def run(self, context, poll=None, poll_interval=0.05):
+        """Run every stage and return {name: (start, end)} offsets in seconds.
+        
+        poll() is called on the calling thread between stage completions.
+        The first stage error stops new stages from starting and is raised
+        once the running ones have finished.
+        """
+        for name, (_, deps) in self.stages.items():
+            unknown = [dep for dep in deps if dep not in self.stages and dep not in self.milestones]
+            if unknown:
+                raise ValueError(f"Stage {name} depends on unknown stages {unknown}")
+        
+        origin = time.perf_counter()
+        times = {}
+        reached = set()
+        lock = threading.Lock()
+        wake = threading.Event()
+        
+        def mark(milestone):
+            with lock:
+                if milestone not in reached:
+                    reached.add(milestone)
+                    times[milestone] = (time.perf_counter() - origin,) * 2
+            wake.set()
+        
+        def run_stage(name, func):
+            start = time.perf_counter() - origin
+            try:
+                func(context)
+            finally:
+                times[name] = (start, time.perf_counter() - origin)
+        
+        context['mark'] = mark
+        pending = dict(self.stages)
+        running = {}
+        error = None
+        with ThreadPoolExecutor(max_workers=max(1, len(self.stages)), thread_name_prefix="stage") as executor:
+            while True:
+                wake.clear()
+                for future in [f for f in running if f.done()]:
+                    name = running.pop(future)
+                    if future.exception() is not None:
+                        error = error or future.exception()
+                        continue
+                    with lock:
+                        reached.add(name)
+                    for milestone, owner in self.milestones.items():
+                        if owner == name:
+                            mark(milestone)
+                
+                if error is None:
+                    with lock:
+                        ready = [name for name, (_, deps) in pending.items() if all(d in reached for d in deps)]
+                    for name in ready:
+                        func, _ = pending.pop(name)
+                        future = executor.submit(run_stage, name, func)
+                        future.add_done_callback(lambda _: wake.set())
+                        running[future] = name
+                
+                if poll:
+                    poll()
+                if not running:
+                    break
+                wake.wait(poll_interval)
+        
+        if error is not None:
+            raise error
+        if pending:
+            raise RuntimeError(f"Stages never became ready: {sorted(pending)}")
+        return times
     
-    return report_text, document_topic, ac_results
+    def critical_path(self, times):
+        """Stages (and milestones) that determined the finish time, in order"""
+        finished = [name for name in self.stages if name in times]
+        if not finished:
+            return []
+        path = []
+        node = max(finished, key=lambda name: times[name][1])
+        while node is not None:
+            path.append(node)
+            if node in self.milestones:
+                # A milestone is on the path through the stage that reached it
+                deps = self.stages[self.milestones[node]][1]
+            else:
+                deps = self.stages[node][1]
+            deps = [dep for dep in deps if dep in times]
+            node = max(deps, key=lambda dep: times[dep][1]) if deps else None
+        return path[::-1]
+
+# --- Processing pipeline shared by the app, batch and service entry points ---
+class PlagiarismPipeline:
+    """Run every processing stage for one document and report progress as events.
+    
+    Stages form a dependency graph and overlap where they can:
+    
+    - extract streams sections out of the document; section checks start
+      on the first ones while later pages are still being parsed
+    - history loads the learner's previous submission, if any
+    - topic runs as soon as the first section is out (after history)
+    - overlap scores the sections against earlier submissions
+    - sections analyzes each section as it arrives (after topic)
+    - missing merges overlap results and fills gaps in the A.C. sequence
+    - details asks for long feedback on the sections selected by
+      detailed_feedback, when verdicts carry only a short note
+    - table lays out the results table while feedback asks for the tutor
+      feedback; report joins both, and pdf writes the file when a
+      pdf_path is given
+    
+    Subscribers are called as callback(event, data) on the thread that
+    called run(), whichever stage produced the event:
+    
+    - stage_started / stage_finished: {'stage', 'seconds'}
+    - sections_extracted: {'ac_sections', 'expected_sequence', 'missing_sections'}
+    - history_loaded: {'reused', 'changed'}
+    - topic_detected: {'document_topic'}
+    - section_done: {'ac_num', 'result', 'completed', 'total', 'reused'}
+    - finished: {'context'}
+    
+    With a learner_id and booklet_id, a resubmission only re-analyzes the
+    sections whose normalized text changed; the others keep their stored
+    verdict, and re-analyzed ones are marked 're_evaluated'.
+    
+    Hooks registered with add_hook(stage, hook) are called as hook(context)
+    after that stage and may change the context in place. A pipeline runs
+    one document at a time; use one pipeline per concurrent document.
+    """
+    
+    stages = ["extract", "history", "topic", "overlap", "sections", "missing", "details",
+              "table", "feedback", "report", "pdf"]
+    
+    def __init__(self, max_workers=None, corpus=None, pack=None, grammar=None, history=None,
+                 detailed_feedback=None):
+        self.max_workers = max_workers
+        self.corpus = corpus
+        self.pack = pack
+        self.grammar = grammar
+        self.history = history
+        self.detailed_feedback = detailed_feedback
+        self.subscribers = []
+        self.hooks = {stage: [] for stage in self.stages}
+        self._caller = None
+        self._events = queue.SimpleQueue()
+    
+    def subscribe(self, callback):
+        self.subscribers.append(callback)
+        return callback
+    
+    def add_hook(self, stage, hook):
+        if stage not in self.hooks:
+            raise ValueError(f"Unknown pipeline stage: {stage}")
+        self.hooks[stage].append(hook)
+        return hook
+    
+    def emit(self, event, **data):
+        if threading.get_ident() != self._caller:
+            # Delivered by _deliver_events on the thread that called run()
+            self._events.put((event, data))
+            return
+        for callback in self.subscribers:
+            callback(event, data)
+    
+    def _deliver_events(self):
+        while True:
+            try:
+                event, data = self._events.get_nowait()
+            except queue.Empty:
+                return
+            for callback in self.subscribers:
+                callback(event, data)
+    
+    def _stage(self, stage, func):
+        """Wrap a stage with its events, hooks and timing"""
+        def run_stage(context):
+            self.emit("stage_started", stage=stage)
+            start = time.perf_counter()
+            func(context)
+            for hook in self.hooks[stage]:
+                hook(context)
+            seconds = time.perf_counter() - start
+            context['timings'][stage] = seconds
+            metrics.observe('plagiarism_stage_seconds', seconds, stage=stage)
+            self.emit("stage_finished", stage=stage, seconds=seconds)
+        return run_stage
+    
+    def _get_history(self, context):
+        if context['learner_id'] is None or context['booklet_id'] is None:
+            return None
+        return self.history if self.history is not None else get_history()
+    
+    # Stage implementations
+    def _iter_source_sections(self, context):
+        if context['ac_sections'] is not None:
+            return iter(sorted(context['ac_sections'].items(), key=lambda x: float(x[0])))
+        kwargs = {'grammar': self.grammar} if self.grammar else {}
+        if context['file_type'] == "docx":
+            return iter_ac_sections_from_docx(context['source'], **kwargs)
+        return iter_ac_sections_from_pdf(context['source'], **kwargs)  # pdf
+    
+    def _extract(self, context):
+        stream = context['section_stream']
+        ac_sections = {}
+        try:
+            for ac_num, content in self._iter_source_sections(context):
+                # A repeated A.C. number replaces the earlier section
+                ac_sections[ac_num] = content
+                if 'first_section' not in context:
+                    context['first_section'] = content
+                    context['mark']("first_section")
+                stream.put(("section", ac_num, content))
+            if not ac_sections:
+                raise ValueError("No A.C. sections found in the document")
+            # Sort A.C. sections by number for consistent processing
+            context['ac_sections'] = dict(sorted(ac_sections.items(), key=lambda x: float(x[0])))
+            context['extracted'] = True
+        finally:
+            stream.put(("end",))
+        
+        ac_numbers = list(context['ac_sections'])
+        print(f"📊 Processing {len(ac_numbers)} A.C. sections in order: {ac_numbers}")
+        self.emit(
+            "sections_extracted",
+            ac_sections=context['ac_sections'],
+            expected_sequence=expected_ac_sequence(ac_numbers),
+            missing_sections=find_missing_sections(ac_numbers)
+        )
+    
+    def _history(self, context):
+        history = self._get_history(context)
+        context['prior'] = history.load(context['learner_id'], context['booklet_id']) if history else None
+    
+    def _topic(self, context):
+        prior = context['prior']
+        if prior and prior['document_topic']:
+            # Keep the topic the stored verdicts were made under
+            context['document_topic'] = prior['document_topic']
+        else:
+            context['document_topic'] = detect_document_topic(context['first_section'])
+        self.emit("topic_detected", document_topic=context['document_topic'])
+    
+    def _overlap(self, context):
+        # Local cross-submission check, no model calls involved
+        corpus = self.corpus if self.corpus is not None else get_index()
+        context['overlap_results'] = {}
+        if corpus is not None:
+            context['overlap_results'] = find_cross_submission_matches(
+                context['ac_sections'], corpus, context['submission_id']
+            )
+    
+    def _sections(self, context):
+        stream = context['section_stream']
+        prior = context['prior']
+        stored = prior['sections'] if prior else {}
+        pack = packed_analysis if self.pack is None else self.pack
+        max_workers = self.max_workers or max_concurrency
+        
+        fingerprints = context['fingerprints']
+        results = {}
+        reused = []
+        seen = {}
+        outstanding = {}
+        extracting = True
+        packed_sections = {}
+        
+        def finish(ac_num, result, was_reused, source="model"):
+            results[ac_num] = result
+            metrics.inc('plagiarism_sections_total', source="reused" if was_reused else source)
+            if was_reused:
+                reused.append(ac_num)
+            elif prior is not None:
+                result['re_evaluated'] = True
+            print(f"✅ A.C. {ac_num} processed - Score: {result['score']}% ({len(results)}/{len(seen)})")
+            self.emit("section_done", ac_num=ac_num, result=result, completed=len(results),
+                      total=len(seen), reused=was_reused)
+        
+        with ThreadPoolExecutor(max_workers=max(1, max_workers), thread_name_prefix="section") as executor:
+            while extracting or outstanding:
+                item = stream.get()
+                if item[0] == "end":
+                    extracting = False
+                    if packed_sections:
+                        # Packing needs every section up front to fill each request
+                        packed_sections = dict(sorted(packed_sections.items(), key=lambda x: float(x[0])))
+                        for group in pack_sections(packed_sections):
+                            future = executor.submit(
+                                analyze_ac_group, {ac: packed_sections[ac] for ac in group}, context['document_topic']
+                            )
+                            future.add_done_callback(lambda f: stream.put(("done", f)))
+                            outstanding[future] = [(ac, seen[ac]) for ac in group]
+                    continue
+                
+                if item[0] == "done":
+                    future = item[1]
+                    source = "model"
+                    try:
+                        group_results = future.result()
+                    except Exception as e:
+                        names = [ac for ac, _ in outstanding[future]]
+                        print(f"❌ A.C. {', '.join(names)} processing failed: {str(e)}")
+                        group_results = {ac: failed_section_result(ac) for ac in names}
+                        source = "failed"
+                    for ac_num, content in outstanding.pop(future):
+                        # Skip results for a section that was replaced meanwhile
+                        if seen.get(ac_num) is content:
+                            finish(ac_num, group_results[ac_num], False, source)
+                    continue
+                
+                _, ac_num, content = item
+                seen[ac_num] = content
+                results.pop(ac_num, None)
+                fingerprints[ac_num] = section_fingerprint(content)
+                previous = stored.get(ac_num)
+                if (previous and previous['fingerprint'] == fingerprints[ac_num]
+                        and not previous['result'].get('fallback')):
+                    result = dict(previous['result'])
+                    # Verdicts stored before scores were numbers hold "NN%"
+                    result['score'] = score_value(result['score'])
+                    finish(ac_num, result, True)
+                elif pack:
+                    packed_sections[ac_num] = content
+                else:
+                    future = executor.submit(analyze_ac_group, {ac_num: content}, context['document_topic'])
+                    future.add_done_callback(lambda f: stream.put(("done", f)))
+                    outstanding[future] = [(ac_num, content)]
+        
+        if not context.get('extracted'):
+            # Extraction failed half way; its error is the one raised
+            return
+        context['reused_results'] = {ac_num: results[ac_num] for ac_num in reused}
+        context['ac_results'] = {ac_num: results[ac_num] for ac_num in context['ac_sections']}
+        if prior is not None:
+            changed = [ac_num for ac_num in context['ac_sections'] if ac_num not in context['reused_results']]
+            print(f"♻️ Resubmission: reused {len(reused)} A.C. verdicts, re-analyzed {changed}")
+            self.emit("history_loaded", reused=list(context['reused_results']), changed=changed)
+    
+    def _missing(self, context):
+        for ac_num, overlap in context['overlap_results'].items():
+            context['ac_results'][ac_num].update(overlap)
+        context['ac_results'] = fill_missing_sections(context['ac_results'])
+        print(f"📈 Final A.C. sections in report: {list(context['ac_results'].keys())}")
+    
+    def _details(self, context):
+        selection = detailed_feedback if self.detailed_feedback is None else self.detailed_feedback
+        if selection == "none" or verdict_format != "json" or verdict_feedback == "full":
+            # The verdicts already carry the long feedback
+            return
+        reused = context['reused_results']
+        wanted = [
+            ac_num for ac_num in context['ac_sections']
+            if ac_num not in reused
+            and not context['ac_results'][ac_num].get('fallback')
+            and (selection == "all" or context['ac_results'][ac_num]['plagiarism'] == 'Yes')
+        ]
+        if not wanted:
+            return
+        
+        def detail(ac_num):
+            result = context['ac_results'][ac_num]
+            try:
+                feedback = generate_section_feedback(
+                    ac_num, context['ac_sections'][ac_num], context['document_topic'], result
+                )
+            except Exception as e:
+                # The short note stays
+                print(f"⚠️ Detailed feedback for A.C. {ac_num} failed: {str(e)}")
+                return
+            if feedback:
+                result['feedback'] = feedback
+        
+        max_workers = max(1, min(self.max_workers or max_concurrency, len(wanted)))
+        with ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="details") as executor:
+            list(executor.map(detail, wanted))
+    
+    def _table(self, context):
+        context['report'] = build_report(context['ac_results'], context['document_topic'])
+        if context['pdf_path']:
+            from report_renderer import get_renderer
+            context['pdf_table_elements'] = get_renderer().table_elements(context['report'])
+    
+    def _feedback(self, context):
+        prior = context['prior']
+        unchanged = (
+            prior is not None
+            and len(context['reused_results']) == len(context['ac_sections']) == len(prior['sections'])
+        )
+        if unchanged and prior['tutor_feedback']:
+            print("♻️ Booklet unchanged, reusing tutor feedback")
+            context['tutor_feedback'] = prior['tutor_feedback']
+        else:
+            feedback = generate_tutor_feedback(context['ac_results'], context['document_topic'], fallback=False)
+            context['tutor_feedback_fallback'] = feedback is None
+            context['tutor_feedback'] = feedback or fallback_tutor_feedback(context['document_topic'])
+    
+    def _report(self, context):
+        context['report'].tutor_feedback = context['tutor_feedback']
+        context['report_text'] = context['report'].to_markdown()
+        
+        history = self._get_history(context)
+        if history is not None:
+            # Placeholders from failed model calls are left out, so the next
+            # submission checks those sections (and writes the feedback) again
+            history.save(
+                context['learner_id'],
+                context['booklet_id'],
+                context['document_topic'],
+                context['fingerprints'],
+                {
+                    ac_num: {key: value for key, value in result.items() if key != 're_evaluated'}
+                    for ac_num, result in context['ac_results'].items()
+                    if not result.get('fallback')
+                },
+                None if context.get('tutor_feedback_fallback') else context['tutor_feedback']
+            )
+    
+    def _pdf(self, context):
+        save_report_to_pdf(context['report'], context['pdf_path'], table_elements=context.get('pdf_table_elements'))
+    
+    def build_graph(self, pdf=True):
+        """The stage graph for one run; pdf=False leaves out the PDF stage"""
+        graph = StageGraph()
+        graph.add("extract", self._stage("extract", self._extract), milestones=["first_section"])
+        graph.add("history", self._stage("history", self._history))
+        graph.add("topic", self._stage("topic", self._topic), deps=["first_section", "history"])
+        graph.add("overlap", self._stage("overlap", self._overlap), deps=["extract"])
+        graph.add("sections", self._stage("sections", self._sections), deps=["topic"])
+        graph.add("missing", self._stage("missing", self._missing), deps=["sections", "overlap"])
+        graph.add("details", self._stage("details", self._details), deps=["missing"])
+        graph.add("table", self._stage("table", self._table), deps=["details"])
+        graph.add("feedback", self._stage("feedback", self._feedback), deps=["details"])
+        graph.add("report", self._stage("report", self._report), deps=["table", "feedback"])
+        if pdf:
+            graph.add("pdf", self._stage("pdf", self._pdf), deps=["report"])
+        return graph
+    
+    def run(self, source=None, file_type=None, ac_sections=None, submission_id=None, pdf_path=None,
+            learner_id=None, booklet_id=None):
+        """Process a document (or already extracted sections) and return the run context.
+        
+        source is a path, a bytes-like object (such as a memoryview over an
+        upload) or a binary file object; file_type says how to read it.
+        
+        The context holds ac_sections, document_topic, ac_results, report
+        (a Report), report_text, tutor_feedback, pdf_path, per-stage timings in seconds,
+        stage_times as (start, end) offsets and the critical_path.
+        """
+        if submission_id is None:
+            submission_id = default_submission_id(source, learner_id, booklet_id)
+        
+        context = {
+            'source': source,
+            'file_type': file_type,
+            'ac_sections': ac_sections,
+            'submission_id': submission_id,
+            'pdf_path': pdf_path,
+            'learner_id': learner_id,
+            'booklet_id': booklet_id,
+            'section_stream': queue.SimpleQueue(),
+            'fingerprints': {},
+            'timings': {}
+        }
+        if ac_sections is not None:
+            # Streamed from the dict, so the sections are assembled again by extract
+            context['ac_sections'] = dict(ac_sections)
+        start = time.perf_counter()
+        
+        self._caller = threading.get_ident()
+        graph = self.build_graph(pdf=bool(pdf_path))
+        try:
+            context['stage_times'] = graph.run(context, poll=self._deliver_events)
+        except Exception:
+            metrics.inc('plagiarism_documents_total', outcome="failed")
+            raise
+        finally:
+            self._deliver_events()
+            self._caller = None
+        context['critical_path'] = graph.critical_path(context['stage_times'])
+        context['timings']['total'] = time.perf_counter() - start
+        metrics.inc('plagiarism_documents_total', outcome="ok")
+        metrics.observe('plagiarism_document_seconds', context['timings']['total'])
+        print(f"⏱️ Critical path: {' → '.join(context['critical_path'])} ({context['timings']['total']:.2f}s)")
+        
+        self.emit("finished", context=context)
+        return context
+
+def default_submission_id(source=None, learner_id=None, booklet_id=None):
+    """Overlap-index id for a run whose caller gave none.
+    
+    A learner's resubmission of a booklet replaces their earlier entry.
+    Every other run is unique: never derived from the content (a verbatim
+    copy must not exclude, then replace, the booklet it copies) nor from a
+    file name (unrelated uploads often share one). A path only labels the
+    id, so matches say which file they came from.
+    """
+    import uuid
+    
+    if learner_id is not None and booklet_id is not None:
+        return f"{learner_id}/{booklet_id}"
+    if isinstance(source, (str, os.PathLike)):
+        return f"{os.path.realpath(source)}#{uuid.uuid4().hex}"
+    return uuid.uuid4().hex
+
+# --- Main processing function ---
+def process_document(file_path, file_type, max_workers=None, progress_callback=None,
+                     corpus=None, submission_id=None, pack=None, learner_id=None, booklet_id=None):
+    """Process document and generate plagiarism report.
+    
+    When a SubmissionCorpus or LSHIndex is given (or PLAGIARISM_INDEX_PATH
+    is set), every A.C. result also carries the local shingle overlap with
+    prior submissions ('overlap', 'matches'). With learner_id and booklet_id
+    only sections changed since that learner's last submission are re-analyzed.
+    """
+    pipeline = PlagiarismPipeline(max_workers=max_workers, corpus=corpus, pack=pack)
+    if progress_callback:
+        pipeline.subscribe(_section_progress_adapter(progress_callback))
+    context = pipeline.run(file_path, file_type, submission_id=submission_id,
+                           learner_id=learner_id, booklet_id=booklet_id)
+    return context['report_text'], context['document_topic'], context['ac_results']
+
+# --- Extract A.C. sections for any supported file type ---
+def extract_ac_sections(source, file_type):
+    """Extract A.C. sections from a DOCX or PDF file, given as a path, bytes-like object or file object"""
+    if file_type == "docx":
+        ac_sections = extract_ac_sections_from_docx(source)
+    else:  # pdf
+        ac_sections = extract_ac_sections_from_pdf(source)
+    
+    if not ac_sections:
+        raise ValueError("No A.C. sections found in the document")
+    return ac_sections
+
+# --- Analyze extracted A.C. sections and build the report ---
+def analyze_document(ac_sections, max_workers=None, progress_callback=None,
+                     corpus=None, submission_id=None, pack=None):
+    """Run topic detection, section analysis and report generation on extracted sections"""
+    pipeline = PlagiarismPipeline(max_workers=max_workers, corpus=corpus, pack=pack)
+    if progress_callback:
+        pipeline.subscribe(_section_progress_adapter(progress_callback))
+    context = pipeline.run(ac_sections=ac_sections, submission_id=submission_id)
+    return context['report_text'], context['document_topic'], context['ac_results']
+
+def _section_progress_adapter(progress_callback):
+    """Turn section_done events into progress_callback(ac_num, result, completed, total) calls"""
+    def on_event(event, data):
+        if event == "section_done":
+            progress_callback(data['ac_num'], data['result'], data['completed'], data['total'])
+    return on_event
@@ -0,0 +1,135 @@
+"""Structured assessment report shared by the Markdown and PDF renderers.
+
+build_report turns per-section results into a Report; the app shows its
+Markdown and report_renderer lays it out as a PDF straight from the rows,
+so feedback text containing "|" or blank lines survives both.
+"""
+import re
+from dataclasses import dataclass, field
+
+from verdicts import score_value
+
+feedback_heading = "### 📑 Tutor Feedback & Marking"
+
+default_feedback = "Content demonstrates understanding of key concepts and meets assessment criteria."
+
+missing_feedback = (
+    "A.C. {ac_num} section was not found in the document but was expected based on the sequence. "
+    "Please verify this section exists in your original document."
+)
+
+# Cell separators, except the escaped "\|" written for pipes inside a cell
+_cell_separator = re.compile(r'(?<!\\)\|')
+
+# --- Report structure ---
+@dataclass
+class ReportRow:
+    """One A.C. line of the results table"""
+    ac_num: str
+    decision: str
+    score: str
+    feedback: str
+    re_evaluated: bool = False
+
+    @property
+    def label(self):
+        return f"{self.ac_num} (re-evaluated)" if self.re_evaluated else self.ac_num
+
+@dataclass
+class Report:
+    """Title, results table and tutor feedback of one booklet's report"""
+    document_topic: str
+    rows: list = field(default_factory=list)
+    tutor_feedback: str = None
+
+    @property
+    def title(self):
+        return f"{self.document_topic} - Plagiarism Assessment Report"
+
+    def table_markdown(self):
+        """Title and results table as Markdown"""
+        lines = [
+            f"📘 **{self.title}**\n",
+            "| A.C No | Pass/Redo | Plagiarism Score | Feedback |\n|--------|------------|------------------|----------|"
+        ]
+        for row in self.rows:
+            cells = [row.label, row.decision, row.score, row.feedback]
+            lines.append("| " + " | ".join(markdown_cell(cell) for cell in cells) + " |")
+        return "\n".join(lines)
+
+    def to_markdown(self):
+        """The whole report as Markdown; without tutor feedback only the table"""
+        table = self.table_markdown()
+        if self.tutor_feedback is None:
+            return table
+        return "\n".join([table, f"\n{feedback_heading}\n", self.tutor_feedback])
+
+    @classmethod
+    def from_markdown(cls, report_text, document_topic=None):
+        """Rebuild a Report from generate_report output"""
+        head, _, tutor_feedback = report_text.partition(f"\n{feedback_heading}\n")
+        parts = head.split("\n\n")
+        title = parts[0].replace("📘", "").replace("**", "").strip()
+        if title.endswith(" - Plagiarism Assessment Report"):
+            document_topic = title[:-len(" - Plagiarism Assessment Report")]
+        report = cls(document_topic or title)
+
+        table_lines = parts[1].split('\n') if len(parts) > 1 else []
+        for line in table_lines[2:]:
+            cells = [cell.strip().replace('\\|', '|') for cell in _cell_separator.split(line)[1:-1]]
+            if len(cells) != 4:
+                continue
+            label, decision, score, feedback = cells
+            re_evaluated = label.endswith(" (re-evaluated)")
+            ac_num = label[:-len(" (re-evaluated)")] if re_evaluated else label
+            report.rows.append(ReportRow(ac_num, decision, score, feedback, re_evaluated))
+
+        if tutor_feedback:
+            report.tutor_feedback = tutor_feedback.lstrip('\n')
+        return report
+
+def markdown_cell(text):
+    """Keep a value inside its table cell: no line breaks, pipes escaped"""
+    return ' '.join(str(text).split()).replace('|', '\\|')
+
+# --- Build a report from section results ---
+def build_report(ac_results, document_topic, tutor_feedback=None):
+    """Report with a row for every A.C. from the first to the last of each series.
+
+    Sections missing from ac_results within a series get a placeholder row.
+    """
+    report = Report(document_topic, tutor_feedback=tutor_feedback)
+
+    # Group by major number (1.x, 2.x, ...) and fill each range from min to max
+    major_numbers = {}
+    for ac_num in ac_results:
+        major, minor = ac_num.split('.')[:2]
+        major_numbers.setdefault(int(major), []).append(int(minor))
+
+    for major in sorted(major_numbers):
+        minors = major_numbers[major]
+        for minor in range(min(minors), max(minors) + 1):
+            ac_num = f"{major}.{minor}"
+            if ac_num in ac_results:
+                report.rows.append(result_row(ac_num, ac_results[ac_num]))
+            else:
+                report.rows.append(ReportRow(ac_num, "Pass", "0%", missing_feedback.format(ac_num=ac_num)))
+    return report
+
+def result_row(ac_num, data):
+    """Table row for one analyzed section"""
+    # Ensure all fields have values
+    plagiarism = data.get("plagiarism", "No")
+    score = f"{score_value(data.get('score', 0))}%"
+    level = data.get("level", "Low")
+    feedback = data.get("feedback", "Analysis completed successfully.")
+
+    # Determine pass/redo decision
+    decision = "Pass" if plagiarism.lower() == "no" or level.lower() in ["low", "medium"] else "Redo"
+
+    # Ensure feedback is not empty
+    if not feedback or len(feedback.strip()) < 10:
+        feedback = default_feedback
+
+    # Flag sections analyzed again for this resubmission
+    return ReportRow(ac_num, decision, score, feedback, bool(data.get("re_evaluated")))
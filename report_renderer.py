@@ -0,0 +1,235 @@
+"""PDF rendering of structured reports.
+
+The renderer builds its paragraph styles, table style and page template
+settings once per process and lays out Report objects directly, without
+going through the Markdown text. render_reports writes many reports on a
+process pool, one renderer per worker.
+"""
+import multiprocessing
+import os
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from xml.sax.saxutils import escape
+
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import landscape, letter
+from reportlab.lib.styles import ParagraphStyle, getSampleStyleSheet
+from reportlab.lib.units import inch
+from reportlab.platypus import KeepTogether, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+import metrics
+
+table_headers = ["A.C No", "Pass/Redo", "Plagiarism Score", "Feedback"]
+
+# Optimized column widths for landscape
+column_widths = [0.7*inch, 0.9*inch, 1.1*inch, 5.3*inch]
+
+# --- Styles, built once ---
+def build_styles():
+    """Paragraph styles used by the PDF report"""
+    styles = getSampleStyleSheet()
+    return {
+        'title': ParagraphStyle(
+            'Title',
+            parent=styles['Heading1'],
+            fontName='Helvetica-Bold',
+            fontSize=20,
+            alignment=1,
+            spaceAfter=0.3*inch,
+            textColor=colors.HexColor("#2E5984")
+        ),
+        'body': ParagraphStyle(
+            'Body',
+            parent=styles['BodyText'],
+            fontName='Helvetica',
+            fontSize=10,
+            leading=14,
+            spaceAfter=0.1*inch
+        ),
+        'table_header': ParagraphStyle(
+            'TableHeader',
+            parent=styles['BodyText'],
+            fontName='Helvetica-Bold',
+            fontSize=12,
+            alignment=1,
+            textColor=colors.white
+        ),
+        'table_cell': ParagraphStyle(
+            'TableCell',
+            parent=styles['BodyText'],
+            fontName='Helvetica',
+            fontSize=9,
+            leading=11,
+            wordWrap='LTR',
+            splitLongWords=False,
+            spaceBefore=0.05*inch,
+            spaceAfter=0.05*inch
+        ),
+        # Tutor feedback heading stays with the feedback that follows it
+        'tutor_heading': ParagraphStyle(
+            'TutorHeading',
+            parent=styles['Heading2'],
+            fontName='Helvetica-Bold',
+            fontSize=16,
+            alignment=1,
+            spaceBefore=0.3*inch,
+            spaceAfter=0.2*inch,
+            textColor=colors.HexColor("#2E5984"),
+            keepWithNext=True
+        )
+    }
+
+def build_table_style():
+    return TableStyle([
+        # Header styling
+        ('BACKGROUND', (0,0), (-1,0), colors.HexColor("#4A6FA5")),
+        ('TEXTCOLOR', (0,0), (-1,0), colors.white),
+        ('ALIGN', (0,0), (-1,0), 'CENTER'),
+        ('VALIGN', (0,0), (-1,-1), 'MIDDLE'),
+        ('FONT', (0,0), (-1,0), 'Helvetica-Bold', 12),
+
+        # Cell styling
+        ('BACKGROUND', (0,1), (-1,-1), colors.HexColor("#F0F8FF")),
+        ('GRID', (0,0), (-1,-1), 1, colors.HexColor("#B0C4DE")),
+        ('FONT', (0,1), (-1,-1), 'Helvetica', 9),
+        ('ALIGN', (0,0), (2,-1), 'CENTER'),
+        ('ALIGN', (3,0), (3,-1), 'LEFT'),
+        ('LEFTPADDING', (0,0), (-1,-1), 8),
+        ('RIGHTPADDING', (0,0), (-1,-1), 8),
+        ('TOPPADDING', (0,0), (-1,-1), 8),
+        ('BOTTOMPADDING', (0,0), (-1,-1), 8),
+        ('WORDWRAP', (0,0), (-1,-1), 'WORD'),
+        ('VALIGN', (0,0), (-1,-1), 'TOP'),
+    ])
+
+# --- Renderer ---
+class ReportRenderer:
+    """Lay out Report objects as landscape PDFs.
+
+    Styles are shared read-only between renders; flowables are created per
+    report, so one renderer can serve several threads at once.
+    """
+
+    def __init__(self):
+        self.styles = build_styles()
+        self.table_style = build_table_style()
+        self.page = {
+            'pagesize': landscape(letter),
+            'rightMargin': 0.5*inch,
+            'leftMargin': 0.5*inch,
+            'topMargin': 0.5*inch,
+            'bottomMargin': 0.5*inch
+        }
+
+    def table_elements(self, report):
+        """Title and results table; the tutor feedback is not needed yet"""
+        header = [Paragraph(text, self.styles['table_header']) for text in table_headers]
+        cell = self.styles['table_cell']
+        # Short cells are plain strings drawn in the table's own font, which
+        # skips paragraph line breaking; only feedback needs to wrap
+        table_data = [header] + [
+            [
+                row.label.replace(" (", "\n("),
+                row.decision,
+                row.score,
+                Paragraph(escape(row.feedback), cell)
+            ]
+            for row in report.rows
+        ]
+        table = Table(table_data, colWidths=column_widths, repeatRows=1, splitByRow=True)
+        table.setStyle(self.table_style)
+        return [
+            Paragraph(escape(report.title), self.styles['title']),
+            table,
+            Spacer(1, 0.5*inch)
+        ]
+
+    def feedback_elements(self, report):
+        """Tutor feedback heading and one paragraph per non-empty line"""
+        if report.tutor_feedback is None:
+            return []
+        elements = [Paragraph("Tutor Feedback & Marking", self.styles['tutor_heading'])]
+        paragraphs = [
+            Paragraph(escape(line.strip()), self.styles['body'])
+            for line in report.tutor_feedback.split('\n')
+            if line.strip()
+        ]
+        # Keep tutor feedback together on the same page
+        if paragraphs:
+            elements.append(KeepTogether(paragraphs))
+        return elements
+
+    def render(self, report, file_path, table_elements=None):
+        """Write report to file_path (a path or a binary file object).
+
+        table_elements may come from table_elements() ahead of time, so the
+        table is laid out while the tutor feedback is still being written.
+        """
+        start = time.perf_counter()
+        elements = list(table_elements) if table_elements is not None else self.table_elements(report)
+        elements.extend(self.feedback_elements(report))
+        SimpleDocTemplate(file_path, **self.page).build(elements)
+        metrics.observe('plagiarism_render_seconds', time.perf_counter() - start)
+
+_renderer = None
+_renderer_lock = threading.Lock()
+
+def get_renderer():
+    """Return the process-wide renderer, building its styles on first use"""
+    global _renderer
+    if _renderer is None:
+        with _renderer_lock:
+            if _renderer is None:
+                _renderer = ReportRenderer()
+    return _renderer
+
+# --- Batch rendering on a process pool ---
+def render_chunk(jobs):
+    """Render (report, file_path) pairs; return (file_path, error or None) for each"""
+    renderer = get_renderer()
+    outcomes = []
+    for report, file_path in jobs:
+        try:
+            renderer.render(report, file_path)
+            outcomes.append((file_path, None))
+        except Exception as e:
+            outcomes.append((file_path, f"{type(e).__name__}: {e}"))
+    return outcomes
+
+def render_chunk_with_metrics(jobs):
+    """render_chunk in a pool worker, returning its outcomes and the worker's metrics since the last chunk"""
+    return render_chunk(jobs), metrics.registry.drain()
+
+def start_render_pool(workers=None):
+    """Process pool whose workers build their renderer once at startup"""
+    return ProcessPoolExecutor(
+        max_workers=workers or os.cpu_count() or 1,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=get_renderer
+    )
+
+def render_reports(jobs, workers=None, chunk_size=16):
+    """Render many (report, file_path) pairs, yielding (file_path, error or None) as they finish.
+
+    workers=1 renders in this process; otherwise chunks of chunk_size
+    reports go to a process pool so pickling cost is spread over several
+    PDFs.
+    """
+    jobs = list(jobs)
+    workers = workers or os.cpu_count() or 1
+    if workers == 1 or len(jobs) <= chunk_size:
+        for outcome in render_chunk(jobs):
+            yield outcome
+        return
+
+    with start_render_pool(workers) as pool:
+        futures = [
+            pool.submit(render_chunk_with_metrics, jobs[i:i + chunk_size])
+            for i in range(0, len(jobs), chunk_size)
+        ]
+        for future in as_completed(futures):
+            outcomes, worker_metrics = future.result()
+            metrics.registry.merge(worker_metrics)
+            for outcome in outcomes:
+                yield outcome
@@ -0,0 +1,155 @@
+import re
+
+# --- Header grammars ---
+class HeaderGrammar:
+    """Describe how section headers look for one numbering scheme.
+
+    Each entry in header_patterns is a regular expression with exactly one
+    capture group holding the section number; they are combined into a
+    single precompiled pattern so every line is classified with one match.
+    inline_patterns are tried in order, anywhere in a line, only when no
+    line of a document starts with a header.
+    """
+
+    def __init__(self, name, header_patterns, inline_patterns=(), flags=re.IGNORECASE):
+        self.name = name
+        self.header_patterns = list(header_patterns)
+        self.inline_patterns = [re.compile(p, flags) for p in inline_patterns]
+        self.header_pattern = re.compile(
+            '|'.join(f'(?:{p})' for p in self.header_patterns), flags
+        )
+
+    def match(self, line):
+        """Return the section number if line starts with a header, else None"""
+        match = self.header_pattern.match(line)
+        if match:
+            # Only the matching alternative's group is set, and it is the last one
+            return match.group(match.lastindex)
+        return None
+
+# A.C. headers as written in DOCX booklets: "A.C. 1.2 COVERED:", "A.C1.2", "1.2 ..."
+docx_ac_grammar = HeaderGrammar(
+    "ac",
+    [r'A\.C\.?\s*(\d+\.\d+)', r'(\d+\.\d+)']
+)
+
+# PDF text often wraps numbers mid-line, so bare numbers must stand alone
+pdf_ac_grammar = HeaderGrammar(
+    "ac-pdf",
+    [r'A\.C\.?\s*(\d+\.\d+)', r'(\d+\.\d+)(?=\s|$)'],
+    inline_patterns=[r'A\.C\.?\s*(\d+\.\d+)\s+COVERED[:\-]?', r'A\.C\.?\s*(\d+\.\d+)']
+)
+
+# Booklets that number criteria as "Task 1.2", "Criterion 1.2" or "AC1.2"
+criteria_grammar = HeaderGrammar(
+    "criteria",
+    [r'(?:Task|Criteri(?:on|a)|AC)\s*(\d+\.\d+)', r'A\.C\.?\s*(\d+\.\d+)'],
+    inline_patterns=[r'(?:Task|Criterion|AC|A\.C\.?)\s*(\d+\.\d+)']
+)
+
+header_grammars = {
+    grammar.name: grammar for grammar in (docx_ac_grammar, pdf_ac_grammar, criteria_grammar)
+}
+
+def register_header_grammar(grammar):
+    """Make a grammar available by name to get_header_grammar"""
+    header_grammars[grammar.name] = grammar
+    return grammar
+
+def get_header_grammar(grammar):
+    """Accept a HeaderGrammar or the name of a registered one"""
+    if isinstance(grammar, HeaderGrammar):
+        return grammar
+    try:
+        return header_grammars[grammar]
+    except KeyError:
+        raise ValueError(f"Unknown header grammar: {grammar}") from None
+
+# --- Inline fallback ---
+class _InlineSections:
+    """Collect sections split at headers found anywhere in a line"""
+
+    def __init__(self, pattern):
+        self.pattern = pattern
+        self.sections = {}
+        self.current_key = None
+        self.current_lines = []
+
+    def _close(self):
+        if self.current_key is not None:
+            content = '\n'.join(self.current_lines).strip()
+            # Keep the longest text when a section number repeats
+            if self.current_key not in self.sections or len(content) > len(self.sections[self.current_key]):
+                self.sections[self.current_key] = content
+
+    def feed(self, line):
+        position = 0
+        for match in self.pattern.finditer(line):
+            if self.current_key is not None:
+                self.current_lines.append(line[position:match.start()])
+            self._close()
+            self.current_key = match.group(1)
+            self.current_lines = []
+            position = match.start()
+        if self.current_key is not None:
+            self.current_lines.append(line[position:])
+
+    def finish(self):
+        self._close()
+        self.current_key = None
+        return self.sections
+
+# --- Single-pass segmentation ---
+def iter_sections(lines, grammar=docx_ac_grammar, verbose=True):
+    """Yield (section number, content) pairs from stripped, non-empty lines.
+
+    A section runs from its header line up to the next header and is yielded
+    as soon as that next header is seen. Lines before the first header are
+    dropped. If no line starts with a header, the grammar's inline patterns
+    (collected during the same pass) decide the sections instead.
+    """
+    grammar = get_header_grammar(grammar)
+    match_header = grammar.match
+    current_key = None
+    current_lines = []
+    fallbacks = None
+
+    for line in lines:
+        key = match_header(line)
+        if key is not None:
+            if current_key is not None:
+                yield current_key, '\n'.join(current_lines)
+            current_key = key
+            current_lines = [line]
+            fallbacks = None
+            if verbose:
+                print(f"🔍 Found A.C. {key}: {line[:50]}...")
+        elif current_key is not None:
+            current_lines.append(line)
+        elif grammar.inline_patterns:
+            # No header yet, track inline references in case none ever appears
+            if fallbacks is None:
+                fallbacks = [_InlineSections(pattern) for pattern in grammar.inline_patterns]
+            for collector in fallbacks:
+                collector.feed(line)
+
+    if current_key is not None:
+        yield current_key, '\n'.join(current_lines)
+    elif fallbacks is not None:
+        if verbose:
+            print("📋 Trying fallback extraction method...")
+        for collector in fallbacks:
+            sections = collector.finish()
+            if sections:
+                for key, content in sections.items():
+                    if verbose:
+                        print(f"🔍 Fallback found A.C. {key}")
+                    yield key, content
+                break
+
+def segment_lines(lines, grammar=docx_ac_grammar, verbose=True):
+    """Return {section number: content}; a repeated number replaces the earlier section"""
+    sections = {}
+    for key, content in iter_sections(lines, grammar, verbose):
+        sections[key] = content
+    return sections
@@ -0,0 +1,219 @@
+"""Async HTTP service that streams per-section plagiarism verdicts.
+
+Usage:
+    python service.py --port 8080
+    curl -N -F file=@booklet.docx http://127.0.0.1:8080/check
+    curl -N -H "Accept: text/event-stream" -F file=@booklet.pdf http://127.0.0.1:8080/check
+
+POST /check takes a multipart upload (field "file") or a raw body with
+?filename=booklet.docx, and answers with newline-delimited JSON events
+(or Server-Sent Events when the client accepts text/event-stream):
+accepted, sections, history, topic, section (one per A.C. verdict as it
+finishes), report and done. The report event links the PDF at
+GET /reports/<id>.pdf. Adding ?learner_id=...&booklet_id=... re-checks
+only the sections changed since that learner's last submission.
+GET /metrics exposes the process's counters and latency histograms in
+the Prometheus text format (?format=json for a JSON snapshot).
+
+Every document shares one event loop; the blocking pipeline runs on a
+bounded thread pool, and model calls from all documents go through the
+backend's single client and the process-wide request scheduler.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from aiohttp import web
+
+import metrics
+from plagiarism_backend import PlagiarismPipeline
+
+# Documents processed at the same time; model calls are capped separately
+max_documents = int(os.environ.get("PLAGIARISM_SERVICE_DOCUMENTS", "8"))
+
+# Where finished PDF reports are kept, by report id
+default_report_dir = os.path.join(tempfile.gettempdir(), "plagiarism_reports")
+
+supported_types = ("docx", "pdf")
+
+# --- Event encoding ---
+def encode_ndjson(event, data):
+    return (json.dumps({'event': event, **data}) + "\n").encode("utf-8")
+
+def encode_sse(event, data):
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n".encode("utf-8")
+
+# --- Request handling ---
+async def read_upload(request):
+    """Return (file name, bytes) from a multipart upload or a raw request body"""
+    if request.content_type.startswith("multipart/"):
+        reader = await request.multipart()
+        async for part in reader:
+            if part.name == "file":
+                return part.filename or "upload", await part.read()
+        raise web.HTTPBadRequest(text="Missing 'file' field")
+    file_name = request.query.get("filename")
+    if not file_name:
+        raise web.HTTPBadRequest(text="Raw uploads need ?filename=")
+    return file_name, await request.read()
+
+def run_pipeline(source, file_type, pdf_path, emit, learner_id=None, booklet_id=None):
+    """Run the pipeline on a worker thread, forwarding its events through emit.
+
+    source is the uploaded document's bytes (or a view of them), parsed in place.
+    """
+    def on_event(event, data):
+        if event == "sections_extracted":
+            emit("sections", {
+                'found': list(data['ac_sections']),
+                'missing': data['missing_sections']
+            })
+        elif event == "history_loaded":
+            emit("history", {'reused': data['reused'], 'changed': data['changed']})
+        elif event == "topic_detected":
+            emit("topic", {'document_topic': data['document_topic']})
+        elif event == "section_done":
+            emit("section", {
+                'ac_num': data['ac_num'],
+                'result': data['result'],
+                'completed': data['completed'],
+                'total': data['total'],
+                'reused': data['reused']
+            })
+
+    pipeline = PlagiarismPipeline()
+    pipeline.subscribe(on_event)
+    return pipeline.run(
+        source,
+        file_type,
+        pdf_path=pdf_path,
+        learner_id=learner_id,
+        booklet_id=booklet_id
+    )
+
+async def handle_check(request):
+    app = request.app
+    file_name, data = await read_upload(request)
+    file_type = os.path.splitext(file_name)[1].lower().lstrip('.')
+    if file_type not in supported_types:
+        raise web.HTTPBadRequest(text=f"Unsupported file type: {file_name}")
+
+    use_sse = "text/event-stream" in request.headers.get("Accept", "")
+    encode = encode_sse if use_sse else encode_ndjson
+    response = web.StreamResponse(headers={
+        'Content-Type': "text/event-stream" if use_sse else "application/x-ndjson",
+        'Cache-Control': "no-cache"
+    })
+    await response.prepare(request)
+
+    report_id = uuid.uuid4().hex
+    pdf_path = os.path.join(app['report_dir'], f"{report_id}.pdf")
+    loop = asyncio.get_running_loop()
+    events = asyncio.Queue()
+
+    def emit(event, payload):
+        # Called from the pipeline thread
+        loop.call_soon_threadsafe(events.put_nowait, (event, payload))
+
+    start = time.perf_counter()
+    task = loop.run_in_executor(
+        app['executor'], run_pipeline, memoryview(data), file_type, pdf_path, emit,
+        request.query.get("learner_id"), request.query.get("booklet_id")
+    )
+    task.add_done_callback(lambda _: loop.call_soon_threadsafe(events.put_nowait, None))
+
+    client_gone = False
+
+    async def send(event, payload):
+        nonlocal client_gone
+        if client_gone:
+            return
+        try:
+            await response.write(encode(event, payload))
+        except (ConnectionResetError, asyncio.CancelledError):
+            # The document still finishes; its events are just not delivered
+            client_gone = True
+
+    await send("accepted", {'report_id': report_id, 'file_name': file_name})
+    while True:
+        item = await events.get()
+        if item is None:
+            break
+        await send(*item)
+
+    try:
+        run = await task
+    except Exception as e:
+        await send("error", {'error': f"{type(e).__name__}: {e}"})
+    else:
+        await send("report", {
+            'document_topic': run['document_topic'],
+            'ac_results': run['ac_results'],
+            'report_text': run['report_text'],
+            'pdf_url': f"/reports/{report_id}.pdf"
+        })
+        await send("done", {
+            'seconds': round(time.perf_counter() - start, 3),
+            'timings': {stage: round(seconds, 3) for stage, seconds in run['timings'].items()}
+        })
+
+    if not client_gone:
+        await response.write_eof()
+    return response
+
+async def handle_report(request):
+    report_id = request.match_info['report_id']
+    path = os.path.join(request.app['report_dir'], f"{report_id}.pdf")
+    if not os.path.isfile(path):
+        raise web.HTTPNotFound(text="Report not found")
+    return web.FileResponse(path, headers={'Content-Type': "application/pdf"})
+
+async def handle_health(request):
+    return web.json_response({'status': "ok"})
+
+async def handle_metrics(request):
+    """This process's metrics as Prometheus text, or JSON with ?format=json"""
+    snapshot_data = metrics.registry.snapshot()
+    if request.query.get("format") == "json":
+        return web.json_response(snapshot_data)
+    return web.Response(text=metrics.prometheus_text(snapshot_data),
+                        content_type="text/plain", charset="utf-8")
+
+# --- Application setup ---
+def create_app(report_dir=None, documents=None):
+    """Build the aiohttp application with its shared thread pool"""
+    app = web.Application(client_max_size=200 * 1024 * 1024)
+    app['report_dir'] = report_dir or os.environ.get("PLAGIARISM_SERVICE_REPORT_DIR") or default_report_dir
+    os.makedirs(app['report_dir'], exist_ok=True)
+    app['executor'] = ThreadPoolExecutor(
+        max_workers=documents or max_documents, thread_name_prefix="document"
+    )
+
+    async def close_executor(app):
+        app['executor'].shutdown(wait=False, cancel_futures=True)
+
+    app.on_cleanup.append(close_executor)
+    app.router.add_post("/check", handle_check)
+    app.router.add_get(r"/reports/{report_id:[0-9a-f]+}.pdf", handle_report)
+    app.router.add_get("/health", handle_health)
+    app.router.add_get("/metrics", handle_metrics)
+    return app
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve plagiarism checks over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--report-dir", help="directory for PDF reports")
+    parser.add_argument("--documents", type=int, help="documents processed at the same time")
+    args = parser.parse_args(argv)
+
+    print(f"🌐 Plagiarism service listening on http://{args.host}:{args.port}")
+    web.run_app(create_app(args.report_dir, args.documents), host=args.host, port=args.port, print=None)
+
+if __name__ == "__main__":
+    main()
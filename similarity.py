@@ -0,0 +1,161 @@
+import random
+import re
+import threading
+import zlib
+
+# Shingle size in words and number of MinHash permutations
+default_shingle_size = 5
+default_num_perm = 128
+
+# Mersenne prime used by the universal hash family
+_mersenne_prime = (1 << 61) - 1
+_max_hash = (1 << 32) - 1
+
+_word_pattern = re.compile(r'[a-z0-9]+')
+
+# --- Tokenize section text ---
+def tokenize(text):
+    """Lowercase word tokens with punctuation and layout removed"""
+    return _word_pattern.findall(text.lower())
+
+# --- Word n-gram shingles ---
+def shingle(text, size=None):
+    """Return the set of hashed word n-grams for text"""
+    size = size or default_shingle_size
+    tokens = tokenize(text)
+    if not tokens:
+        return set()
+    if len(tokens) < size:
+        # Short sections still get one shingle so they can be compared
+        return {zlib.crc32(' '.join(tokens).encode('utf-8'))}
+    return {
+        zlib.crc32(' '.join(tokens[i:i + size]).encode('utf-8'))
+        for i in range(len(tokens) - size + 1)
+    }
+
+# --- MinHash signatures ---
+class MinHasher:
+    """Build MinHash signatures with a fixed, seeded hash family.
+
+    The seed is fixed so signatures stay comparable across processes and
+    can be stored on disk.
+    """
+
+    def __init__(self, num_perm=None, seed=1):
+        self.num_perm = num_perm or default_num_perm
+        rng = random.Random(seed)
+        self.permutations = [
+            (rng.randint(1, _mersenne_prime - 1), rng.randint(0, _mersenne_prime - 1))
+            for _ in range(self.num_perm)
+        ]
+
+    def signature(self, shingles):
+        """Return the MinHash signature of a shingle set as a tuple of ints"""
+        if not shingles:
+            return (_max_hash,) * self.num_perm
+        prime = _mersenne_prime
+        return tuple(
+            min((a * x + b) % prime for x in shingles) & _max_hash
+            for a, b in self.permutations
+        )
+
+def estimate_jaccard(sig_a, sig_b):
+    """Estimate Jaccard similarity from two MinHash signatures"""
+    if not sig_a:
+        return 0.0
+    return sum(1 for a, b in zip(sig_a, sig_b) if a == b) / len(sig_a)
+
+def containment(shingles_a, shingles_b):
+    """Fraction of shingles_a that also appears in shingles_b"""
+    if not shingles_a:
+        return 0.0
+    return len(shingles_a & shingles_b) / len(shingles_a)
+
+_default_hasher = None
+
+def get_minhasher():
+    """Return the shared MinHasher used for every stored signature"""
+    global _default_hasher
+    if _default_hasher is None:
+        _default_hasher = MinHasher()
+    return _default_hasher
+
+# --- In-memory corpus of prior submissions ---
+class SubmissionCorpus:
+    """Compare A.C. sections against every section seen so far.
+
+    Entries are keyed by (submission_id, ac_number). Sections from the same
+    submission are never reported as matches of each other.
+    """
+
+    def __init__(self, hasher=None):
+        self.hasher = hasher or get_minhasher()
+        self.entries = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.entries)
+
+    def add(self, submission_id, ac_number, text):
+        """Add one section; an existing entry for the same key is replaced"""
+        shingles = shingle(text)
+        signature = self.hasher.signature(shingles)
+        with self._lock:
+            self.entries[(submission_id, ac_number)] = (signature, shingles)
+        return signature
+
+    def query(self, text, exclude_submission=None, threshold=0.2, top_k=5):
+        """Return the closest prior sections, best first.
+
+        Each match holds the submission id, A.C. number, the MinHash Jaccard
+        estimate and the exact share of this section's shingles found in it.
+        """
+        shingles = shingle(text)
+        if not shingles:
+            return []
+        signature = self.hasher.signature(shingles)
+
+        with self._lock:
+            entries = list(self.entries.items())
+
+        matches = []
+        for (submission_id, ac_number), (other_sig, other_shingles) in entries:
+            if submission_id == exclude_submission:
+                continue
+            jaccard = estimate_jaccard(signature, other_sig)
+            if jaccard < threshold:
+                continue
+            matches.append({
+                'submission_id': submission_id,
+                'ac_number': ac_number,
+                'jaccard': round(jaccard, 3),
+                'overlap': round(containment(shingles, other_shingles), 3)
+            })
+
+        matches.sort(key=lambda m: (m['overlap'], m['jaccard']), reverse=True)
+        return matches[:top_k]
+
+# --- Cross-submission check for a whole booklet ---
+def find_cross_submission_matches(ac_sections, corpus, submission_id, top_k=5, add=True):
+    """Score each A.C. section against prior submissions in the corpus.
+
+    Returns {ac_number: {'overlap': percent, 'matches': [...]}}. When add is
+    true the booklet's sections are stored afterwards, so later submissions
+    are compared against this one.
+    """
+    results = {}
+    for ac_number, content in ac_sections.items():
+        matches = corpus.query(content, exclude_submission=submission_id, top_k=top_k)
+        best = max((m['overlap'] for m in matches), default=0.0)
+        results[ac_number] = {
+            'overlap': round(best * 100),
+            'matches': matches
+        }
+        if matches:
+            print(f"🔁 A.C. {ac_number} overlaps {best:.0%} with {matches[0]['submission_id']} A.C. {matches[0]['ac_number']}")
+
+    if add:
+        for ac_number, content in ac_sections.items():
+            if content.strip():
+                corpus.add(submission_id, ac_number, content)
+    return results
@@ -0,0 +1,32 @@
+"""Base class for the on-disk SQLite stores (cache, history, LSH index, job queue).
+
+SQLite handles locking between processes, and a connection may only be
+used by the thread that opened it, so each thread gets its own. WAL lets
+readers carry on while another process writes; together they let the app,
+batch runs and job workers share one file.
+"""
+import os
+import sqlite3
+import threading
+
+class SQLiteStore:
+    """One SQLite file with a connection per thread; subclasses create their tables in __init__"""
+
+    # sqlite3.Row to read columns by name
+    row_factory = None
+
+    def __init__(self, path):
+        self.path = path
+        self._local = threading.local()
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            if self.row_factory is not None:
+                conn.row_factory = self.row_factory
+            self._local.conn = conn
+        return conn
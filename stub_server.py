@@ -0,0 +1,123 @@
+"""Local HTTP stub of a chat completions endpoint for offline benchmarks.
+
+Usage:
+    python stub_server.py --port 8765 --latency-ms 300 --error-rate 0.02 --throttle-rate 0.05
+    PLAGIARISM_LLM_ENDPOINT=http://127.0.0.1:8765 streamlit run app.py
+
+It answers POST .../chat/completions in the OpenAI/Azure AI Inference
+format, so the regular Azure backend can be pointed at it unchanged.
+"""
+import argparse
+import json
+import threading
+import time
+import uuid
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from llm_backends import StubBackend, StubError
+
+class StubRequestHandler(BaseHTTPRequestHandler):
+    """Serve chat completions from the server's StubBackend"""
+
+    protocol_version = "HTTP/1.1"
+
+    def log_message(self, format, *args):
+        pass
+
+    def _send_json(self, status, body, headers=None):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        try:
+            request = json.loads(self.rfile.read(length) or b"{}")
+        except ValueError:
+            self._send_json(400, {"error": {"code": "BadRequest", "message": "Invalid JSON"}})
+            return
+
+        if not self.path.split('?')[0].rstrip('/').endswith("/chat/completions"):
+            self._send_json(404, {"error": {"code": "NotFound", "message": self.path}})
+            return
+
+        messages = request.get("messages", [])
+        system = next((m.get("content", "") for m in messages if m.get("role") == "system"), "")
+        user = next((m.get("content", "") for m in messages if m.get("role") == "user"), "")
+        backend = self.server.backend
+        try:
+            text = backend.complete(system, user, max_tokens=request.get("max_tokens"))
+        except StubError as e:
+            self._send_json(
+                e.status_code,
+                {"error": {"code": str(e.status_code), "message": str(e)}},
+                headers=e.response.headers
+            )
+            return
+
+        self._send_json(200, {
+            "id": f"stub-{uuid.uuid4().hex}",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": request.get("model") or backend.model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": text},
+                "finish_reason": "stop"
+            }],
+            "usage": {
+                "prompt_tokens": (len(system) + len(user)) // 4,
+                "completion_tokens": len(text) // 4,
+                "total_tokens": (len(system) + len(user) + len(text)) // 4
+            }
+        })
+
+def start_stub_server(backend=None, host="127.0.0.1", port=0):
+    """Start a stub server on a background thread and return (server, endpoint URL)"""
+    server = ThreadingHTTPServer((host, port), StubRequestHandler)
+    server.daemon_threads = True
+    server.backend = backend or StubBackend.from_env()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server, f"http://{host}:{server.server_address[1]}"
+
+def main():
+    parser = argparse.ArgumentParser(description="Local chat completions stub server.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency-ms", type=float, default=200.0, help="median response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread of latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of requests failing with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="share of requests failing with 429")
+    parser.add_argument("--retry-after", type=float, default=1, help="Retry-After seconds sent with 429")
+    parser.add_argument("--plagiarism-rate", type=float, default=0.1, help="share of high-score verdicts")
+    parser.add_argument("--seed", type=int, help="seed for repeatable runs")
+    args = parser.parse_args()
+
+    backend = StubBackend(
+        latency_ms=args.latency_ms,
+        latency_sigma=args.latency_sigma,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        plagiarism_rate=args.plagiarism_rate,
+        seed=args.seed
+    )
+    server = ThreadingHTTPServer((args.host, args.port), StubRequestHandler)
+    server.daemon_threads = True
+    server.backend = backend
+    print(f"🧪 Stub model server listening on http://{args.host}:{args.port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+
+from llm_cache import make_cache_key
+from sqlite_store import SQLiteStore
+
+# Default history location, next to the response cache
+default_history_path = os.path.join(
+    os.path.expanduser("~"), ".cache", "plagiarism_checker", "submission_history.sqlite3"
+)
+
+# --- Fingerprint one A.C. section ---
+def section_fingerprint(content):
+    """Hash of the normalized section text, so whitespace-only edits count as unchanged"""
+    return make_cache_key("section", content, "", "", "")
+
+# --- Prior results per learner and booklet ---
+class SubmissionHistory(SQLiteStore):
+    """SQLite store of the latest verdict and fingerprint for each A.C. section.
+
+    Submissions are keyed by (learner_id, booklet_id).
+    """
+
+    def __init__(self, path=default_history_path):
+        super().__init__(path)
+
+        conn = self._connect()
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS submissions ("
+            " learner_id TEXT NOT NULL,"
+            " booklet_id TEXT NOT NULL,"
+            " document_topic TEXT,"
+            " tutor_feedback TEXT,"
+            " submissions INTEGER NOT NULL DEFAULT 1,"
+            " updated REAL NOT NULL,"
+            " PRIMARY KEY (learner_id, booklet_id))"
+        )
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS sections ("
+            " learner_id TEXT NOT NULL,"
+            " booklet_id TEXT NOT NULL,"
+            " ac_number TEXT NOT NULL,"
+            " fingerprint TEXT NOT NULL,"
+            " result TEXT NOT NULL,"
+            " PRIMARY KEY (learner_id, booklet_id, ac_number))"
+        )
+
+    def load(self, learner_id, booklet_id):
+        """Return the previous submission, or None.
+
+        The result has document_topic, tutor_feedback, submissions (count)
+        and sections: {ac_number: {'fingerprint', 'result'}}.
+        """
+        conn = self._connect()
+        row = conn.execute(
+            "SELECT document_topic, tutor_feedback, submissions FROM submissions"
+            " WHERE learner_id = ? AND booklet_id = ?",
+            (learner_id, booklet_id)
+        ).fetchone()
+        if row is None:
+            return None
+        sections = {
+            ac_number: {'fingerprint': fingerprint, 'result': json.loads(result)}
+            for ac_number, fingerprint, result in conn.execute(
+                "SELECT ac_number, fingerprint, result FROM sections"
+                " WHERE learner_id = ? AND booklet_id = ?",
+                (learner_id, booklet_id)
+            )
+        }
+        return {
+            'document_topic': row[0],
+            'tutor_feedback': row[1],
+            'submissions': row[2],
+            'sections': sections
+        }
+
+    def save(self, learner_id, booklet_id, document_topic, fingerprints, ac_results, tutor_feedback=None):
+        """Replace the stored submission with fingerprints and verdicts of this one"""
+        conn = self._connect()
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.execute(
+                "INSERT INTO submissions (learner_id, booklet_id, document_topic, tutor_feedback, updated)"
+                " VALUES (?, ?, ?, ?, ?)"
+                " ON CONFLICT (learner_id, booklet_id) DO UPDATE SET"
+                " document_topic = excluded.document_topic, tutor_feedback = excluded.tutor_feedback,"
+                " submissions = submissions + 1, updated = excluded.updated",
+                (learner_id, booklet_id, document_topic, tutor_feedback, time.time())
+            )
+            conn.execute(
+                "DELETE FROM sections WHERE learner_id = ? AND booklet_id = ?", (learner_id, booklet_id)
+            )
+            conn.executemany(
+                "INSERT INTO sections (learner_id, booklet_id, ac_number, fingerprint, result)"
+                " VALUES (?, ?, ?, ?, ?)",
+                [
+                    (learner_id, booklet_id, ac_number, fingerprint, json.dumps(ac_results[ac_number]))
+                    for ac_number, fingerprint in fingerprints.items()
+                    if ac_number in ac_results
+                ]
+            )
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def forget(self, learner_id, booklet_id):
+        """Drop a stored submission so the next one is analyzed in full"""
+        conn = self._connect()
+        conn.execute("DELETE FROM sections WHERE learner_id = ? AND booklet_id = ?", (learner_id, booklet_id))
+        conn.execute("DELETE FROM submissions WHERE learner_id = ? AND booklet_id = ?", (learner_id, booklet_id))
+
+_history = None
+_history_disabled = False
+_history_lock = threading.Lock()
+
+# --- Shared history instance ---
+def get_history():
+    """Return the process-wide submission history, or None when it is disabled.
+
+    PLAGIARISM_HISTORY_PATH selects the file (empty string disables it).
+    """
+    global _history, _history_disabled
+    if _history is None and not _history_disabled:
+        path = os.environ.get("PLAGIARISM_HISTORY_PATH", default_history_path)
+        with _history_lock:
+            if _history is None and not _history_disabled:
+                if not path:
+                    _history_disabled = True
+                    return None
+                try:
+                    _history = SubmissionHistory(path)
+                except (OSError, sqlite3.Error) as e:
+                    print(f"⚠️ Submission history disabled: {str(e)}")
+                    _history_disabled = True
+    return _history
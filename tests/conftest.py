@@ -0,0 +1,18 @@
+"""Shared test setup: the offline stub model and no stores under the user's home."""
+import os
+import sys
+
+root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, root)
+sys.path.insert(0, os.path.join(root, "benchmarks"))
+
+# Read at import time by the backend, so set before any test module imports it
+os.environ.update({
+    'PLAGIARISM_LLM_BACKEND': "stub",
+    'PLAGIARISM_STUB_LATENCY_MS': "0",
+    'PLAGIARISM_CACHE_PATH': "",
+    'PLAGIARISM_HISTORY_PATH': "",
+    'PLAGIARISM_TOPIC_MODEL': "",
+    'PLAGIARISM_TOPIC_EXAMPLES': "",
+})
+os.environ.pop("PLAGIARISM_INDEX_PATH", None)
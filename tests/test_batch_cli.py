@@ -0,0 +1,20 @@
+"""Command-line validation of the batch grader."""
+import pytest
+
+import batch_cli
+
+@pytest.mark.parametrize("argv", [
+    ["--extract-workers", "0"],
+    ["--booklet-workers", "-2"],
+    ["--render-workers", "-1"],
+    ["--render-workers", "two"],
+])
+def test_bad_worker_counts_are_rejected(tmp_path, argv, capsys):
+    with pytest.raises(SystemExit) as exit_info:
+        batch_cli.main([str(tmp_path)] + argv)
+    assert exit_info.value.code == 2
+    assert argv[0] in capsys.readouterr().err
+
+def test_render_workers_accepts_zero():
+    assert batch_cli.non_negative_int("0") == 0
+    assert batch_cli.non_negative_int("3") == 3
@@ -0,0 +1,56 @@
+"""Uploads are parsed in place, whatever form they arrive in."""
+import io
+import os
+
+import pytest
+
+from document_sources import BufferReader, document_path, open_document
+
+data = bytes(range(256)) * 64
+
+class Stream(io.RawIOBase):
+    """A pipe-like upload that can only be read forwards"""
+
+    def __init__(self, data):
+        self._data = io.BytesIO(data)
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        return self._data.readinto(buffer)
+
+def sources(tmp_path):
+    path = tmp_path / "upload.bin"
+    path.write_bytes(data)
+    return [str(path), path, data, bytearray(data), memoryview(data), io.BytesIO(data), Stream(data)]
+
+def test_every_source_reads_the_same_seekable_bytes(tmp_path):
+    for source in sources(tmp_path):
+        with open_document(source) as stream:
+            assert stream.seekable()
+            stream.seek(100)
+            assert stream.read(10) == data[100:110]
+            stream.seek(0)
+            assert stream.read() == data
+
+def test_buffer_reader_seeks_from_the_end():
+    reader = BufferReader(data)
+    assert reader.seek(-6, io.SEEK_END) == len(data) - 6
+    assert reader.read() == data[-6:]
+    assert reader.read() == b""
+
+def test_document_path_removes_its_temporary_file(tmp_path):
+    path = str(tmp_path / "upload.bin")
+    with open(path, "wb") as f:
+        f.write(data)
+    with document_path(path) as same:
+        assert same == path
+
+    with pytest.raises(RuntimeError):
+        with document_path(io.BytesIO(data), ".pdf") as temporary:
+            assert temporary.endswith(".pdf")
+            with open(temporary, "rb") as f:
+                assert f.read() == data
+            raise RuntimeError("parsing failed")
+    assert not os.path.exists(temporary)
@@ -0,0 +1,17 @@
+"""The import-time budget of benchmarks/bench_import_time.py, enforced by the test suite."""
+import statistics
+
+import pytest
+
+from bench_import_time import budget_ms, checked_modules, deferred_packages, measure
+
+@pytest.mark.parametrize("module", checked_modules)
+def test_import_time_budget(module):
+    # python -X importtime -c "import <module>" in a fresh interpreter, three times
+    runs = [measure(module) for _ in range(3)]
+    median_ms = statistics.median(total for total, _ in runs) / 1000
+    assert median_ms <= budget_ms, f"{module} imports in {median_ms:.1f} ms (budget {budget_ms:.0f} ms)"
+
+    names = {name.lstrip('>') for name in runs[-1][1]}
+    eager = [pkg for pkg in deferred_packages if any(n == pkg or n.startswith(pkg + '.') for n in names)]
+    assert not eager, f"{module} eagerly imports {', '.join(eager)}"
@@ -0,0 +1,75 @@
+"""Job queue workers, run end to end on the offline stub model."""
+import os
+import time
+
+import pytest
+
+import job_queue
+from job_queue import JobQueue, WorkerPool, done, failed, running
+
+def test_claim_fails_job_after_max_attempts(tmp_path, monkeypatch):
+    """A job requeued every time its worker dies is eventually given up"""
+    monkeypatch.setattr(job_queue, "max_attempts", 2)
+    queue = JobQueue(str(tmp_path))
+    job_id = queue.submit(b"%PDF-", "booklet.pdf")
+    for _ in range(2):
+        assert queue.claim("host:1")['id'] == job_id
+        queue.requeue_worker("host:1")
+
+    assert queue.claim("host:1") is None
+    job = queue.get(job_id)
+    assert job['status'] == failed
+    assert "2 attempts" in job['error']
+    assert not os.path.exists(job['input_path'])
+
+def test_graceful_requeue_is_not_an_attempt(tmp_path, monkeypatch):
+    """Workers stopped by SIGTERM requeue their job without using up its attempts"""
+    monkeypatch.setattr(job_queue, "max_attempts", 2)
+    queue = JobQueue(str(tmp_path))
+    job_id = queue.submit(b"%PDF-", "booklet.pdf")
+    for _ in range(5):
+        assert queue.claim("host:1")['id'] == job_id
+        queue.requeue(job_id)
+
+    job = queue.claim("host:1")
+    assert job['id'] == job_id
+    assert job['status'] == running
+    assert job['attempts'] == 1
+
+def test_worker_pool_extracts_long_pdf(tmp_path, monkeypatch):
+    """Job workers start the PDF page pool, which daemon processes may not do"""
+    pytest.importorskip("PyPDF2")
+    pytest.importorskip("reportlab")
+    from synthetic_booklets import booklet_bytes
+
+    # Spawned workers inherit this environment
+    for name, value in {
+        'PLAGIARISM_LLM_BACKEND': "stub",
+        'PLAGIARISM_STUB_LATENCY_MS': "1",
+        'PLAGIARISM_CACHE_PATH': "",
+        'PLAGIARISM_HISTORY_PATH': "",
+        'PLAGIARISM_TOPIC_MODEL': "",
+        'PLAGIARISM_TOPIC_EXAMPLES': "",
+        'PLAGIARISM_METRICS_DIR': str(tmp_path / "metrics"),
+        'PLAGIARISM_PDF_WORKERS': "2",
+        'PLAGIARISM_PDF_PARALLEL_MIN_PAGES': "2",
+    }.items():
+        monkeypatch.setenv(name, value)
+    monkeypatch.delenv("PLAGIARISM_INDEX_PATH", raising=False)
+
+    data = booklet_bytes("pdf", sections=12, words_per_section=400, seed=3)
+    pool = WorkerPool(str(tmp_path / "jobs"), workers=1, poll_interval=0.1).start()
+    try:
+        assert not any(process.daemon for process in pool._processes)
+        job_id = pool.queue.submit(data, "booklet.pdf")
+        deadline = time.monotonic() + 120
+        while time.monotonic() < deadline:
+            job = pool.queue.get(job_id)
+            if job['status'] in (done, failed):
+                break
+            time.sleep(0.2)
+    finally:
+        pool.stop()
+
+    assert job['status'] == done, job['error']
+    assert len(job['result']['ac_results']) == 12
@@ -0,0 +1,51 @@
+"""Content-addressed keys and the SQLite response cache."""
+import time
+
+import pytest
+
+from llm_cache import LLMCache, make_cache_key
+
+def test_cache_key_ignores_whitespace_only_edits():
+    assert make_cache_key("plagiarism", "Care  plan\nreview.", "Health", "m", 1) == \
+        make_cache_key("plagiarism", " Care plan review. ", "Health ", "m", 1)
+
+@pytest.mark.parametrize("changed", [
+    ("topic", "Care plan review.", "Health", "m", 1),
+    ("plagiarism", "Care plan reviews.", "Health", "m", 1),
+    ("plagiarism", "Care plan review.", "Law", "m", 1),
+    ("plagiarism", "Care plan review.", "Health", "other-model", 1),
+    ("plagiarism", "Care plan review.", "Health", "m", 2),
+])
+def test_cache_key_changes_with_anything_that_shapes_the_answer(changed):
+    assert make_cache_key(*changed) != make_cache_key("plagiarism", "Care plan review.", "Health", "m", 1)
+
+def test_cache_key_parts_do_not_run_together():
+    assert make_cache_key("a", "bc", "", "m", 1) != make_cache_key("a", "b", "c", "m", 1)
+
+def test_get_set_and_stats(tmp_path):
+    cache = LLMCache(str(tmp_path / "cache" / "llm.sqlite3"))
+    assert cache.get("key") is None
+    cache.set("key", "value")
+    assert cache.get("key") == "value"
+    assert LLMCache(cache.path).get("key") == "value"
+
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses'], stats['entries']) == (1, 1, 1)
+
+def test_expired_entries_are_misses_and_evicted(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite3"), max_age=60)
+    cache.set("key", "value")
+    cache._connect().execute("UPDATE entries SET created = ?", (time.time() - 120,))
+    assert cache.get("key") is None
+    assert cache.evict() == 1
+
+def test_eviction_drops_least_recently_used_over_size_limit(tmp_path):
+    cache = LLMCache(str(tmp_path / "llm.sqlite3"), max_bytes=250, evict_every=1000)
+    for key in ("old", "middle", "new"):
+        cache.set(key, "x" * 100)
+        time.sleep(0.01)
+    cache.get("old")
+
+    assert cache.evict() == 1
+    assert cache.get("middle") is None
+    assert cache.get("old") == cache.get("new") == "x" * 100
@@ -0,0 +1,49 @@
+"""Persistent LSH index of prior submissions."""
+import random
+
+import pytest
+
+from lsh_index import LSHIndex
+
+def essay(seed, words=200):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(500)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+@pytest.fixture
+def index(tmp_path):
+    return LSHIndex(str(tmp_path / "index" / "lsh.sqlite3"))
+
+def test_query_finds_near_duplicate(index):
+    index.add("first", "1.1", essay(1))
+    index.add("first", "1.2", essay(2))
+    edited = essay(1).replace("word1 ", "changed ", 3)
+
+    matches = index.query(edited)
+    assert [(m['submission_id'], m['ac_number']) for m in matches] == [("first", "1.1")]
+    assert matches[0]['overlap'] > 0.8
+    assert index.query(essay(3)) == []
+
+def test_exclude_and_remove_submission(index):
+    index.add("first", "1.1", essay(1))
+    index.add("second", "1.1", essay(1))
+    assert [m['submission_id'] for m in index.query(essay(1), exclude_submission="first")] == ["second"]
+
+    index.remove_submission("second")
+    assert len(index) == 1
+    assert [m['submission_id'] for m in index.query(essay(1))] == ["first"]
+
+def test_readding_a_section_replaces_it(index):
+    index.add("first", "1.1", essay(1))
+    index.add("first", "1.1", essay(2))
+    assert len(index) == 1
+    assert index.query(essay(1)) == []
+
+def test_index_persists_across_instances(index):
+    index.add("first", "1.1", essay(1))
+    reopened = LSHIndex(index.path)
+    assert reopened.query(essay(1))[0]['submission_id'] == "first"
+
+def test_bands_must_divide_permutations(tmp_path):
+    with pytest.raises(ValueError):
+        LSHIndex(str(tmp_path / "lsh.sqlite3"), bands=30)
@@ -0,0 +1,29 @@
+"""PDF pages read serially and on the page pool."""
+import io
+
+import pytest
+
+pytest.importorskip("PyPDF2")
+pytest.importorskip("reportlab")
+
+import pdf_extraction
+from synthetic_booklets import booklet_bytes
+
+@pytest.fixture(scope="module")
+def booklet():
+    return booklet_bytes("pdf", sections=8, words_per_section=400, seed=6)
+
+def test_pool_yields_pages_in_order(booklet):
+    serial = list(pdf_extraction.iter_page_texts(booklet, workers=1))
+    try:
+        parallel = list(pdf_extraction.iter_page_texts(io.BytesIO(booklet), workers=2, min_pages=0))
+    finally:
+        pdf_extraction.shutdown_pool()
+    assert len(serial) > 2
+    assert parallel == serial
+
+def test_short_pdfs_stay_in_process(booklet, monkeypatch):
+    def no_pool(workers):
+        raise AssertionError("started the page pool")
+    monkeypatch.setattr(pdf_extraction, "get_pool", no_pool)
+    assert list(pdf_extraction.iter_page_texts(booklet, workers=4, min_pages=1000))
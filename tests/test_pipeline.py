@@ -0,0 +1,44 @@
+"""PlagiarismPipeline runs on already extracted sections, with the stub model."""
+from plagiarism_backend import PlagiarismPipeline
+from similarity import SubmissionCorpus
+
+sections = {
+    '1.1': "The learner explains how management theory applies to planning and budgeting in a care "
+           "setting, with reference to the staffing framework and the review of outcomes.",
+    '1.2': "Leadership and communication shape the quality policy, and stakeholders are consulted "
+           "through regular evaluation meetings that follow the safeguarding legislation.",
+}
+
+def overlaps(context):
+    return [context['ac_results'][ac_num]['overlap'] for ac_num in sections]
+
+def test_identical_anonymous_booklets_do_not_share_an_id():
+    corpus = SubmissionCorpus()
+    first = PlagiarismPipeline(corpus=corpus).run(ac_sections=sections)
+    second = PlagiarismPipeline(corpus=corpus).run(ac_sections=sections)
+
+    assert first['submission_id'] != second['submission_id']
+    assert overlaps(second) == [100, 100]
+    assert len(corpus) == 2 * len(sections)
+
+def test_same_file_name_in_two_directories_does_not_collide(tmp_path):
+    from synthetic_booklets import write_booklet
+
+    corpus = SubmissionCorpus()
+    paths = []
+    for directory in ("a", "b"):
+        (tmp_path / directory).mkdir()
+        paths.append(write_booklet(str(tmp_path / directory / "booklet.docx"), sections=3, seed=9))
+    first = PlagiarismPipeline(corpus=corpus).run(paths[0], "docx")
+    second = PlagiarismPipeline(corpus=corpus).run(paths[1], "docx")
+
+    assert first['submission_id'] != second['submission_id']
+    assert first['submission_id'].startswith(str(tmp_path.resolve() / "a" / "booklet.docx"))
+    assert all(second['ac_results'][ac_num]['overlap'] == 100 for ac_num in second['ac_sections'])
+    assert len(corpus) == len(first['ac_sections']) + len(second['ac_sections'])
+
+def test_resubmission_keeps_learner_booklet_id():
+    context = PlagiarismPipeline(corpus=SubmissionCorpus()).run(
+        ac_sections=sections, learner_id="learner-1", booklet_id="unit-4"
+    )
+    assert context['submission_id'] == "learner-1/unit-4"
@@ -0,0 +1,74 @@
+"""Retries, rate adaptation and the in-flight limit of the model request scheduler."""
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from plagiarism_backend import RequestScheduler
+
+class HTTPError(Exception):
+    def __init__(self, status_code):
+        super().__init__(f"HTTP {status_code}")
+        self.status_code = status_code
+
+def failing(*statuses, result="ok"):
+    """A call that raises HTTPError for each status in turn, then returns result"""
+    remaining = list(statuses)
+    def call():
+        if remaining:
+            raise HTTPError(remaining.pop(0))
+        return result
+    return call
+
+@pytest.fixture
+def scheduler():
+    return RequestScheduler(max_concurrency=8, base_delay=0.001, max_delay=0.001)
+
+def test_transient_errors_are_retried(scheduler):
+    assert scheduler.run(failing(503, 502)) == "ok"
+    stats = scheduler.stats()
+    assert (stats['requests'], stats['retries'], stats['failures']) == (3, 2, 0)
+
+def test_permanent_errors_are_not_retried(scheduler):
+    with pytest.raises(HTTPError):
+        scheduler.run(failing(400))
+    assert scheduler.stats()['requests'] == 1
+
+def test_gives_up_after_max_retries(scheduler):
+    with pytest.raises(HTTPError):
+        scheduler.run(failing(*[503] * (scheduler.max_retries + 1)))
+    stats = scheduler.stats()
+    assert (stats['retries'], stats['failures']) == (scheduler.max_retries, 1)
+
+def test_throttling_halves_concurrency(scheduler):
+    scheduler.run(failing(429))
+    assert scheduler.stats()['throttled'] == 1
+    assert scheduler.concurrency < 5
+
+def test_transient_error_rate_halves_concurrency(scheduler):
+    for _ in range(3):
+        scheduler.run(failing())
+    assert scheduler.concurrency == 8
+    # One error in four requests reaches the 25% threshold
+    scheduler.run(failing(503))
+    assert scheduler.concurrency < 5
+
+def test_requests_in_flight_stay_under_the_limit():
+    scheduler = RequestScheduler(max_concurrency=2)
+    lock = threading.Lock()
+    running = peak = 0
+
+    def call():
+        nonlocal running, peak
+        with lock:
+            running += 1
+            peak = max(peak, running)
+        time.sleep(0.02)
+        with lock:
+            running -= 1
+
+    with ThreadPoolExecutor(max_workers=6) as executor:
+        list(executor.map(lambda _: scheduler.run(call), range(12)))
+    assert peak == 2
+    assert scheduler.stats()['in_flight'] == 0
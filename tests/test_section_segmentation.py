@@ -0,0 +1,42 @@
+"""Splitting extracted lines into A.C. sections."""
+import pytest
+
+from section_segmentation import (
+    criteria_grammar, get_header_grammar, iter_sections, pdf_ac_grammar, segment_lines
+)
+
+def test_sections_run_from_header_to_next_header():
+    lines = ["Cover page", "A.C. 1.1 COVERED:", "First answer.", "More of it.", "A.C1.2", "Second answer."]
+    assert segment_lines(lines, verbose=False) == {
+        '1.1': "A.C. 1.1 COVERED:\nFirst answer.\nMore of it.",
+        '1.2': "A.C1.2\nSecond answer.",
+    }
+
+def test_sections_are_yielded_before_the_input_ends():
+    def lines():
+        yield "1.1 Introduction"
+        yield "Text."
+        yield "1.2 Method"
+        raise AssertionError("read past the header that closes 1.1")
+
+    assert next(iter_sections(lines(), verbose=False)) == ('1.1', "1.1 Introduction\nText.")
+
+def test_repeated_number_replaces_earlier_section():
+    assert segment_lines(["1.1 Draft", "Old.", "1.1 Final", "New."], verbose=False) == {'1.1': "1.1 Final\nNew."}
+
+def test_pdf_grammar_ignores_numbers_wrapped_into_text():
+    lines = ["A.C. 2.1", "Costs rose by", "3.5% last year.", "2.2 Next section"]
+    assert list(segment_lines(lines, pdf_ac_grammar, verbose=False)) == ['2.1', '2.2']
+
+def test_inline_fallback_when_no_line_starts_with_a_header():
+    lines = ["Answers: A.C. 1.1 COVERED: planning notes A.C. 1.2 COVERED: budget notes"]
+    assert segment_lines(lines, pdf_ac_grammar, verbose=False) == {
+        '1.1': "A.C. 1.1 COVERED: planning notes",
+        '1.2': "A.C. 1.2 COVERED: budget notes",
+    }
+
+def test_grammars_by_name():
+    assert get_header_grammar("criteria") is criteria_grammar
+    assert segment_lines(["Task 3.1", "Answer."], "criteria", verbose=False) == {'3.1': "Task 3.1\nAnswer."}
+    with pytest.raises(ValueError):
+        get_header_grammar("missing")
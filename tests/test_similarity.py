@@ -0,0 +1,51 @@
+"""Shingles, MinHash estimates and the in-memory submission corpus."""
+import random
+
+from similarity import (
+    MinHasher, SubmissionCorpus, containment, estimate_jaccard, find_cross_submission_matches, shingle
+)
+
+def essay(seed, words=200):
+    rng = random.Random(seed)
+    vocabulary = [f"word{i}" for i in range(500)]
+    return ' '.join(rng.choice(vocabulary) for _ in range(words))
+
+def test_shingles_ignore_case_punctuation_and_layout():
+    assert shingle("The learner, in  practice,\nreflects on care.") == shingle("the learner in practice reflects on CARE")
+
+def test_short_text_still_gets_a_shingle():
+    assert len(shingle("two words")) == 1
+    assert shingle("   ") == set()
+
+def test_minhash_estimates_jaccard():
+    a, b = shingle(essay(1)), shingle(essay(1)[:700] + ' ' + essay(2))
+    exact = len(a & b) / len(a | b)
+    hasher = MinHasher(num_perm=256)
+    assert abs(estimate_jaccard(hasher.signature(a), hasher.signature(b)) - exact) < 0.1
+    assert hasher.signature(a) == MinHasher(num_perm=256).signature(a)
+
+def test_containment():
+    a, b = shingle(essay(3)), shingle(essay(3) + ' ' + essay(4))
+    assert containment(a, b) == 1.0
+    assert containment(set(), b) == 0.0
+
+def test_corpus_finds_copied_section_from_another_submission():
+    corpus = SubmissionCorpus()
+    corpus.add("first", "1.1", essay(5))
+    corpus.add("first", "1.2", essay(6))
+
+    matches = corpus.query(essay(5), exclude_submission="second")
+    assert matches[0]['submission_id'] == "first"
+    assert matches[0]['ac_number'] == "1.1"
+    assert matches[0]['overlap'] == 1.0
+    assert corpus.query(essay(7)) == []
+
+def test_corpus_never_matches_a_submission_against_itself():
+    corpus = SubmissionCorpus()
+    results = find_cross_submission_matches({"1.1": essay(8), "1.2": essay(8)}, corpus, "first")
+    assert results["1.1"]['overlap'] == 0
+    assert len(corpus) == 2
+
+    results = find_cross_submission_matches({"2.1": essay(8)}, corpus, "second", add=False)
+    assert results["2.1"]['overlap'] == 100
+    assert len(corpus) == 2
@@ -0,0 +1,48 @@
+"""Stored verdicts of earlier submissions and their reuse on resubmission."""
+from plagiarism_backend import PlagiarismPipeline
+from similarity import SubmissionCorpus
+from submission_history import SubmissionHistory, section_fingerprint
+
+sections = {
+    '1.1': "The learner explains how management theory applies to planning and budgeting in a care "
+           "setting, with reference to the staffing framework and the review of outcomes.",
+    '1.2': "Leadership and communication shape the quality policy, and stakeholders are consulted "
+           "through regular evaluation meetings that follow the safeguarding legislation.",
+}
+
+def test_fingerprint_ignores_whitespace_only_edits():
+    assert section_fingerprint("Care plan\n review.") == section_fingerprint("Care plan review.")
+    assert section_fingerprint("Care plan review.") != section_fingerprint("Care plans review.")
+
+def test_save_load_and_forget(tmp_path):
+    history = SubmissionHistory(str(tmp_path / "history" / "history.sqlite3"))
+    assert history.load("learner-1", "unit-4") is None
+
+    result = {'plagiarism': "No", 'score': 5}
+    for _ in range(2):
+        history.save("learner-1", "unit-4", "Health and Social Care", {'1.1': "f1", '1.2': "f2"},
+                     {'1.1': result}, tutor_feedback="Well done")
+    prior = history.load("learner-1", "unit-4")
+    assert prior['submissions'] == 2
+    assert prior['tutor_feedback'] == "Well done"
+    # Sections without a verdict are not stored
+    assert prior['sections'] == {'1.1': {'fingerprint': "f1", 'result': result}}
+
+    history.forget("learner-1", "unit-4")
+    assert history.load("learner-1", "unit-4") is None
+
+def test_resubmission_reanalyzes_only_changed_sections(tmp_path):
+    history = SubmissionHistory(str(tmp_path / "history.sqlite3"))
+
+    def submit(ac_sections):
+        return PlagiarismPipeline(corpus=SubmissionCorpus(), history=history).run(
+            ac_sections=ac_sections, learner_id="learner-1", booklet_id="unit-4"
+        )
+
+    first = submit(sections)
+    assert first['reused_results'] == {}
+
+    second = submit(dict(sections, **{'1.2': sections['1.2'] + " A new closing sentence."}))
+    assert list(second['reused_results']) == ['1.1']
+    assert second['ac_results']['1.1'] == first['ac_results']['1.1']
+    assert history.load("learner-1", "unit-4")['submissions'] == 2
@@ -0,0 +1,56 @@
+"""Topic detection records only real, plainly worded model answers as examples."""
+import json
+
+import pytest
+
+import llm_backends
+import plagiarism_backend as backend
+from topic_classifier import confident_answer
+
+class FixedBackend(llm_backends.LLMBackend):
+    """A real (non-synthetic) backend that always gives the same answer"""
+    name = "fixed"
+    model = "fixed-model"
+
+    def __init__(self, answer):
+        self.answer = answer
+
+    def complete(self, system, user, temperature=None, top_p=None, max_tokens=None):
+        return self.answer
+
+@pytest.fixture
+def examples_path(tmp_path, monkeypatch):
+    path = tmp_path / "topic_examples.jsonl"
+    monkeypatch.setenv("PLAGIARISM_TOPIC_EXAMPLES", str(path))
+    yield path
+    llm_backends.set_backend(None)
+
+def recorded(path):
+    if not path.exists():
+        return []
+    return [json.loads(line)['topic'] for line in path.read_text().splitlines()]
+
+def test_stub_answers_are_not_recorded(examples_path):
+    llm_backends.set_backend(None)
+    assert backend.detect_document_topic("Safeguarding adults at risk of harm.")
+    assert recorded(examples_path) == []
+
+def test_real_answer_is_recorded(examples_path):
+    llm_backends.set_backend(FixedBackend("Health and Social Care."))
+    assert backend.detect_document_topic("Person-centred care planning.") == "Health and Social Care"
+    assert recorded(examples_path) == ["Health and Social Care"]
+
+@pytest.mark.parametrize("answer", [
+    "Unknown",
+    "I cannot tell from this excerpt",
+    "The excerpt covers a mix of care planning, law, ethics and workplace safety",
+    "",
+])
+def test_hedged_answers_are_not_recorded(examples_path, answer):
+    llm_backends.set_backend(FixedBackend(answer))
+    backend.detect_document_topic("Mixed notes.")
+    assert recorded(examples_path) == []
+
+def test_confident_answer():
+    assert confident_answer("Early Years Education")
+    assert not confident_answer("Not sure")
@@ -0,0 +1,53 @@
+"""Verdict parsing: JSON verdicts, the labelled text format and stored scores."""
+import pytest
+
+from plagiarism_backend import merge_chunk_verdicts, parse_gpt_response
+from verdicts import VerdictError, format_verdict, parse_verdict_json, score_value
+
+@pytest.mark.parametrize("score, expected", [
+    (12, 12),
+    (37.6, 38),
+    ("12%", 12),
+    ("12.5%", 12),
+    ("7.9 %", 8),
+    ("10-15%", 10),
+    ("between 20 and 30", 20),
+    ("250%", 100),
+    ("N/A", 0),
+    ("", 0),
+    (None, 0),
+    (True, 0),
+])
+def test_score_value(score, expected):
+    assert score_value(score) == expected
+
+def text_verdict(score):
+    return (
+        "Plagiarism Found: No\n"
+        f"Plagiarism Score: {score}\n"
+        "Plagiarism Level: Low\n"
+        "Feedback: The learner explains the framework in their own words."
+    )
+
+def test_text_verdict_decimal_and_range_scores():
+    assert parse_gpt_response(text_verdict("12.5%"))['score'] == 12
+    assert parse_gpt_response(text_verdict("10-15%"))['score'] == 10
+
+def test_text_verdict_missing_score():
+    result = parse_gpt_response(text_verdict(""))
+    assert result['score'] == 0
+    assert result['plagiarism'] == "No"
+
+def test_merge_picks_highest_chunk_score():
+    merged = parse_gpt_response(merge_chunk_verdicts("1.1", [text_verdict("10-15%"), text_verdict("42.5%")]))
+    assert merged['score'] == 42
+
+def test_json_verdict_round_trip():
+    result = {'plagiarism': 'Yes', 'score': 64, 'level': 'High', 'feedback': "Copied from a textbook."}
+    parsed = parse_verdict_json(format_verdict(result))
+    assert parsed['score'] == 64
+    assert parsed['plagiarism'] == 'Yes'
+
+def test_json_verdict_rejects_out_of_range_score():
+    with pytest.raises(VerdictError):
+        parse_verdict_json('{"found": false, "score": 140, "level": "low", "note": "x"}')
@@ -0,0 +1,313 @@
+"""Local document topic classifier trained on earlier model answers.
+
+Usage:
+    python topic_classifier.py train                 # fit on recorded examples
+    python topic_classifier.py evaluate --holdout 0.2
+    python topic_classifier.py predict booklet_excerpt.txt
+
+Every topic a real model names plainly (not the offline stub, not a
+fallback) is recorded with its excerpt as a training example. Once a classifier has been trained, detect_document_topic asks it
+first and only calls the model when its confidence is below
+PLAGIARISM_TOPIC_MIN_CONFIDENCE.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import re
+import threading
+import time
+import zlib
+
+# Default locations, next to the response cache
+default_examples_path = os.path.join(
+    os.path.expanduser("~"), ".cache", "plagiarism_checker", "topic_examples.jsonl"
+)
+default_model_path = os.path.join(
+    os.path.expanduser("~"), ".cache", "plagiarism_checker", "topic_model.json"
+)
+
+# Hashed feature space and the excerpt length the model prompt uses too
+feature_bits = 18
+excerpt_chars = 2000
+
+_word_pattern = re.compile(r'[a-z][a-z0-9]+')
+
+stop_words = frozenset(
+    "the and for are was were with that this from have has had not but can will would should "
+    "their they them there these those which what when where who how its into also been being "
+    "such than then more most other some any each all our your his her she him you may must "
+    "one two use used using within about between over under".split()
+)
+
+# --- Features ---
+def tokenize(text):
+    return [word for word in _word_pattern.findall(text.lower()) if word not in stop_words]
+
+def term_counts(text):
+    """Hashed unigram and bigram counts of the excerpt"""
+    tokens = tokenize(text[:excerpt_chars])
+    mask = (1 << feature_bits) - 1
+    counts = {}
+    for i, token in enumerate(tokens):
+        grams = (token, f"{tokens[i - 1]} {token}") if i else (token,)
+        for gram in grams:
+            bucket = zlib.crc32(gram.encode('utf-8')) & mask
+            counts[bucket] = counts.get(bucket, 0) + 1
+    return counts
+
+def normalize_topic(topic):
+    return re.sub(r'\s+', ' ', re.sub(r'[^a-zA-Z0-9\s]', '', topic or '')).strip()
+
+# Words of an answer that hedges instead of naming a topic
+uncertain_words = {"unknown", "unclear", "unsure", "cannot", "unable", "sorry", "not", "various", "mixed"}
+
+def confident_answer(topic):
+    """Whether a model answer names one topic plainly enough to train on"""
+    words = normalize_topic(topic).lower().split()
+    # The prompt asks for 3-5 words; longer answers are explanations
+    return 1 <= len(words) <= 6 and not uncertain_words.intersection(words)
+
+# --- Classifier ---
+class TopicClassifier:
+    """Hashed TF-IDF features with a multinomial logistic regression.
+
+    Pure Python over sparse dicts: a prediction touches only the excerpt's
+    own features, so it takes microseconds rather than a model round trip.
+    """
+
+    def __init__(self, classes=(), idf=None, default_idf=1.0, weights=None, bias=None):
+        self.classes = list(classes)
+        self.idf = idf or {}
+        self.default_idf = default_idf
+        self.weights = weights or [{} for _ in self.classes]
+        self.bias = bias or [0.0] * len(self.classes)
+
+    def features(self, text):
+        """L2-normalized TF-IDF vector as {bucket: value}"""
+        vector = {
+            bucket: (1.0 + math.log(count)) * self.idf.get(bucket, self.default_idf)
+            for bucket, count in term_counts(text).items()
+        }
+        norm = math.sqrt(sum(value * value for value in vector.values()))
+        if norm:
+            for bucket in vector:
+                vector[bucket] /= norm
+        return vector
+
+    def _probabilities(self, vector):
+        scores = [
+            self.bias[k] + sum(value * weights.get(bucket, 0.0) for bucket, value in vector.items())
+            for k, weights in enumerate(self.weights)
+        ]
+        top = max(scores)
+        exps = [math.exp(score - top) for score in scores]
+        total = sum(exps)
+        return [e / total for e in exps]
+
+    def predict(self, text):
+        """Return (topic, probability), or (None, 0.0) when the model cannot decide"""
+        if len(self.classes) < 2:
+            return None, 0.0
+        vector = self.features(text)
+        if not vector:
+            return None, 0.0
+        probabilities = self._probabilities(vector)
+        best = max(range(len(probabilities)), key=probabilities.__getitem__)
+        return self.classes[best], probabilities[best]
+
+    def fit(self, texts, topics, epochs=12, learning_rate=0.5, l2=1e-5, seed=7):
+        """Train on parallel lists of excerpts and topic labels"""
+        self.classes = sorted(set(topics))
+        index = {topic: k for k, topic in enumerate(self.classes)}
+
+        # Document frequencies give the IDF weights
+        all_counts = [term_counts(text) for text in texts]
+        document_frequency = {}
+        for counts in all_counts:
+            for bucket in counts:
+                document_frequency[bucket] = document_frequency.get(bucket, 0) + 1
+        n = len(texts)
+        self.idf = {bucket: math.log((1 + n) / (1 + df)) + 1.0 for bucket, df in document_frequency.items()}
+        self.default_idf = math.log(1 + n) + 1.0
+
+        samples = [(self.features(text), index[topic]) for text, topic in zip(texts, topics)]
+        self.weights = [{} for _ in self.classes]
+        self.bias = [0.0] * len(self.classes)
+        rng = random.Random(seed)
+        for epoch in range(epochs):
+            rng.shuffle(samples)
+            rate = learning_rate / (1 + epoch)
+            for vector, label in samples:
+                probabilities = self._probabilities(vector)
+                for k, weights in enumerate(self.weights):
+                    gradient = probabilities[k] - (1.0 if k == label else 0.0)
+                    if abs(gradient) < 1e-4:
+                        continue
+                    self.bias[k] -= rate * gradient
+                    for bucket, value in vector.items():
+                        weight = weights.get(bucket, 0.0)
+                        weights[bucket] = weight - rate * (gradient * value + l2 * weight)
+        return self
+
+    def save(self, path):
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        model = {
+            'version': 1,
+            'feature_bits': feature_bits,
+            'classes': self.classes,
+            'idf': self.idf,
+            'default_idf': self.default_idf,
+            # Tiny weights only cost space and time
+            'weights': [{b: round(w, 6) for b, w in weights.items() if abs(w) > 1e-6} for weights in self.weights],
+            'bias': self.bias
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(model, f)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        with open(path, encoding="utf-8") as f:
+            model = json.load(f)
+        if model.get('feature_bits') != feature_bits:
+            raise ValueError(f"Topic model {path} uses a different feature space")
+        return cls(
+            classes=model['classes'],
+            idf={int(b): v for b, v in model['idf'].items()},
+            default_idf=model['default_idf'],
+            weights=[{int(b): w for b, w in weights.items()} for weights in model['weights']],
+            bias=model['bias']
+        )
+
+# --- Training examples ---
+_examples_lock = threading.Lock()
+
+def get_examples_path():
+    return os.environ.get("PLAGIARISM_TOPIC_EXAMPLES", default_examples_path)
+
+def record_example(text, topic):
+    """Append an (excerpt, topic) pair for later training; an empty path disables this"""
+    path = get_examples_path()
+    topic = normalize_topic(topic)
+    if not path or not topic or not text.strip():
+        return
+    line = json.dumps({'text': text[:excerpt_chars], 'topic': topic}) + "\n"
+    try:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with _examples_lock, open(path, "a", encoding="utf-8") as f:
+            f.write(line)
+    except OSError as e:
+        print(f"⚠️ Could not record topic example: {str(e)}")
+
+def load_examples(path, min_per_topic=3):
+    """Read recorded pairs, merging label spellings and dropping rare topics"""
+    texts, topics = [], []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            try:
+                example = json.loads(line)
+            except ValueError:
+                continue
+            texts.append(example['text'])
+            topics.append(normalize_topic(example['topic']))
+
+    # "business management" and "Business Management" are one class
+    spellings = {}
+    for topic in topics:
+        spellings.setdefault(topic.lower(), {}).setdefault(topic, 0)
+        spellings[topic.lower()][topic] += 1
+    canonical = {key: max(counts, key=counts.get) for key, counts in spellings.items()}
+    topics = [canonical[topic.lower()] for topic in topics]
+
+    totals = {}
+    for topic in topics:
+        totals[topic] = totals.get(topic, 0) + 1
+    keep = [i for i, topic in enumerate(topics) if totals[topic] >= min_per_topic]
+    return [texts[i] for i in keep], [topics[i] for i in keep]
+
+# --- Shared classifier instance ---
+_classifier = None
+_classifier_mtime = None
+_classifier_lock = threading.Lock()
+
+def get_model_path():
+    return os.environ.get("PLAGIARISM_TOPIC_MODEL", default_model_path)
+
+def get_topic_classifier():
+    """Return the trained classifier, reloading it when the model file changes; None if absent"""
+    global _classifier, _classifier_mtime
+    path = get_model_path()
+    if not path:
+        return None
+    try:
+        mtime = os.stat(path).st_mtime
+    except OSError:
+        return None
+    if mtime != _classifier_mtime:
+        with _classifier_lock:
+            if mtime != _classifier_mtime:
+                try:
+                    _classifier = TopicClassifier.load(path)
+                except (OSError, ValueError, KeyError) as e:
+                    print(f"⚠️ Topic classifier unavailable: {str(e)}")
+                    _classifier = None
+                _classifier_mtime = mtime
+    return _classifier
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train and inspect the local topic classifier.")
+    parser.add_argument("command", choices=["train", "evaluate", "predict"])
+    parser.add_argument("file", nargs="?", help="excerpt to classify (predict)")
+    parser.add_argument("--examples", default=get_examples_path(), help="recorded (text, topic) pairs")
+    parser.add_argument("--model", default=get_model_path(), help="model file")
+    parser.add_argument("--min-per-topic", type=int, default=3, help="drop topics with fewer examples")
+    parser.add_argument("--holdout", type=float, default=0.2, help="share of examples held out (evaluate)")
+    args = parser.parse_args(argv)
+
+    if args.command == "predict":
+        if not args.file:
+            parser.error("predict needs a file")
+        with open(args.file, encoding="utf-8") as f:
+            text = f.read()
+        topic, confidence = TopicClassifier.load(args.model).predict(text)
+        print(f"{topic} ({confidence:.0%})")
+        return 0
+
+    texts, topics = load_examples(args.examples, args.min_per_topic)
+    if len(set(topics)) < 2:
+        print(f"❌ Need examples of at least two topics, found {len(set(topics))}")
+        return 1
+
+    if args.command == "train":
+        start = time.perf_counter()
+        classifier = TopicClassifier().fit(texts, topics)
+        classifier.save(args.model)
+        print(f"✅ Trained on {len(texts)} examples, {len(classifier.classes)} topics "
+              f"in {time.perf_counter() - start:.1f}s -> {args.model}")
+        return 0
+
+    # evaluate: fit on part of the examples, score the rest
+    order = list(range(len(texts)))
+    random.Random(1).shuffle(order)
+    split = max(1, int(len(order) * args.holdout))
+    test, train = order[:split], order[split:]
+    classifier = TopicClassifier().fit([texts[i] for i in train], [topics[i] for i in train])
+    start = time.perf_counter()
+    predictions = [classifier.predict(texts[i]) for i in test]
+    per_prediction = (time.perf_counter() - start) / len(test)
+    print(f"Trained on {len(train)}, tested on {len(test)} examples, {len(classifier.classes)} topics")
+    print(f"Prediction time: {per_prediction * 1e6:.0f} µs per excerpt")
+    for threshold in (0.0, 0.5, 0.6, 0.7, 0.8, 0.9):
+        confident = [(p, topics[i]) for p, i in zip(predictions, test) if p[1] >= threshold]
+        correct = sum(1 for (topic, _), expected in confident if topic == expected)
+        accuracy = correct / len(confident) if confident else 0.0
+        print(f"  confidence >= {threshold:.1f}: answers {len(confident) / len(test):6.1%}, "
+              f"accuracy {accuracy:6.1%}")
+    return 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
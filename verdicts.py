@@ -0,0 +1,132 @@
+"""Compact JSON plagiarism verdicts and their validating parser.
+
+In JSON mode the model answers each section with one small object,
+
+    {"found": false, "score": 12, "level": "low", "note": "..."}
+
+instead of four labelled lines with 500-800 characters of feedback, which
+cuts output tokens (most of the per-section latency) and replaces the
+line-by-line prefix scan with one json.loads and a few type checks.
+"""
+import json
+import re
+
+levels = ("Low", "Medium", "High")
+
+_level_lookup = {level.lower(): level for level in levels}
+
+# What the "note" field asks for, by PLAGIARISM_VERDICT_FEEDBACK mode
+note_instructions = {
+    'none': None,
+    'note': "one sentence on content quality, at most 200 characters",
+    'full': "feedback about content quality, structure and understanding in 500-800 characters",
+}
+
+# Output token allowance per verdict for each mode
+note_max_tokens = {'none': 40, 'note': 100, 'full': 350}
+
+class VerdictError(ValueError):
+    """A model answer that does not match the verdict schema"""
+
+# --- Prompt fragment ---
+def verdict_schema(feedback_mode):
+    """The JSON shape the prompt asks for"""
+    fields = '"found": true or false, "score": 0-100, "level": "low", "medium" or "high"'
+    instruction = note_instructions[feedback_mode]
+    if instruction:
+        fields += f', "note": "{instruction}"'
+    return "{" + fields + "}"
+
+# --- Parsing ---
+def parse_verdict_json(text):
+    """Validate one JSON verdict and return it as an ac_results entry.
+
+    Text around the object (such as a code fence) is ignored; anything
+    that is not a well-formed verdict raises VerdictError.
+    """
+    start = text.find('{')
+    end = text.rfind('}')
+    if start < 0 or end < start:
+        raise VerdictError("no JSON object in response")
+    try:
+        data = json.loads(text[start:end + 1])
+    except ValueError as e:
+        raise VerdictError(f"invalid JSON: {e}")
+    return verdict_from_dict(data)
+
+def parse_packed_verdicts(text, expected):
+    """Validate a JSON object of verdicts keyed by A.C. number.
+
+    Returns {ac_num: verdict} for the expected sections that are valid;
+    the others are left for the caller to check one by one.
+    """
+    start = text.find('{')
+    end = text.rfind('}')
+    try:
+        data = json.loads(text[start:end + 1]) if 0 <= start < end else None
+    except ValueError:
+        data = None
+    if not isinstance(data, dict):
+        return {}
+    verdicts = {}
+    for ac_num in expected:
+        try:
+            verdicts[ac_num] = verdict_from_dict(data.get(ac_num))
+        except VerdictError:
+            continue
+    return verdicts
+
+def verdict_from_dict(data):
+    if not isinstance(data, dict):
+        raise VerdictError("verdict is not a JSON object")
+
+    found = data.get('found')
+    if isinstance(found, str) and found.strip().lower() in ("yes", "no", "true", "false"):
+        found = found.strip().lower() in ("yes", "true")
+    if not isinstance(found, bool):
+        raise VerdictError("'found' must be true or false")
+
+    score = data.get('score')
+    if isinstance(score, bool) or not isinstance(score, (int, float)) or not 0 <= score <= 100:
+        raise VerdictError("'score' must be a number from 0 to 100")
+
+    level = _level_lookup.get(str(data.get('level', '')).strip().lower())
+    if level is None:
+        raise VerdictError("'level' must be low, medium or high")
+
+    note = data.get('note') or ''
+    if not isinstance(note, str):
+        raise VerdictError("'note' must be a string")
+
+    return {
+        'plagiarism': "Yes" if found else "No",
+        'score': int(round(score)),
+        'level': level,
+        'feedback': note.strip()
+    }
+
+def format_verdict(result):
+    """JSON text of an ac_results entry, in the shape parse_verdict_json reads"""
+    return json.dumps({
+        'found': result['plagiarism'].lower().startswith('y'),
+        'score': result['score'],
+        'level': _level_lookup.get(str(result['level']).lower(), "Low").lower(),
+        'note': result['feedback']
+    })
+
+score_pattern = re.compile(r"\d+(?:\.\d+)?")
+
+def score_value(score):
+    """Score from 0 to 100 out of a number or text such as "NN%" (results saved before scores were numbers).
+
+    Only the first number counts, so "12.5%" is 12 and a range such as
+    "10-15%" is 10; text without a number is 0.
+    """
+    if isinstance(score, bool):
+        return 0
+    if not isinstance(score, (int, float)):
+        match = score_pattern.search(str(score))
+        if match is None:
+            return 0
+        score = float(match.group())
+    return max(0, min(100, int(round(score))))